@@ -0,0 +1,773 @@
+import math
+from bisect import bisect_left
+from collections import Counter
+from hashlib import blake2b
+from heapq import nlargest
+from itertools import accumulate
+from operator import itemgetter
+
+# Values treated as missing by the pure-Python summaries
+NULL_VALUES = ("", "-", "None", "nan")
+
+# Accuracy of the quantile sketch: exact below this many values per column and
+# group, and a rank error of about QUANTILE_RANK_ERROR / QUANTILE_K of the
+# count beyond that
+QUANTILE_K = 200
+QUANTILE_RANK_ERROR = 1.7
+QUARTILES = (0.25, 0.5, 0.75)
+
+# HyperLogLog registers per distinct-count sketch: 2**12, a standard error of 1.6%
+HLL_PRECISION = 12
+
+# Counters kept per column by the heavy-hitter summary (up to twice as many between reductions)
+HEAVY_HITTERS = 64
+
+
+# ---- QUANTILE SKETCH ----
+class QuantileSketch:
+    """Mergeable KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Items on level h stand for 2**h values. When the sketch is full, the
+    lowest full level is sorted and every other item moves up a level, so it
+    holds about 3k items however many values were added. The offset of the
+    items that move up alternates rather than being random, which keeps the
+    reports reproducible.
+    """
+    __slots__ = ("k", "levels", "flips", "size", "limit")
+
+    def __init__(self, k=QUANTILE_K):
+        self.k = k
+        self.levels = [[]]
+        self.flips = [0]
+        self.size = 0
+        self.limit = k
+
+    def _capacity(self, h):
+        # Levels shrink by 2/3 going down from the top one, which holds k items
+        return max(2, math.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - h)))
+
+    def _resized(self):
+        self.size = sum(map(len, self.levels))
+        self.limit = sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        while self.size >= self.limit:
+            for h, level in enumerate(self.levels):
+                if len(level) < self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                    self.flips.append(0)
+                level.sort()
+                # With an odd count the smallest item stays behind
+                start = len(level) % 2
+                self.levels[h + 1].extend(level[start + self.flips[h]::2])
+                self.flips[h] ^= 1
+                del level[start:]
+                self._resized()
+                if self.size < self.limit:
+                    break
+
+    def add(self, x):
+        self.levels[0].append(x)
+        self.size += 1
+        if self.size >= self.limit:
+            self._compress()
+
+    def __getstate__(self):
+        return self.k, self.levels, self.flips
+
+    def __setstate__(self, state):
+        self.k, self.levels, self.flips = state
+        self._resized()
+
+    def merge(self, other):
+        # Exact, and the same as adding the values one by one, while the two
+        # hold fewer than k values between them; past that the result is
+        # within the usual error but depends on how the values were split
+        if not self.size:
+            # A copy, so that a sketch restored from saved state goes on exactly as the original
+            self.levels = [list(level) for level in other.levels]
+            self.flips = list(other.flips)
+            self._resized()
+            return
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+            self.flips.append(0)
+        for level, items in zip(self.levels, other.levels):
+            level.extend(items)
+        self._resized()
+        self._compress()
+
+    def exact(self):
+        # Nothing compacted yet, so every value added is still held
+        return len(self.levels) == 1
+
+    @property
+    def error(self):
+        # Rank error of the quantiles once compacted, as a fraction of the count
+        return QUANTILE_RANK_ERROR / self.k
+
+    def quantiles(self, qs):
+        """Values at the fractions `qs`; None when empty.
+
+        While nothing has been compacted the result is exact and linearly
+        interpolated, the same as pandas' describe().
+        """
+        if len(self.levels) == 1:
+            items = sorted(self.levels[0])
+            if not items:
+                return [None] * len(qs)
+            result = []
+            for q in qs:
+                pos = (len(items) - 1) * q
+                lo = int(pos)
+                hi = min(lo + 1, len(items) - 1)
+                result.append(items[lo] + (items[hi] - items[lo]) * (pos - lo))
+            return result
+        weighted = sorted((x, 1 << h) for h, level in enumerate(self.levels) for x in level)
+        values = [x for x, _ in weighted]
+        ranks = list(accumulate(w for _, w in weighted))
+        return [values[min(bisect_left(ranks, q * ranks[-1]), len(values) - 1)] for q in qs]
+
+
+# ---- DISTINCT COUNT SKETCH ----
+def hash64(text):
+    # hash() is salted per process, which would break merging across workers and runs
+    return int.from_bytes(blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _sigma(x):
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        z_old, z = z, z + x * y
+        y += y
+        if z == z_old:
+            return z
+
+
+def _tau(x):
+    if x in (0, 1):
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        z_old, z = z, z - (1 - x) ** 2 * y
+        if z == z_old:
+            return z / 3
+
+
+class DistinctAccumulator:
+    """Non-null count and HyperLogLog distinct count of a column.
+
+    Values are added as `hash64` hashes, so a row is hashed once for all of
+    its groups. Up to 2**precision / 64 distinct hashes are kept as a set and
+    counted exactly; beyond that they are folded into 2**precision one-byte
+    registers, whose estimate has a standard error of 1.04 / sqrt(2**precision).
+    """
+    __slots__ = ("precision", "count", "hashes", "registers")
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.count = 0
+        self.hashes = set()
+        self.registers = None
+
+    @property
+    def error(self):
+        return 1.04 / math.sqrt(1 << self.precision)
+
+    def _densify(self):
+        self.registers = bytearray(1 << self.precision)
+        for h in self.hashes:
+            self._add_register(h)
+        self.hashes = None
+
+    def _add_register(self, h):
+        # First 'precision' bits pick the register, which keeps the longest run of leading zeros seen
+        bits = 64 - self.precision
+        rest = h & ((1 << bits) - 1)
+        rank = bits - rest.bit_length() + 1
+        index = h >> bits
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add_hash(self, h, n=1):
+        self.count += n
+        if self.registers is not None:
+            self._add_register(h)
+            return
+        self.hashes.add(h)
+        if len(self.hashes) > (1 << self.precision) // 64:
+            self._densify()
+
+    def add(self, val):
+        self.add_hash(hash64(val))
+
+    def __getstate__(self):
+        return self.precision, self.count, self.hashes, self.registers
+
+    def __setstate__(self, state):
+        self.precision, self.count, self.hashes, self.registers = state
+
+    def merge(self, other):
+        self.count += other.count
+        if other.registers is None:
+            for h in other.hashes:
+                self.add_hash(h, 0)
+            return
+        if self.registers is None:
+            self._densify()
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def exact(self):
+        return self.registers is None
+
+    def estimate(self):
+        if self.registers is None:
+            return len(self.hashes)
+        # Ertl's improved estimator (2017): unbiased across the whole range,
+        # without the linear-counting switch and bias tables of classic HLL
+        m = len(self.registers)
+        bits = 64 - self.precision
+        hist = [0] * (bits + 2)
+        for r in self.registers:
+            hist[r] += 1
+        z = m * _tau(1 - hist[bits + 1] / m)
+        for k in range(bits, 0, -1):
+            z = 0.5 * (z + hist[k])
+        z += m * _sigma(hist[0] / m)
+        return round(m * m / (2 * math.log(2) * z))
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "unique_values": self.estimate(),
+            "unique_error": "exact" if self.exact() else f"+/-{100 * self.error:.1f}%"
+        }
+
+
+# ---- HEAVY HITTERS ----
+class HeavyHitterAccumulator:
+    """Misra-Gries heavy hitters of a column in a fixed number of counters.
+
+    Up to 2 * capacity values are counted; past that, the (capacity + 1)-th
+    largest count is subtracted from every counter and the counters that
+    reach zero are dropped. Two summaries merge by adding their counters and
+    reducing the same way (Agarwal et al., "Mergeable Summaries", 2012).
+    A kept count is at most `error` below the true one, `error` is at most
+    count / (capacity + 1), and every value more frequent than that is kept.
+    Until the first reduction all counts are exact; from then on distinct
+    values are counted by a HyperLogLog sketch.
+    """
+    __slots__ = ("capacity", "hll_precision", "count", "counts", "error", "distinct")
+
+    def __init__(self, capacity=HEAVY_HITTERS, hll_precision=HLL_PRECISION):
+        self.capacity = capacity
+        self.hll_precision = hll_precision
+        self.count = 0
+        self.counts = {}
+        self.error = 0
+        self.distinct = None
+
+    def _start_distinct(self):
+        # Nothing has been dropped yet, so the counters hold every value seen
+        self.distinct = DistinctAccumulator(self.hll_precision)
+        for val in self.counts:
+            self.distinct.add_hash(hash64(val), 0)
+
+    def _reduce(self):
+        if self.distinct is None:
+            self._start_distinct()
+        cut = nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.error += cut
+        self.counts = {val: n - cut for val, n in self.counts.items() if n > cut}
+
+    def add(self, val, n=1):
+        self.count += n
+        counts = self.counts
+        counts[val] = counts.get(val, 0) + n
+        if self.distinct is not None:
+            self.distinct.add_hash(hash64(val), 0)
+        if len(counts) > 2 * self.capacity:
+            self._reduce()
+
+    def __getstate__(self):
+        return self.capacity, self.hll_precision, self.count, self.counts, self.error, self.distinct
+
+    def __setstate__(self, state):
+        self.capacity, self.hll_precision, self.count, self.counts, self.error, self.distinct = state
+
+    def merge(self, other):
+        self.count += other.count
+        self.error += other.error
+        if self.distinct is not None or other.distinct is not None:
+            if self.distinct is None:
+                self._start_distinct()
+            if other.distinct is not None:
+                self.distinct.merge(other.distinct)
+            else:
+                for val in other.counts:
+                    self.distinct.add_hash(hash64(val), 0)
+        counts = self.counts
+        for val, n in other.counts.items():
+            counts[val] = counts.get(val, 0) + n
+        if len(counts) > 2 * self.capacity:
+            self._reduce()
+
+    def unique_values(self):
+        return len(self.counts) if self.distinct is None else self.distinct.estimate()
+
+    def top(self, k):
+        # sorted() is stable, so equal counts keep first-seen order
+        return sorted(self.counts.items(), key=itemgetter(1), reverse=True)[:k]
+
+    def most_common(self):
+        return max(self.counts.items(), key=itemgetter(1)) if self.counts else ("N/A", 0)
+
+    def stats(self):
+        most_common = self.most_common()
+        return {
+            "count": self.count,
+            "unique_values": self.unique_values(),
+            "most_common_value": most_common[0],
+            "most_common_count": most_common[1],
+            "count_error": self.error
+        }
+
+
+# ---- COLUMN ACCUMULATORS ----
+class NumericAccumulator:
+    """Running count/sum/min/max, Welford's M2 for the variance and a quantile sketch."""
+    __slots__ = ("count", "total", "mean", "m2", "min", "max", "sketch")
+
+    def __init__(self, quantile_k=QUANTILE_K):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch(quantile_k)
+
+    def add(self, x):
+        self.count += 1
+        self.total += x
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        self.sketch.add(x)
+
+    # Compact pickling: partial states cross process boundaries per group
+    def __getstate__(self):
+        return self.count, self.total, self.mean, self.m2, self.min, self.max, self.sketch
+
+    def __setstate__(self, state):
+        self.count, self.total, self.mean, self.m2, self.min, self.max, self.sketch = state
+
+    def merge(self, other):
+        # Chan et al. pairwise update, so partial results combine into the same moments
+        if not other.count:
+            return
+        self.sketch.merge(other.sketch)
+        if not self.count:
+            self.count, self.total, self.mean, self.m2 = other.count, other.total, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def std_dev(self):
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def quartiles(self):
+        return [round(q, 2) for q in self.sketch.quantiles(QUARTILES)]
+
+    def quartile_error(self):
+        # None while the quartiles are exact (as numpy, DuckDB and pandas report them), else their rank error
+        return None if self.sketch.exact() else f"+/-{100 * self.sketch.error:.1f}% rank"
+
+    def stats(self):
+        if not self.count:
+            return {"count": 0}
+        q1, median, q3 = self.quartiles()
+        stats = {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2),
+            "min": self.min,
+            "25%": q1,
+            "50%": median,
+            "75%": q3,
+            "max": self.max,
+            "std_dev": round(self.std_dev(), 2)
+        }
+        error = self.quartile_error()
+        if error:
+            stats["quartile_error"] = error
+        return stats
+
+
+class CategoricalAccumulator:
+    """Frequency map of the non-null values of a column.
+
+    A plain dict is used rather than a Counter: with one map per column per
+    group, Counter construction alone dominates small groups.
+    """
+    __slots__ = ("freq",)
+
+    def __init__(self):
+        self.freq = {}
+
+    @property
+    def count(self):
+        return sum(self.freq.values())
+
+    def add(self, val):
+        self.freq[val] = self.freq.get(val, 0) + 1
+
+    def __getstate__(self):
+        # Wrapped in a tuple: pickle skips __setstate__ for a falsy (empty) state
+        return (self.freq,)
+
+    def __setstate__(self, state):
+        self.freq, = state
+
+    def merge(self, other):
+        # Merging partials in input order keeps first-seen order, and so tie-breaking
+        freq = self.freq
+        for val, count in other.freq.items():
+            freq[val] = freq.get(val, 0) + count
+
+    def most_common(self):
+        # Same tie-breaking as Counter.most_common(1): first value seen wins
+        return max(self.freq.items(), key=itemgetter(1)) if self.freq else ("N/A", 0)
+
+    def stats(self):
+        most_common = self.most_common()
+        return {
+            "count": self.count,
+            "unique_values": len(self.freq),
+            "most_common_value": most_common[0],
+            "most_common_count": most_common[1]
+        }
+
+
+class DummyAccumulator(CategoricalAccumulator):
+    """Counts of "1" and "0" for binary flag columns."""
+    __slots__ = ()
+
+    def stats(self):
+        count = self.count
+        ones = self.freq.get("1", 0)
+        return {
+            "count": count,
+            "1s": ones,
+            "0s": self.freq.get("0", 0),
+            "percent_1s": round(100 * ones / count, 2) if count else 0.0
+        }
+
+
+# ---- COLUMNAR UPDATES ----
+# Whole columns of a column_store.ColumnStore fed to per-group accumulators.
+# Rows are visited in file order, so the results equal row-by-row updates.
+def add_numbers(accs, values, nulls, group_ids=None):
+    """Add values[i] to accs[group_ids[i]] where nulls[i] is 0 and the id is not -1."""
+    if group_ids is None:
+        add = accs[0].add
+        for x, null in zip(values, nulls):
+            if not null:
+                add(x)
+        return
+    for g, x, null in zip(group_ids, values, nulls):
+        if g >= 0 and not null:
+            accs[g].add(x)
+
+
+def add_codes(freqs, codes, values, group_ids=None):
+    """Count values[codes[i]] into the frequency map freqs[group_ids[i]]; None values are nulls."""
+    # Counter keeps first-seen order, which is also each group's first-seen order
+    if group_ids is None:
+        counts = ((0, code, n) for code, n in Counter(codes).items())
+    else:
+        counts = ((g, code, n) for (g, code), n in Counter(zip(group_ids, codes)).items())
+    for g, code, n in counts:
+        val = values[code]
+        if g >= 0 and val is not None:
+            freq = freqs[g]
+            freq[val] = freq.get(val, 0) + n
+
+
+def add_counted(accs, codes, values, group_ids=None):
+    """Add values[codes[i]] to accs[group_ids[i]] through `add(val, n)`; None values are nulls."""
+    pairs = Counter(codes if group_ids is None else zip(group_ids, codes)).items()
+    if group_ids is None:
+        pairs = (((0, code), n) for code, n in pairs)
+    for (g, code), n in pairs:
+        val = values[code]
+        if g >= 0 and val is not None:
+            accs[g].add(val, n)
+
+
+def add_distinct(sketches, codes, hashes, group_ids=None):
+    """Add hashes[codes[i]] to the DistinctAccumulator sketches[group_ids[i]]; None hashes are nulls."""
+    pairs = Counter(codes if group_ids is None else zip(group_ids, codes)).items()
+    if group_ids is None:
+        pairs = (((0, code), n) for code, n in pairs)
+    for (g, code), n in pairs:
+        h = hashes[code]
+        if g >= 0 and h is not None:
+            sketches[g].add_hash(h, n)
+
+
+# ---- TABLE ACCUMULATOR ----
+class SummaryAccumulator:
+    """One accumulator per column, updated one row at a time.
+
+    `types` maps column name to "numeric", "dummy", "categorical" (as
+    returned by `identify_types`), "distinct" for a categorical column that
+    only gets a HyperLogLog distinct count, or "heavy" for one summarized by
+    a fixed-size heavy-hitter sketch; `parse_float` converts a cleaned numeric
+    string to a float, or None when it cannot be parsed, and `parsers` maps a
+    numeric column to its own such function in its place. `quantile_k`,
+    `hll_precision` and `heavy_hitters` set the size of the sketches.
+    `fields` lists the columns a row is read by, in the order
+    `prepare_values` takes them.
+    """
+    __slots__ = ("parse_float", "null_values", "columns", "numeric", "freqs", "distinct", "heavy", "fields", "bounds",
+                 "parsers")
+
+    def __init__(self, types, parse_float, null_values=NULL_VALUES, quantile_k=QUANTILE_K,
+                 hll_precision=HLL_PRECISION, heavy_hitters=HEAVY_HITTERS, parsers=None):
+        self.parse_float = parse_float
+        self.null_values = frozenset(null_values)
+        self.columns = {}
+        self.numeric = []
+        self.freqs = []
+        self.distinct = []
+        self.heavy = []
+        for col, typ in types.items():
+            if typ == "numeric":
+                acc = NumericAccumulator(quantile_k)
+                self.numeric.append((col, acc))
+            elif typ == "distinct":
+                acc = DistinctAccumulator(hll_precision)
+                self.distinct.append((col, acc))
+            elif typ == "heavy":
+                acc = HeavyHitterAccumulator(heavy_hitters, hll_precision)
+                self.heavy.append((col, acc))
+            else:
+                acc = DummyAccumulator() if typ == "dummy" else CategoricalAccumulator()
+                self.freqs.append((col, acc.freq))
+            self.columns[col] = acc
+        kinds = (self.numeric, self.freqs, self.distinct, self.heavy)
+        self.fields = [col for cols in kinds for col, _ in cols]
+        self.bounds = tuple(accumulate(map(len, kinds)))
+        parsers = parsers or {}
+        self.parsers = [parsers.get(col, parse_float) for col, _ in self.numeric]
+
+    def prepare(self, row):
+        return self.prepare_values([row.get(col, "") for col in self.fields])
+
+    def prepare_values(self, values):
+        # Cleans and parses a row (the values of `fields`, in order) once so it can be fed to several summaries
+        nulls = self.null_values
+        n_numeric, n_freqs, n_distinct, n_fields = self.bounds
+        vals = [str(val).strip() for val in values[:n_fields]]
+        vals = [None if val in nulls else val for val in vals]
+        nums = [None if val is None else parse(val) for parse, val in zip(self.parsers, vals)]
+        hashes = [None if val is None else hash64(val) for val in vals[n_freqs:n_distinct]]
+        return nums, vals[n_numeric:n_freqs], hashes, vals[n_distinct:]
+
+    def add_prepared(self, prepared):
+        nums, vals, hashes, heavy = prepared
+        for (_, acc), num in zip(self.numeric, nums):
+            if num is not None:
+                acc.add(num)
+        # Dummy and categorical columns are plain frequency maps, updated in place
+        for (_, freq), val in zip(self.freqs, vals):
+            if val is not None:
+                freq[val] = freq.get(val, 0) + 1
+        for (_, acc), h in zip(self.distinct, hashes):
+            if h is not None:
+                acc.add_hash(h)
+        for (_, acc), val in zip(self.heavy, heavy):
+            if val is not None:
+                acc.add(val)
+
+    def add(self, row):
+        self.add_prepared(self.prepare(row))
+
+    def update(self, rows):
+        for row in rows:
+            self.add(row)
+        return self
+
+    def parse_number(self, text):
+        # A stripped cell as `prepare` reads a numeric column: float, or None
+        return None if text in self.null_values else self.parse_float(text)
+
+    def add_columns(self, store, group_ids, summaries):
+        """Column-at-a-time `add_prepared` of every row of a column_store.ColumnStore.
+
+        Row i goes to summaries[group_ids[i]] and is skipped for an id of -1;
+        with `group_ids` None every row goes to summaries[0].
+        """
+        for col, _ in self.numeric:
+            add_numbers([summary.columns[col] for summary in summaries], *store.numeric(col), group_ids)
+        nulls = self.null_values
+        for col, _ in self.freqs:
+            codes, dictionary = store.codes(col)
+            values = [None if val in nulls else val for val in dictionary]
+            add_codes([summary.columns[col].freq for summary in summaries], codes, values, group_ids)
+        for col, _ in self.distinct:
+            codes, dictionary = store.codes(col)
+            hashes = [None if val in nulls else hash64(val) for val in dictionary]
+            add_distinct([summary.columns[col] for summary in summaries], codes, hashes, group_ids)
+        for col, _ in self.heavy:
+            codes, dictionary = store.codes(col)
+            values = [None if val in nulls else val for val in dictionary]
+            add_counted([summary.columns[col] for summary in summaries], codes, values, group_ids)
+
+    def state(self):
+        return self.columns
+
+    def merge_state(self, columns):
+        for col, acc in columns.items():
+            self.columns[col].merge(acc)
+
+    def stats(self):
+        return {col: acc.stats() for col, acc in self.columns.items()}
+
+
+# ---- GROUPED ACCUMULATOR ----
+class GroupedAccumulator:
+    """Hash aggregation over several grouping sets in a single scan.
+
+    Each grouping set is a tuple of key columns; `()` is the overall summary.
+    Every group keeps one summary built by `make_summary`, which must provide
+    `fields` and `prepare_values(values)` / `add_prepared(prepared)` so that
+    a row is cleaned once and then applied to each of its groups, plus
+    `state()` / `merge_state()` so that partial results from separate chunks
+    can be combined. Rows whose key contains a null value are left out of
+    that grouping set. A row is a dict (`add`) or the tuple of its `fields`
+    values (`add_values`, e.g. from csv_projection.iter_projected).
+    """
+
+    def __init__(self, make_summary, grouping_sets, null_values=NULL_VALUES):
+        self.make_summary = make_summary
+        self.null_values = frozenset(null_values)
+        self.groups = {tuple(keys): {} for keys in grouping_sets}
+        if () in self.groups:
+            self.groups[()][()] = make_summary()
+        self.template = make_summary()
+        # The summary's columns, then any key column not among them
+        self.fields = list(dict.fromkeys(self.template.fields + [k for keys in self.groups for k in keys]))
+        self.key_indices = [(groups, [self.fields.index(k) for k in keys]) for keys, groups in self.groups.items()]
+
+    def add(self, row):
+        self.add_values([row.get(col, "") for col in self.fields])
+
+    def add_values(self, values):
+        prepared = self.template.prepare_values(values)
+        nulls = self.null_values
+        for groups, indices in self.key_indices:
+            key = tuple(str(values[i]).strip() for i in indices)
+            if any(k in nulls for k in key):
+                continue
+            summary = groups.get(key)
+            if summary is None:
+                summary = groups[key] = self.make_summary()
+            summary.add_prepared(prepared)
+
+    def update(self, rows):
+        for row in rows:
+            self.add(row)
+        return self
+
+    def update_values(self, rows):
+        for values in rows:
+            self.add_values(values)
+        return self
+
+    def group_ids(self, store, keys):
+        """(group id per row, summaries by id) for one grouping set of a ColumnStore.
+
+        Ids are assigned in order of first appearance, creating groups as
+        `add` would; rows with a null key part get -1.
+        """
+        groups = self.groups[keys]
+        nulls = self.null_values
+        key_codes = []
+        key_values = []
+        for k in keys:
+            codes, dictionary = store.codes(k)
+            key_codes.append(codes)
+            key_values.append([None if val in nulls else val for val in dictionary])
+
+        ids = {}
+        summaries = []
+        group_ids = []
+        for codes in zip(*key_codes):
+            g = ids.get(codes)
+            if g is None:
+                key = tuple(values[code] for values, code in zip(key_values, codes))
+                if None in key:
+                    g = -1
+                else:
+                    summary = groups.get(key)
+                    if summary is None:
+                        summary = groups[key] = self.make_summary()
+                    g = len(summaries)
+                    summaries.append(summary)
+                ids[codes] = g
+            group_ids.append(g)
+        return group_ids, summaries
+
+    def update_columns(self, store):
+        """Column-at-a-time counterpart of `update` over a column_store.ColumnStore.
+
+        Needs a summary with `add_columns(store, group_ids, summaries)`; a
+        grouping set whose key columns are not in the store gets no groups,
+        as every row's key would be null.
+        """
+        for keys in self.groups:
+            if not keys:
+                self.template.add_columns(store, None, [self.groups[()][()]])
+            elif all(k in store for k in keys):
+                self.template.add_columns(store, *self.group_ids(store, keys))
+        return self
+
+    def state(self):
+        """Plain accumulator data for every group, safe to pickle between processes."""
+        return {keys: {key: summary.state() for key, summary in groups.items()}
+                for keys, groups in self.groups.items()}
+
+    def merge_state(self, state):
+        for keys, partial_groups in state.items():
+            groups = self.groups[keys]
+            for key, partial in partial_groups.items():
+                summary = groups.get(key)
+                if summary is None:
+                    summary = groups[key] = self.make_summary()
+                summary.merge_state(partial)
+        return self
+
+    def stats(self, keys):
+        return {key: summary.stats() for key, summary in self.groups[tuple(keys)].items()}
+
+    def overall_stats(self):
+        return self.groups[()][()].stats()
@@ -0,0 +1,98 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+from column_schema import cached_schema
+from csv_projection import iter_projected
+from memory_usage import peak_rss_mb
+import pure_python_fb_ads
+import pure_python_fb_posts
+import pure_python_tw_posts
+
+# Benchmark of the pure-Python read path: csv.DictReader rows against
+# column-projected tuples (csv_projection), for every dataset, reading alone
+# and reading plus the full grouped aggregation. Every measurement runs in a
+# fresh process so its peak RSS is its own. Prints rows/s and peak RSS for
+# each, and checks that both paths give the same statistics.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Datasets")
+
+DATASETS = {
+    "fb_ads": "2024_fb_ads_president_scored_anon.csv",
+    "fb_posts": "2024_fb_posts_president_scored_anon.csv",
+    "tw_posts": "2024_tw_posts_president_scored_anon.csv",
+}
+
+READERS = ["DictReader", "projected"]
+
+
+def new_aggregate(dataset, filepath):
+    # The script's aggregate for its default (all columns, exact) report
+    if dataset == "tw_posts":
+        module = pure_python_tw_posts
+        types = module.identify_types(cached_schema(filepath))
+        return module.new_aggregate(types, [(), (module.GROUP_BY_1,), module.GROUP_BY_2])
+    module = pure_python_fb_ads if dataset == "fb_ads" else pure_python_fb_posts
+    data = module.iter_csv(filepath)
+    types = module.identify_types(next(data), cached_schema(filepath))
+    data.close()
+    return module.new_aggregate(types, module.GROUPING_SETS)
+
+def iter_rows(dataset, filepath, reader, fields):
+    if reader == "DictReader":
+        module = {"fb_ads": pure_python_fb_ads, "fb_posts": pure_python_fb_posts, "tw_posts": pure_python_tw_posts}[dataset]
+        return module.iter_csv(filepath)
+    if dataset == "fb_ads":
+        return pure_python_fb_ads.iter_projected_rows(filepath, fields)
+    return iter_projected(filepath, fields)
+
+def measure(task):
+    # Worker: one read (or read + aggregate) of one dataset in a fresh process
+    dataset, filepath, reader, with_aggregate = task
+    result = new_aggregate(dataset, filepath)
+    rows = 0
+    start = time.perf_counter()
+    data = iter_rows(dataset, filepath, reader, result.fields)
+    if not with_aggregate:
+        for _ in data:
+            rows += 1
+    elif reader == "DictReader":
+        for row in data:
+            result.add(row)
+            rows += 1
+    else:
+        for values in data:
+            result.add_values(values)
+            rows += 1
+    elapsed = time.perf_counter() - start
+    stats = repr(result.overall_stats()) if with_aggregate else None
+    return rows, elapsed, peak_rss_mb(), stats
+
+def run_isolated(task):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(measure, (task,))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=DATA_DIR, help="folder with the three CSV exports")
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    args = parser.parse_args()
+
+    print(f"{'dataset':<10}{'reader':<12}{'read rows/s':>14}{'read MB':>10}{'aggregate rows/s':>18}{'aggregate MB':>14}"
+          f"{'speedup':>10}")
+    for dataset in args.datasets:
+        filepath = os.path.join(args.data, DATASETS[dataset])
+        cached_schema(filepath)  # sampled once here, not inside a timed run
+        baseline, stats = None, {}
+        for reader in READERS:
+            rows, read_time, read_peak, _ = run_isolated((dataset, filepath, reader, False))
+            rows, total_time, peak, stats[reader] = run_isolated((dataset, filepath, reader, True))
+            baseline = baseline or total_time
+            print(f"{dataset:<10}{reader:<12}{rows / read_time:>14,.0f}{read_peak:>10.1f}{rows / total_time:>18,.0f}"
+                  f"{peak:>14.1f}{baseline / total_time:>9.1f}x")
+        # Both paths must produce exactly the same report
+        if stats["DictReader"] != stats["projected"]:
+            raise AssertionError(f"projected reader disagrees with DictReader on {dataset}")
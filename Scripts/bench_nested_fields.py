@@ -0,0 +1,128 @@
+import argparse
+import ast
+import csv
+import os
+import time
+
+from nested_fields import PLATFORMS, mention_summary, nested_totals, platform_flags
+
+# Benchmark of the nested fb_ads columns: the shared nested_fields parser against
+# the per-backend ast.literal_eval helpers it replaced. Prints rows/s for each.
+
+INPUT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Datasets", "2024_fb_ads_president_scored_anon.csv")
+
+NESTED_COLS = ["delivery_by_region", "demographic_distribution", "publisher_platforms", "illuminating_mentions"]
+
+
+# ---- PREVIOUS IMPLEMENTATIONS ----
+def safe_parse_dict(val):
+    try:
+        return ast.literal_eval(val)
+    except:
+        return {}
+
+def safe_parse_list(val):
+    try:
+        return ast.literal_eval(val)
+    except:
+        return []
+
+def parse_nested_dict_column(col_data):
+    try:
+        return ast.literal_eval(col_data) if col_data and col_data.strip().startswith("{") else {}
+    except:
+        return {}
+
+def parse_nested_list_column(col_data):
+    try:
+        return ast.literal_eval(col_data) if col_data and col_data.strip().startswith("[") else []
+    except:
+        return []
+
+def totals(d):
+    return sum(v.get("spend", 0) for v in d.values()), sum(v.get("impressions", 0) for v in d.values())
+
+def pure_python_literal_eval(row):
+    # pure_python_fb_ads.preprocess_row: every nested column parsed once
+    delivery = safe_parse_dict(row["delivery_by_region"])
+    demo = safe_parse_dict(row["demographic_distribution"])
+    platforms = safe_parse_list(row["publisher_platforms"])
+    mentions = safe_parse_list(row["illuminating_mentions"])
+    return (totals(delivery), totals(demo), [p in platforms for p in PLATFORMS],
+            (len(mentions), mentions[0] if mentions else "None"))
+
+def pandas_literal_eval(row):
+    # pandas_fb_ads.clean: one apply per derived column, demographic_distribution parsed twice
+    delivery_impressions = totals(parse_nested_dict_column(row["delivery_by_region"]))[1]
+    demo_spend = totals(parse_nested_dict_column(row["demographic_distribution"]))[0]
+    demo_impressions = totals(parse_nested_dict_column(row["demographic_distribution"]))[1]
+    mention_count = len(parse_nested_list_column(row["illuminating_mentions"]))
+    return delivery_impressions, demo_spend, demo_impressions, mention_count
+
+def polars_literal_eval(row):
+    # polars_fb_ads.preprocess: parse_dict / parse_list into Object columns, then lambdas
+    delivery = parse_nested_dict_column(row["delivery_by_region"])
+    demo = parse_nested_dict_column(row["demographic_distribution"])
+    platforms = parse_nested_list_column(row["publisher_platforms"])
+    mentions = parse_nested_list_column(row["illuminating_mentions"])
+    return (totals(delivery), totals(demo), [p in platforms for p in PLATFORMS],
+            (len(mentions), mentions[0] if mentions else "None"))
+
+
+# ---- SHARED PARSER ----
+def nested_fields_parser(row):
+    return (nested_totals(row["delivery_by_region"]), nested_totals(row["demographic_distribution"]),
+            platform_flags(row["publisher_platforms"]), mention_summary(row["illuminating_mentions"]))
+
+
+CANDIDATES = [
+    ("safe_parse_dict (pure_python)", pure_python_literal_eval),
+    ("parse_nested_dict_column (pandas)", pandas_literal_eval),
+    ("parse_dict (polars)", polars_literal_eval),
+    ("nested_fields", nested_fields_parser),
+]
+
+
+def load_rows(filepath, limit):
+    rows = []
+    with open(filepath, mode="r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rows.append({col: row.get(col) or "" for col in NESTED_COLS})
+            if limit and len(rows) >= limit:
+                break
+    return rows
+
+def time_parser(parser, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            parser(row)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def check_agreement(rows):
+    # The shared parser must extract exactly what the old pure-Python path did
+    for i, row in enumerate(rows):
+        if pure_python_literal_eval(row) != nested_fields_parser(row):
+            raise AssertionError(f"nested_fields disagrees with literal_eval on row {i}: {row}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--limit", type=int, default=50000, help="rows to load (0 = all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = load_rows(args.input, args.limit)
+    check_agreement(rows)
+
+    print(f"{len(rows)} rows, best of {args.repeat}")
+    print(f"{'parser':<36}{'seconds':>10}{'rows/s':>14}{'speedup':>10}")
+    baseline = None
+    for name, fn in CANDIDATES:
+        elapsed = time_parser(fn, rows, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<36}{elapsed:>10.3f}{len(rows) / elapsed:>14,.0f}{baseline / elapsed:>9.1f}x")
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime, timezone
+from importlib import metadata
+
+from csv_chunks import write_head
+from memory_usage import peak_rss_mb
+
+# Benchmark runner for the summary and visualization scripts. Every script runs
+# in a fresh interpreter, once per warm-up and repetition, against the full
+# datasets or fixed-size heads of them. Each run records wall time, CPU time
+# (including worker processes on POSIX) and the OS-level peak RSS; one extra
+# run per script under tracemalloc records the peak of Python allocations,
+# which tracing slows down too much to time. Results are written as JSON and
+# can be compared against an earlier results file used as the baseline.
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASETS_DIR = os.path.join(SCRIPTS_DIR, "..", "Datasets")
+RESULTS_DIR = os.path.join(SCRIPTS_DIR, "..", "Outputs", "benchmarks")
+
+# The scripts hardcode their paths under this root; runs point them at the
+# benchmark's datasets and a scratch output folder instead
+SCRIPT_ROOT = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/"
+
+DATASETS = {
+    "fb_ads": "2024_fb_ads_president_scored_anon.csv",
+    "fb_posts": "2024_fb_posts_president_scored_anon.csv",
+    "tw_posts": "2024_tw_posts_president_scored_anon.csv",
+}
+
+SCRIPTS = [
+    f"{backend}_{dataset}.py"
+    for backend in ["pure_python", "numpy", "duckdb", "pandas", "polars", "viz"]
+    for dataset in DATASETS
+]
+
+PACKAGES = ["pandas", "numpy", "pyarrow", "polars", "duckdb", "matplotlib", "seaborn"]
+
+
+# ---- CHILD PROCESS ----
+def run_script(command, data_dir, output_dir, result_file, trace):
+    """Run one script as __main__ (in this process) and write its measurements to `result_file`."""
+    script, *script_args = command.split()
+    path = os.path.join(SCRIPTS_DIR, script)
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    source = source.replace(SCRIPT_ROOT + "Datasets/", data_dir + "/").replace(SCRIPT_ROOT + "Outputs/", output_dir + "/")
+    code = compile(source, path, "exec")
+    sys.argv = [path] + script_args
+    sys.path.insert(0, SCRIPTS_DIR)
+
+    # A real __main__ module, so that multiprocessing workers can find the script's functions
+    module = types.ModuleType("__main__")
+    module.__file__ = path
+    sys.modules["__main__"] = module
+
+    if trace:
+        tracemalloc.start()
+    before = os.times()
+    start = time.perf_counter()
+    exec(code, module.__dict__)
+    wall = time.perf_counter() - start
+    after = os.times()
+
+    result = {
+        "wall_s": wall,
+        "cpu_s": sum(after[:4]) - sum(before[:4]),  # user + system, own and waited-for children
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if trace:
+        result["tracemalloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# ---- PARENT PROCESS ----
+def prepare_datasets(source_dir, rows, work_dir):
+    """Directory holding the datasets for one size: the originals, or their first `rows` records."""
+    if not rows:
+        return os.path.abspath(source_dir)
+    target = os.path.join(work_dir, f"data_{rows}")
+    os.makedirs(target, exist_ok=True)
+    for name in DATASETS.values():
+        write_head(os.path.join(source_dir, name), os.path.join(target, name), rows)
+    return target
+
+
+def measure(command, data_dir, output_dir, trace=False, clear_cache=False):
+    if clear_cache:
+        # table_cache / column_store entries live next to the datasets
+        shutil.rmtree(os.path.join(data_dir, "cache"), ignore_errors=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        result_file = os.path.join(tmp, "result.json")
+        child = [sys.executable, os.path.abspath(__file__), "--child", command,
+                 data_dir.replace(os.sep, "/"), output_dir.replace(os.sep, "/"), result_file]
+        if trace:
+            child.append("--trace")
+        proc = subprocess.run(child, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                              encoding="utf-8", errors="replace")
+        if proc.returncode != 0 or not os.path.exists(result_file):
+            lines = proc.stderr.strip().splitlines()
+            return {"error": f"exit code {proc.returncode}" + (f": {lines[-1]}" if lines else "")}
+        with open(result_file, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def benchmark(command, data_dir, output_dir, warmup, repeat, trace, clear_cache):
+    for _ in range(warmup):
+        measure(command, data_dir, output_dir, clear_cache=clear_cache)
+    runs = []
+    for _ in range(repeat):
+        run = measure(command, data_dir, output_dir, clear_cache=clear_cache)
+        if "error" in run:
+            return {"error": run["error"], "runs": runs}
+        runs.append(run)
+
+    walls = [run["wall_s"] for run in runs]
+    result = {
+        "runs": runs,
+        "wall_s": {"median": statistics.median(walls), "min": min(walls), "max": max(walls),
+                   "stdev": statistics.stdev(walls) if len(walls) > 1 else 0.0},
+        "cpu_s": statistics.median(run["cpu_s"] for run in runs),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+    }
+    if trace:
+        traced = measure(command, data_dir, output_dir, trace=True, clear_cache=clear_cache)
+        result["tracemalloc_peak_mb"] = traced.get("tracemalloc_peak_mb")
+    return result
+
+
+def environment():
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            pass
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+# ---- BASELINE COMPARISON ----
+METRICS = {"median wall": lambda r: r["wall_s"]["median"], "peak RSS": lambda r: r["peak_rss_mb"]}
+
+
+def result_key(result):
+    return result["script"], result["rows"]
+
+
+def compare(results, baseline, threshold):
+    """Lines describing every metric that grew by more than `threshold` over the baseline."""
+    base = {result_key(r): r for r in baseline["results"] if "error" not in r}
+    regressions = []
+    for result in results:
+        old = base.get(result_key(result))
+        if old is None or "error" in result:
+            continue
+        for metric, value in METRICS.items():
+            before, after = value(old), value(result)
+            if before and after > before * (1 + threshold):
+                regressions.append(f"{result['script']} (rows={result['rows'] or 'all'}): {metric} "
+                                   f"{before:.2f} -> {after:.2f} (+{after / before - 1:.0%})")
+    return regressions
+
+
+def print_result(r):
+    rows = r["rows"] or "all"
+    if "error" in r:
+        print(f"{r['script']:<36}{rows:>8}  failed: {r['error']}")
+        return
+    traced = r.get("tracemalloc_peak_mb")
+    traced = f"{traced:>11.1f}" if traced is not None else f"{'-':>11}"
+    print(f"{r['script']:<36}{rows:>8}{r['wall_s']['median']:>10.2f}{r['cpu_s']:>10.2f}"
+          f"{r['peak_rss_mb']:>10.1f}{traced}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _, _, command, data_dir, output_dir, result_file, *flags = sys.argv
+        run_script(command, data_dir, output_dir, result_file, trace="--trace" in flags)
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scripts", nargs="+", default=SCRIPTS,
+                        help='scripts to run, each optionally with its flags, e.g. "polars_fb_ads.py --lazy"')
+    parser.add_argument("--data", default=DATASETS_DIR, help="folder with the three source CSVs")
+    parser.add_argument("--rows", type=int, nargs="+", default=[0],
+                        help="dataset sizes: first N records of each CSV (0 = the full files)")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip the traced run per script")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="delete the Parquet / column-store cache before every run (cold runs)")
+    parser.add_argument("--output", default=None, help="results JSON (default: Outputs/benchmarks/benchmark_<time>.json)")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative increase of median wall time or peak RSS that counts as a regression")
+    args = parser.parse_args()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    work_dir = os.path.join(RESULTS_DIR, "work")
+    output_dir = os.path.join(work_dir, "outputs")
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = datetime.now(timezone.utc)
+    print(f"{'script':<36}{'rows':>8}{'wall s':>10}{'cpu s':>10}{'rss MB':>10}{'traced MB':>11}")
+    results = []
+    for rows in args.rows:
+        data_dir = prepare_datasets(args.data, rows, work_dir)
+        for command in args.scripts:
+            result = benchmark(command, data_dir, output_dir, args.warmup, args.repeat,
+                               not args.no_tracemalloc, args.clear_cache)
+            results.append({"script": command, "rows": rows, **result})
+            print_result(results[-1])
+
+    report = {
+        "timestamp": started.isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"warmup": args.warmup, "repeat": args.repeat, "clear_cache": args.clear_cache},
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark_{started:%Y%m%d_%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.baseline}")
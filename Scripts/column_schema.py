@@ -0,0 +1,139 @@
+import csv
+import json
+
+from csv_chunks import iter_range_lines, read_header
+from table_cache import cached_table
+
+# Column kinds of a raw CSV export inferred from a bounded, stratified sample
+# of its rows instead of the first row or a full scan: the file is cut into
+# STRATA byte ranges and up to ROWS_PER_STRATUM records are read from the start
+# of each, so the head, middle and tail of an export all count and the cost
+# does not grow with the file. A column is "binary" when every sampled value is
+# 0/1, "numeric" when (nearly) every value parses as a number (unless they are
+# all distinct, like tweet ids), "nested" for list/dict literals, "empty" when
+# the sample has no values and "categorical" otherwise. The schema is cached
+# as <csv name>.column_schema.json in the cache/ folder next to the CSV, keyed
+# on the file like the cleaned tables, so every backend and viz script types
+# its columns from the same file and only the first run samples.
+# Column lists declared by a script still win for the columns they name; the
+# schema types the rest, so an export with extra columns needs no code edits.
+# A column typed numeric by the schema alone is parsed with `parse_signed`,
+# the rule it was classified by, so negative values keep their sign (the
+# scripts' own parsers drop every "-" for the columns they declare).
+
+# Bump when the sampling or the kind rules change
+SCHEMA_VERSION = 1
+
+STRATA = 16
+ROWS_PER_STRATUM = 256
+# Share of sampled values that must parse for a column to be numeric
+NUMERIC_SHARE = 0.99
+NULL_TOKENS = {"", "-", "none", "nan", "null", "n/a"}
+BINARY_TOKENS = {"0", "1", "0.0", "1.0"}
+# Numbers that never repeat in at least this many sampled values are identifiers
+ID_MIN_VALUES = 100
+SUFFIX = ".json"
+
+
+def _stratum_starts(f, start, size):
+    # The first line boundary at or after each of STRATA evenly spaced offsets
+    starts = []
+    for i in range(STRATA):
+        offset = start + (size - start) * i // STRATA
+        if offset > start:
+            f.seek(offset - 1)
+            f.readline()
+            offset = f.tell()
+        if offset < size and (not starts or offset > starts[-1]):
+            starts.append(offset)
+    return starts
+
+
+def sample_rows(path):
+    """(fieldnames, rows) with up to STRATA * ROWS_PER_STRATUM records spread over the file.
+
+    A stratum may start inside a quoted multi-line field; records whose field
+    count does not match the header are dropped.
+    """
+    with open(path, "rb") as f:
+        fieldnames, start = read_header(f)
+        size = f.seek(0, 2)
+        starts = _stratum_starts(f, start, size)
+    rows = []
+    for begin, end in zip(starts, starts[1:] + [size]):
+        taken = 0
+        try:
+            for record in csv.reader(iter_range_lines(path, begin, end)):
+                if len(record) == len(fieldnames):
+                    rows.append(record)
+                    taken += 1
+                    if taken == ROWS_PER_STRATUM:
+                        break
+        except csv.Error:
+            pass
+    return fieldnames, rows
+
+
+def parse_signed(text):
+    """Float of a cell of a column the schema found numeric, sign kept, or None when it does not parse."""
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _is_number(text):
+    return parse_signed(text) is not None
+
+
+def column_kind(values):
+    """Kind of a column from its sampled cells (see the module comment)."""
+    values = [v.strip() for v in values]
+    values = [v for v in values if v.casefold() not in NULL_TOKENS]
+    if not values:
+        return "empty"
+    if all(v in BINARY_TOKENS for v in values):
+        return "binary"
+    if sum(map(_is_number, values)) >= NUMERIC_SHARE * len(values):
+        is_id = len(values) >= ID_MIN_VALUES and len(set(values)) == len(values)
+        return "categorical" if is_id else "numeric"
+    if all(v[0] + v[-1] in ("[]", "{}") for v in values):
+        return "nested"
+    return "categorical"
+
+
+def infer_schema(path):
+    """{"rows_sampled", "columns": {column: {"kind", "values", "distinct"}}} in header order."""
+    fieldnames, rows = sample_rows(path)
+    columns = {}
+    for i, col in enumerate(fieldnames):
+        values = [row[i] for row in rows]
+        present = [v for v in values if v.strip().casefold() not in NULL_TOKENS]
+        columns[col] = {"kind": column_kind(values), "values": len(present), "distinct": len(set(present))}
+    return {"rows_sampled": len(rows), "columns": columns}
+
+
+def _write_json(schema, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cached_schema(source):
+    """The inferred schema of `source`, sampled on the first run and read back while the file is unchanged."""
+    return cached_table(source, "column_schema", SCHEMA_VERSION, lambda: infer_schema(source), _write_json, _read_json,
+                        suffix=SUFFIX)
+
+
+def columns_of_kind(schema, kind, exclude=()):
+    """Columns the schema gives `kind`, in header order, leaving out the `exclude` ones."""
+    return [col for col, info in schema["columns"].items() if info["kind"] == kind and col not in exclude]
+
+
+def kind_of(schema, col):
+    info = schema["columns"].get(col)
+    return info["kind"] if info else None
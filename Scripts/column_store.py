@@ -0,0 +1,158 @@
+import json
+import mmap
+import os
+import sys
+from array import array
+from itertools import chain
+
+from table_cache import cached_table
+
+# Stdlib-only columnar copy of a CSV for the pure-Python scripts. Every column
+# is written once to its own binary file: text columns as dictionary codes in
+# an array('I') (the dictionary itself goes to manifest.json) and numeric
+# columns as array('d') values plus a one-byte-per-row null mask. Opening a
+# store memory-maps the files and hands out typed memoryviews over them, so
+# nothing is parsed or copied on later runs. Cells are stored as str(v).strip(),
+# the form every pure-Python summary cleans a value to before using it.
+
+MANIFEST = "manifest.json"
+FLUSH_ROWS = 1 << 16
+
+
+class _TextWriter:
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.codes = array("I")
+        self.index = {}
+
+    def add(self, text):
+        code = self.index.get(text)
+        if code is None:
+            code = self.index[text] = len(self.index)
+        self.codes.append(code)
+
+    def flush(self):
+        self.codes.tofile(self.file)
+        del self.codes[:]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class _NumericWriter:
+    def __init__(self, values_path, nulls_path):
+        self.files = open(values_path, "wb"), open(nulls_path, "wb")
+        self.values = array("d")
+        self.nulls = array("B")
+
+    def add(self, num):
+        self.values.append(0.0 if num is None else num)
+        self.nulls.append(num is None)
+
+    def flush(self):
+        for f, buffer in zip(self.files, (self.values, self.nulls)):
+            buffer.tofile(f)
+            del buffer[:]
+
+    def close(self):
+        self.flush()
+        for f in self.files:
+            f.close()
+
+
+def write_store(rows, directory, numeric_cols, parse_number, text_cols=None, parsers=None):
+    """Write `rows` (dicts) as a column store in `directory`.
+
+    `numeric_cols` are converted with `parse_number(text)`, which returns a
+    float or None for a null, or with their own function from `parsers`;
+    `text_cols` are dictionary-encoded and default to every other column of
+    the first row. A column may be in both.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if text_cols is None:
+        order = list(first or ())
+        text_cols = [col for col in order if col not in numeric_cols]
+    else:
+        order = list(dict.fromkeys(list(text_cols) + list(numeric_cols)))
+    text_cols, numeric_cols = set(text_cols), set(numeric_cols)
+
+    os.makedirs(directory)
+    columns = {}
+    text = []
+    numeric = []
+    for i, col in enumerate(order):
+        entry = columns[col] = {}
+        if col in text_cols:
+            entry["codes"] = f"{i}.codes"
+            text.append((col, _TextWriter(os.path.join(directory, entry["codes"]))))
+        if col in numeric_cols:
+            entry["values"], entry["nulls"] = f"{i}.values", f"{i}.nulls"
+            writer = _NumericWriter(os.path.join(directory, entry["values"]), os.path.join(directory, entry["nulls"]))
+            numeric.append((col, (parsers or {}).get(col, parse_number), writer))
+    writers = [writer for _, writer in text] + [writer for _, _, writer in numeric]
+
+    n_rows = 0
+    for row in chain([first], rows) if first is not None else ():
+        for col, writer in text:
+            writer.add(str(row.get(col, "")).strip())
+        for col, parse, writer in numeric:
+            writer.add(parse(str(row.get(col, "")).strip()))
+        n_rows += 1
+        if n_rows % FLUSH_ROWS == 0:
+            for writer in writers:
+                writer.flush()
+
+    for writer in writers:
+        writer.close()
+    for col, writer in text:
+        columns[col]["dictionary"] = list(writer.index)
+
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"rows": n_rows, "byteorder": sys.byteorder, "columns": columns}, f)
+
+
+class ColumnStore:
+    """Read side of `write_store`: memory-mapped, zero-copy column views."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["byteorder"] != sys.byteorder:
+            raise ValueError(f"{directory} was written on a {manifest['byteorder']}-endian machine")
+        self.rows = manifest["rows"]
+        self.manifest = manifest["columns"]
+        self.columns = list(self.manifest)
+        self._maps = []
+
+    def __contains__(self, col):
+        return col in self.manifest
+
+    def _view(self, name, fmt):
+        with open(os.path.join(self.directory, name), "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return memoryview(b"").cast(fmt)  # an empty file cannot be mapped
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(fmt)
+
+    def codes(self, col):
+        """(codes, dictionary): row i holds dictionary[codes[i]]."""
+        entry = self.manifest[col]
+        return self._view(entry["codes"], "I"), entry["dictionary"]
+
+    def numeric(self, col):
+        """(values, nulls): values[i] is only meaningful where nulls[i] is 0."""
+        entry = self.manifest[col]
+        return self._view(entry["values"], "d"), self._view(entry["nulls"], "B")
+
+
+def cached_store(source, name, version, build_rows, numeric_cols, parse_number, text_cols=None, parsers=None):
+    """ColumnStore for `source`, converted from `build_rows()` on the first run
+    and reused from the table_cache folder while the source is unchanged."""
+    def write(rows, directory):
+        write_store(rows, directory, numeric_cols, parse_number, text_cols, parsers)
+
+    return cached_table(source, name, version, build_rows, write, ColumnStore, suffix=".columns")
@@ -0,0 +1,80 @@
+import csv
+
+# Record-aligned byte ranges over a CSV file, so that separate processes can
+# each parse their own slice. A newline ends a record only when it is outside
+# a quoted field, i.e. when an even number of '"' has been seen since the start
+# of the data (an escaped "" adds two and leaves the parity unchanged).
+
+
+def read_header(f):
+    """Read the header record from a binary file; returns (fieldnames, data offset)."""
+    lines = []
+    quotes = 0
+    for line in f:
+        lines.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            break
+    text = b"".join(lines).decode("utf-8")
+    fieldnames = next(csv.reader([text.replace("\r\n", "\n")]), [])
+    return fieldnames, sum(len(line) for line in lines)
+
+
+def split_ranges(filepath, n_chunks):
+    """Split the data records of `filepath` into about `n_chunks` (start, end) byte ranges."""
+    with open(filepath, "rb") as f:
+        fieldnames, start = read_header(f)
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(start)
+        step = max(1, (size - start) // max(1, n_chunks))
+        ranges = []
+        chunk_start = pos = start
+        quotes = 0
+        for line in f:
+            pos += len(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0 and pos - chunk_start >= step:
+                ranges.append((chunk_start, pos))
+                chunk_start = pos
+        if pos > chunk_start:
+            ranges.append((chunk_start, pos))
+    return fieldnames, ranges
+
+
+def iter_range_lines(filepath, start, end):
+    # CRLF is folded to "\n" as open(..., "r") would do inside quoted fields
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        pos = start
+        for line in f:
+            if pos >= end:
+                break
+            pos += len(line)
+            yield line.decode("utf-8").replace("\r\n", "\n")
+
+
+def iter_range(filepath, fieldnames, start, end):
+    """Rows of one byte range as dicts, like csv.DictReader over the whole file."""
+    return csv.DictReader(iter_range_lines(filepath, start, end), fieldnames=fieldnames)
+
+
+def write_head(filepath, dest, n_records):
+    """Copy the header and the first `n_records` data records of `filepath` to `dest`, byte for byte.
+
+    Returns the number of records written (fewer when the file is shorter).
+    """
+    with open(filepath, "rb") as f, open(dest, "wb") as out:
+        _, start = read_header(f)
+        f.seek(0)
+        out.write(f.read(start))
+        records = 0
+        quotes = 0
+        for line in f:
+            if records >= n_records:
+                break
+            out.write(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                records += 1
+    return records
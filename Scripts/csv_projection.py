@@ -0,0 +1,47 @@
+import csv
+from operator import itemgetter
+
+# Column-projected CSV reading for the pure-Python scripts. csv.DictReader
+# builds a dict of every field of every record in Python code; here the header
+# is read once, the wanted columns are resolved to field indices, and each
+# record of a plain csv.reader over a large read buffer is cut down to a tuple
+# of just those fields with a single itemgetter call. Lines are read with
+# universal newlines like the DictReader path, so CRLF inside a quoted field
+# still comes out as "\n". A column missing from the header reads as "" and a
+# field missing from a short record as None, which is what row.get(col, "")
+# gives on a DictReader row.
+
+READ_BUFFER = 1 << 20
+
+
+def projector(fieldnames, columns):
+    """Function from a csv.reader record to the tuple of its `columns` fields."""
+    width = len(fieldnames)
+    position = {}
+    for i, col in enumerate(fieldnames):
+        position.setdefault(col, i)
+    # Absent columns point one past the record, at the "" appended below
+    indices = [position.get(col, width) for col in columns]
+    pick = itemgetter(*indices) if len(indices) > 1 else lambda record: (record[indices[0]],)
+    padded = width in indices
+
+    def project(record):
+        if len(record) < width:
+            record += [None] * (width - len(record))
+        if padded:
+            record = record[:width] + [""]
+        return pick(record)
+
+    return project
+
+
+def iter_projected(filepath, columns):
+    """Tuples of the `columns` fields of every record of `filepath`, in file order."""
+    with open(filepath, mode="r", encoding="utf-8", buffering=READ_BUFFER) as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, [])
+        project = projector(fieldnames, columns)
+        for record in reader:
+            # DictReader skips blank lines too
+            if record:
+                yield project(record)
@@ -0,0 +1,118 @@
+import argparse
+import sys
+import time
+
+import duckdb
+
+from column_schema import cached_schema, parse_signed
+from duckdb_summary import (NUMBER_RE, cached, cleaned, key_columns, key_name, literal, load_csv, quote, register,
+                            report_columns, signed_number, summarize)
+from nested_fields import BREAKDOWN_RE, STRING_LIST_RE, nested_totals, parse_list
+from pure_python_fb_ads import (GROUPING_SETS, PLATFORM_LIST, identify_types, numeric_columns, print_summary,
+                                signed_parsers, try_parse_float)
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_ads_president_scored_anon.csv"
+OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/duckdb_output_fb_ads.txt"
+# Bump when the cleaning changes so the cached Parquet table is rebuilt
+CACHE_VERSION = 2
+
+# Cleaning, derived columns, column types and report layout follow pure_python_fb_ads.py
+
+RANGE_RE = rf"{NUMBER_RE}-{NUMBER_RE}"
+BREAKDOWNS = {"delivery_by_region": "delivery_region", "demographic_distribution": "demo_dist"}
+
+def estimate(text):
+    # try_parse_float in SQL for a number or a "low-high" range (their mean); other cells go to Python
+    low, high = (f"CAST(split_part({text}, '-', {i}) AS DOUBLE)" for i in (1, 2))
+    return (f"CASE WHEN {text} IS NULL THEN NULL WHEN regexp_full_match({text}, {literal(NUMBER_RE)}) THEN CAST({text} AS DOUBLE) "
+            f"WHEN regexp_full_match({text}, {literal(RANGE_RE)}) THEN ({low} + {high}) / 2 "
+            f"ELSE parse_float({text}) END")
+
+def as_json(col):
+    return f"CAST(replace({quote(col)}, '''', '\"') AS JSON)"
+
+def totals(col):
+    # [spend, impressions] of a breakdown cell; repr()-style cells in the usual shape are decoded as JSON
+    native = ", ".join(f"coalesce(list_sum(CAST(json_extract({as_json(col)}, '$.*.{field}') AS DOUBLE[])), 0)"
+                       for field in ("spend", "impressions"))
+    return (f"CASE WHEN {quote(col)} IS NULL THEN [0.0, 0.0] "
+            f"WHEN regexp_full_match({quote(col)}, {literal(BREAKDOWN_RE)}) THEN [{native}] "
+            f"ELSE py_totals({quote(col)}) END")
+
+def string_list(col):
+    return (f"CASE WHEN {quote(col)} IS NULL THEN []::VARCHAR[] "
+            f"WHEN regexp_full_match({quote(col)}, {literal(STRING_LIST_RE)}) THEN CAST({as_json(col)} AS VARCHAR[]) "
+            f"ELSE py_list({quote(col)}) END")
+
+def clean_table(con, timer, numeric):
+    # Only runs when the cached table is missing or stale
+    with timer.stage("read_csv"):
+        columns = load_csv(con, INPUT_FILE)
+    with timer.stage("preprocess"):
+        register(con, "parse_float", try_parse_float)
+        register(con, "parse_signed", parse_signed)
+        signed = signed_parsers(numeric)
+        register(con, "py_totals", lambda text: [float(total) for total in nested_totals(text)], "DOUBLE[]")
+        register(con, "py_list", lambda text: [str(val) for val in parse_list(text)], "VARCHAR[]")
+
+        # Nested cells are decoded once per row, in a subquery
+        nested = [f"{totals(col)} AS {quote(name)}" for col, name in BREAKDOWNS.items() if col in columns]
+        nested += [f"{string_list(col)} AS {quote(col + '_list')}"
+                   for col in ["publisher_platforms", "illuminating_mentions"] if col in columns]
+        parsed = f"(SELECT {', '.join(['rowid AS row_id', '*'] + nested)} FROM raw)"
+
+        select = ["row_id"]
+        select += [f"{cleaned(quote(k))} AS {quote(key_name(k))}" for k in key_columns(GROUPING_SETS)]
+        for col in columns:
+            text = cleaned(quote(col))
+            value = signed_number(text) if col in signed else estimate(text) if col in numeric else text
+            select.append(f"{value} AS {quote(col)}")
+        for col, name in BREAKDOWNS.items():
+            if col in columns:
+                select += [f"{quote(name)}[1] AS {quote(name + '_total_spend')}",
+                           f"{quote(name)}[2] AS {quote(name + '_total_impressions')}"]
+        if "publisher_platforms" in columns:
+            select += [f"CASE WHEN list_contains(publisher_platforms_list, {literal(platform)}) THEN '1' ELSE '0' END "
+                       f"AS {quote('is_' + platform)}" for platform in PLATFORM_LIST]
+        if "illuminating_mentions" in columns:
+            first = cleaned("coalesce(illuminating_mentions_list[1], 'None')")
+            select += ["CAST(len(illuminating_mentions_list) AS DOUBLE) AS mention_count", f"{first} AS first_mention"]
+        return con.sql(f"SELECT {', '.join(select)} FROM {parsed}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
+    start_time = time.perf_counter()
+
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
+
+    con = duckdb.connect()
+    with timer.stage("load"):
+        schema = cached_schema(INPUT_FILE)
+        numeric = numeric_columns(schema)
+        table = cached(con, INPUT_FILE, "duckdb_fb_ads", [CACHE_VERSION, numeric], lambda: clean_table(con, timer, numeric))
+    col_types = identify_types(report_columns(con, table), schema)
+
+    # One GROUPING SETS query per kind of column covers the overall summary and both groupings
+    with timer.stage("grouping sets query"):
+        summaries = summarize(con, table, GROUPING_SETS, col_types)
+
+    with timer.stage("overall summary"):
+        print_summary(report, "Overall Summary", summaries[()][()])
+    with timer.stage("group by page_id"):
+        print_summary(report, "Grouped by page_id", summaries[("page_id",)])
+    with timer.stage("group by page_id, bylines, currency"):
+        print_summary(report, "Grouped by page_id, bylines, and currency", summaries[("page_id", "bylines", "currency")])
+
+    report.end_body()
+    end_time = time.perf_counter()
+    print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
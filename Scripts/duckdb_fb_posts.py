@@ -0,0 +1,73 @@
+import argparse
+import sys
+import time
+
+import duckdb
+
+from column_schema import cached_schema, parse_signed
+from duckdb_summary import (cached, cleaned, key_columns, key_name, load_csv, number, quote, register, report_columns,
+                            signed_number, summarize)
+from pure_python_fb_posts import (GROUPING_SETS, identify_types, numeric_columns, print_summary, signed_parsers,
+                                  try_parse_float)
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_posts_president_scored_anon.csv"
+OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/duckdb_output_fb_posts.txt"
+# Bump when the cleaning changes so the cached Parquet table is rebuilt
+CACHE_VERSION = 2
+
+# Cleaning, column types and report layout follow pure_python_fb_posts.py
+
+def clean_table(con, timer, numeric):
+    # Only runs when the cached table is missing or stale
+    with timer.stage("read_csv"):
+        columns = load_csv(con, INPUT_FILE)
+    with timer.stage("preprocess"):
+        register(con, "parse_float", try_parse_float)
+        register(con, "parse_signed", parse_signed)
+        signed = signed_parsers(numeric)
+        select = ["rowid AS row_id"]
+        select += [f"{cleaned(quote(k))} AS {quote(key_name(k))}" for k in key_columns(GROUPING_SETS)]
+        for col in columns:
+            text = cleaned(quote(col))
+            value = signed_number(text) if col in signed else number(text) if col in numeric else text
+            select.append(f"{value} AS {quote(col)}")
+        return con.sql(f"SELECT {', '.join(select)} FROM raw")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
+    start_time = time.perf_counter()
+
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
+
+    con = duckdb.connect()
+    with timer.stage("load"):
+        schema = cached_schema(INPUT_FILE)
+        numeric = numeric_columns(schema)
+        table = cached(con, INPUT_FILE, "duckdb_fb_posts", [CACHE_VERSION, numeric],
+                       lambda: clean_table(con, timer, numeric))
+    col_types = identify_types(report_columns(con, table), schema)
+
+    # One GROUPING SETS query per kind of column covers the overall summary and both groupings
+    with timer.stage("grouping sets query"):
+        summaries = summarize(con, table, GROUPING_SETS, col_types)
+
+    with timer.stage("overall summary"):
+        print_summary(report, "Overall Summary", summaries[()][()])
+    with timer.stage("group by Facebook_Id"):
+        print_summary(report, "Grouped by Facebook_Id", summaries[("Facebook_Id",)])
+    with timer.stage("group by Facebook_Id, Page Category"):
+        print_summary(report, "Grouped by Facebook_Id and Page Category", summaries[("Facebook_Id", "Page Category")])
+
+    report.end_body()
+    end_time = time.perf_counter()
+    print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
@@ -0,0 +1,258 @@
+import numpy as np
+
+from accumulators import NULL_VALUES
+from numpy_summary import QUARTILES, categorical_stats, dummy_stats, numeric_stats
+from table_cache import cached_table
+
+# Grouped summaries for the DuckDB scripts. The scripts clean the CSV in SQL
+# into one table (cached as Parquet): a row_id in file order, every group key
+# under key_name(key), text columns stripped with null values as NULL, and
+# numeric columns as DOUBLE. Every grouping set is then answered by two
+# queries, each a single GROUP BY GROUPING SETS plan: one for the numeric
+# columns and one for the value counts of all text columns, unpivoted into
+# (column, value) pairs. Both join a small table that numbers the groups in
+# order of first appearance, so results are fetched as columns and scattered
+# into per-group arrays. Ties for the most common value go to the value seen
+# first, as in the pure-Python accumulators, whose report layout is used.
+
+SEP = "\x1f"
+
+# Temp table numbering the groups of every grouping set
+GROUPS = "summary_groups"
+
+# The ASCII whitespace str.strip() removes
+WHITESPACE = " \t\n\r\x0b\x0c"
+
+# Plain decimal numbers, which DuckDB and float() parse to the same double;
+# anything else goes to the scripts' Python parser
+NUMBER_RE = r"\d+(\.\d+)?"
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def literal(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def key_name(key):
+    return f"{SEP}key{SEP}{key}"
+
+
+def load_csv(con, path, table="raw"):
+    """Load every cell of the CSV as text into `table` (its rowid follows the file); return the columns."""
+    con.execute(f"CREATE OR REPLACE TEMP TABLE {table} AS SELECT * FROM read_csv({literal(path)}, "
+                f"header=true, all_varchar=true, delim=',', quote='\"', escape='\"')")
+    return [row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()]
+
+
+def cleaned(expr, null_values=NULL_VALUES, fold_case=False):
+    """SQL for a cell as the pure-Python scripts read it: stripped, NULL for a null value."""
+    text = f"trim({expr}, {literal(WHITESPACE)})"
+    test = f"lower({text})" if fold_case else text
+    return f"CASE WHEN {test} IN ({', '.join(map(literal, null_values))}) THEN NULL ELSE {text} END"
+
+
+def number(text):
+    """SQL for the scripts' try_parse_float: "," and "-" dropped, then a plain number; other cells go to parse_float()."""
+    digits = f"replace(replace({text}, ',', ''), '-', '')"
+    return (f"CASE WHEN {text} IS NULL THEN NULL "
+            f"WHEN regexp_full_match({digits}, {literal(NUMBER_RE)}) THEN CAST({digits} AS DOUBLE) "
+            f"ELSE parse_float({text}) END")
+
+
+def signed_number(text):
+    """SQL for column_schema.parse_signed: "," dropped, sign kept; other cells go to parse_signed()."""
+    digits = f"replace({text}, ',', '')"
+    return (f"CASE WHEN {text} IS NULL THEN NULL "
+            f"WHEN regexp_full_match({digits}, {literal('-?' + NUMBER_RE)}) THEN CAST({digits} AS DOUBLE) "
+            f"ELSE parse_signed({text}) END")
+
+
+def register(con, name, fn, return_type="DOUBLE"):
+    """Python fallback `name(text)` for the cells the SQL fast path does not parse; None comes back as NULL."""
+    con.create_function(name, fn, ["VARCHAR"], return_type, null_handling="special", exception_handling="return_null")
+
+
+def cached(con, source, name, version, build, view="cleaned"):
+    """Create `view` over the cleaned table of `source`, built by `build()` (a relation) on a cache miss."""
+    def read(path):
+        con.execute(f"CREATE OR REPLACE TEMP VIEW {view} AS SELECT * FROM read_parquet({literal(path)})")
+        return view
+
+    return cached_table(source, name, version, build, lambda rel, path: rel.write_parquet(path), read)
+
+
+def key_columns(grouping_sets):
+    """Every key column of the grouping sets, once, in order."""
+    return list(dict.fromkeys(k for keys in grouping_sets for k in keys))
+
+
+def report_columns(con, table):
+    """Columns of `table` other than row_id and the group keys, in order."""
+    return [row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()
+            if row[0] != "row_id" and not row[0].startswith(SEP)]
+
+
+def _grouping_id(keys, key_cols):
+    # GROUPING(k0, k1, ...) sets the bit of every key column the set rolls up
+    return sum(1 << (len(key_cols) - 1 - i) for i, k in enumerate(key_cols) if k not in keys)
+
+
+def _grouping_sql(grouping_sets, key_cols, extra=()):
+    sets = ", ".join("(" + ", ".join([quote(key_name(k)) for k in keys] + list(extra)) + ")" for keys in grouping_sets)
+    gid = f"GROUPING({', '.join(quote(key_name(k)) for k in key_cols)})" if key_cols else "0"
+    return gid, f"GROUP BY GROUPING SETS ({sets})"
+
+
+def group_table(con, table, grouping_sets):
+    """Number the groups of every grouping set into the GROUPS temp table; return {grouping set: group keys}.
+
+    Groups are numbered from 0 in order of first appearance, per grouping
+    set; groups with a null key part are left out, as in GroupedAccumulator.
+    """
+    key_cols = key_columns(grouping_sets)
+    keys_sql = [quote(key_name(k)) for k in key_cols]
+    gid, group_by = _grouping_sql(grouping_sets, key_cols)
+    complete = " ".join(f"WHEN {_grouping_id(keys, key_cols)} THEN "
+                        + (" AND ".join(f"{quote(key_name(k))} IS NOT NULL" for k in keys) or "true")
+                        for keys in grouping_sets)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {GROUPS} AS
+        SELECT {', '.join(['gid'] + keys_sql)}, row_number() OVER (PARTITION BY gid ORDER BY first_row) - 1 AS "group"
+        FROM (SELECT {', '.join([f'{gid} AS gid'] + keys_sql)}, min(row_id) AS first_row FROM {table} {group_by})
+        WHERE CASE gid {complete} END
+    """)
+    rows = con.execute(f'SELECT {", ".join(["gid"] + keys_sql)} FROM {GROUPS} ORDER BY gid, "group"').fetchall()
+    position = {k: i for i, k in enumerate(key_cols, 1)}
+    return {tuple(keys): [tuple(row[position[k]] for k in keys) for row in rows if row[0] == _grouping_id(keys, key_cols)]
+            for keys in grouping_sets}
+
+
+def _numbered(query, key_cols, outputs):
+    # `outputs` of the rows of `query` (gid, key columns, ...) with the gid and number of their group
+    match = "".join(f" AND a.{k} IS NOT DISTINCT FROM g.{k}" for k in map(quote, map(key_name, key_cols)))
+    return f'SELECT g.gid, g."group", {", ".join(outputs)} FROM ({query}) a JOIN {GROUPS} g ON a.gid = g.gid{match}'
+
+
+def _scatter(values, index, n, fill):
+    # Per-group array from the result values of the groups numbered `index`
+    values = np.ma.filled(values, fill)
+    out = np.full(n, fill, dtype=values.dtype if fill is not None else object)
+    out[index] = values
+    return out
+
+
+def numeric_query(con, table, grouping_sets, numeric, groups):
+    """{grouping set: {col: {stat: array}}}, arrays aligned with `groups` (from group_table).
+
+    `numeric` maps each reported column to its DOUBLE column in `table`.
+    """
+    if not numeric:
+        return {tuple(keys): {} for keys in grouping_sets}
+    key_cols = key_columns(grouping_sets)
+    gid, group_by = _grouping_sql(grouping_sets, key_cols)
+    # quantile_cont interpolates linearly between the values around (n - 1) * q, as pandas and numpy do
+    quartiles = "[" + ", ".join(map(str, QUARTILES.values())) + "]"
+    aggregates, outputs = [], []
+    for i, column in enumerate(numeric.values()):
+        c = quote(column)
+        aggregates += [f"count({c}) AS n{i}", f"sum({c}) AS total{i}", f"var_pop({c}) * count({c}) AS m2_{i}",
+                       f"min({c}) AS min{i}", f"quantile_cont({c}, {quartiles}) AS quartiles{i}", f"max({c}) AS max{i}"]
+        outputs += [f"n{i}", f"total{i}", f"m2_{i}", f"min{i}",
+                    *(f"quartiles{i}[{j}] AS q{i}_{j}" for j in range(1, len(QUARTILES) + 1)), f"max{i}"]
+    select = [f"{gid} AS gid"] + [quote(key_name(k)) for k in key_cols] + aggregates
+    found = con.execute(_numbered(f"SELECT {', '.join(select)} FROM {table} {group_by}", key_cols, outputs)).fetchnumpy()
+    gids, index, *values = found.values()
+
+    names = ["count", "total", "m2", "min", *QUARTILES, "max"]
+    result = {}
+    for keys in grouping_sets:
+        rows = gids == _grouping_id(keys, key_cols)
+        n = len(groups[tuple(keys)])
+        result[tuple(keys)] = {
+            col: {name: _scatter(v[rows], index[rows], n, 0 if name == "count" else np.nan)
+                  for name, v in zip(names, values[len(names) * i:len(names) * (i + 1)])}
+            for i, col in enumerate(numeric)}
+    return result
+
+
+def frequency_query(con, table, grouping_sets, text, groups, flags=None):
+    """{grouping set: {col: frequency arrays}}, arrays aligned with `groups` (from group_table).
+
+    Per group and column: "count" and "unique" of the non-null values, the
+    most common value ("top", None when there is none) and its "top_count",
+    and for every name in `flags` the count of values in flags[name].
+    """
+    flags = flags or {}
+    key_cols = key_columns(grouping_sets)
+    keys_sql = [quote(key_name(k)) for k in key_cols]
+    col, value = quote(f"{SEP}col"), quote(f"{SEP}value")
+    gid, group_by = _grouping_sql(grouping_sets, key_cols, [col, value])
+    per_column = ", ".join(["gid"] + keys_sql + [col])
+    # Most common value, earliest on ties: the largest n, then the smallest first_row
+    top_order = "(n, -first_row)"
+    flag_sql = [f"CAST(coalesce(sum(n) FILTER (WHERE {value} IN ({', '.join(map(literal, values))})), 0) AS BIGINT) "
+                f"AS flag{i}"
+                for i, values in enumerate(flags.values())]
+    columns = ", ".join(f"{quote(column)} AS {quote(name)}" for name, column in text.items())
+    query = f"""
+        WITH long AS (
+            SELECT * FROM (SELECT row_id, {', '.join(keys_sql + [columns])} FROM {table})
+            UNPIVOT ({value} FOR {col} IN ({', '.join(quote(name) for name in text)}))
+        ), counts AS (
+            SELECT {gid} AS gid, {', '.join(keys_sql + [col, value])}, count(*) AS n, min(row_id) AS first_row
+            FROM long {group_by}
+        )
+        SELECT {per_column}, CAST(sum(n) AS BIGINT) AS total_n, count(*) AS distinct_n,
+               arg_max({value}, {top_order}) AS top, max(n) AS top_n{''.join(', ' + f for f in flag_sql)}
+        FROM counts GROUP BY {per_column}
+    """
+    outputs = [f"a.{col}", "total_n", "distinct_n", "top", "top_n"] + [f"flag{i}" for i in range(len(flags))]
+    found = con.execute(_numbered(query, key_cols, outputs)).fetchnumpy()
+    gids, index, cols, *values = found.values()
+    position = {name: i for i, name in enumerate(text)}
+    cols = np.array([position[name] for name in cols.tolist()], dtype=np.intp)
+
+    names = ["count", "unique", "top", "top_count", *flags]
+    result = {}
+    for keys in grouping_sets:
+        in_set = gids == _grouping_id(keys, key_cols)
+        n = len(groups[tuple(keys)])
+        stats = {}
+        for i, name in enumerate(text):
+            rows = in_set & (cols == i)
+            stats[name] = {stat: _scatter(v[rows], index[rows], n, None if stat == "top" else 0)
+                           for stat, v in zip(names, values)}
+        result[tuple(keys)] = stats
+    return result
+
+
+def summarize(con, table, grouping_sets, types):
+    """{grouping set: {group key: {column: stats}}} in the layout of GroupedAccumulator.stats().
+
+    `types` maps column to "numeric", "dummy" or "categorical"; every column
+    is a column of `table` under its own name.
+    """
+    groups = group_table(con, table, grouping_sets)
+    numeric = {col: col for col, typ in types.items() if typ == "numeric"}
+    text = {col: col for col, typ in types.items() if typ != "numeric"}
+    numbers = numeric_query(con, table, grouping_sets, numeric, groups)
+    freqs = frequency_query(con, table, grouping_sets, text, groups, {"1s": ["1"], "0s": ["0"]}) if text else {}
+
+    summaries = {}
+    for keys, keys_found in groups.items():
+        columns = {}
+        for col, typ in types.items():
+            if typ == "numeric":
+                columns[col] = numeric_stats(numbers[keys][col])
+                continue
+            f = freqs[keys][col]
+            if typ == "dummy":
+                columns[col] = dummy_stats(f["count"], f["1s"], f["0s"])
+            else:
+                codes = np.array([i if top is not None else -1 for i, top in enumerate(f["top"])], dtype=np.int64)
+                columns[col] = categorical_stats((f["count"], f["unique"], codes, f["top_count"]), f["top"])
+        summaries[keys] = {key: {col: stats[i] for col, stats in columns.items()} for i, key in enumerate(keys_found)}
+    return summaries
@@ -0,0 +1,135 @@
+import argparse
+import math
+import sys
+import time
+
+import duckdb
+
+from column_schema import cached_schema, parse_signed
+from duckdb_summary import (SEP, cached, cleaned, frequency_query, group_table, key_columns, key_name, load_csv,
+                            number, numeric_query, quote, register, signed_number)
+from numpy_tw_posts import ONES, ZEROS
+from pure_python_tw_posts import (GROUP_BY_1, GROUP_BY_2, GROUP_NULL_VALUES, NULL_VALUES, identify_types,
+                                  print_summary, signed_parsers, try_parse_float)
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_tw_posts_president_scored_anon.csv"
+OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/duckdb_output_tw_posts.txt"
+# Bump when the cleaning changes so the cached Parquet table is rebuilt
+CACHE_VERSION = 1
+
+GROUPING_SETS = [(), (GROUP_BY_1,), GROUP_BY_2]
+
+
+def num_name(col):
+    return f"{col}{SEP}num"
+
+
+def clean_table(con, timer, types):
+    # Only runs when the cached table is missing or stale; columns missing from the CSV are left out
+    with timer.stage("read_csv"):
+        columns = load_csv(con, INPUT_FILE)
+    with timer.stage("preprocess"):
+        register(con, "parse_float", try_parse_float)
+        register(con, "parse_signed", parse_signed)
+        signed = signed_parsers(types)
+        select = ["rowid AS row_id"]
+        select += [f"{cleaned(quote(k), GROUP_NULL_VALUES)} AS {quote(key_name(k))}" for k in key_columns(GROUPING_SETS)]
+        for col, kind in types.items():
+            if col not in columns:
+                continue
+            text = cleaned(quote(col), NULL_VALUES, fold_case=True)
+            select.append(f"{text} AS {quote(col)}")
+            if kind == "numeric":
+                value = signed_number(text) if col in signed else number(text)
+                select.append(f"{value} AS {quote(num_name(col))}")
+        return con.sql(f"SELECT {', '.join(select)} FROM raw")
+
+
+def summarize(con, table, types, columns):
+    """{grouping set: {group key: {column: stats}}} in the layout of pure_python_tw_posts.summarize_column."""
+    groups = group_table(con, table, GROUPING_SETS)
+    numeric = {col: num_name(col) for col in columns if types[col] == "numeric"}
+    numbers = numeric_query(con, table, GROUPING_SETS, numeric, groups)
+    freqs = frequency_query(con, table, GROUPING_SETS, {col: col for col in columns}, groups, {"1s": ONES, "0s": ZEROS})
+
+    summaries = {}
+    for keys, keys_found in groups.items():
+        stats_by_col = []
+        for col in columns:
+            f = freqs[keys][col]
+            stats = [{'count': c, 'unique_values': u} for c, u in zip(f["count"].tolist(), f["unique"].tolist())]
+
+            if types[col] == "numeric":
+                m = numbers[keys][col]
+                for summary, c, total, m2, low, q1, median, q3, high in zip(
+                        stats, *(m[name].tolist() for name in ["count", "total", "m2", "min", "25%", "50%", "75%", "max"])):
+                    if c:
+                        summary.update({
+                            'min': low,
+                            '25%': round(q1, 2),
+                            '50%': round(median, 2),
+                            '75%': round(q3, 2),
+                            'max': high,
+                            'mean': round(total / c, 2),
+                            'std_dev': round(math.sqrt(m2 / c), 2) if c > 1 else 0
+                        })
+
+            elif types[col] == "binary":
+                for summary, one, zero in zip(stats, f["1s"].tolist(), f["0s"].tolist()):
+                    summary.update({'1s': one, '0s': zero})
+
+            else:
+                for summary, top, top_count in zip(stats, f["top"], f["top_count"].tolist()):
+                    if top is not None:
+                        summary.update({
+                            'most_common_value': top,
+                            'most_common_count': top_count
+                        })
+
+            stats_by_col.append((col, stats))
+        summaries[keys] = {key: {col: stats[i] for col, stats in stats_by_col if stats[i]['count']}
+                           for i, key in enumerate(keys_found)}
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
+    start_time = time.perf_counter()
+
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE, ascii_only=True))
+    sys.stdout = report
+
+    con = duckdb.connect()
+    with timer.stage("load"):
+        types = identify_types(cached_schema(INPUT_FILE))
+        table = cached(con, INPUT_FILE, "duckdb_tw_posts", [CACHE_VERSION, types],
+                       lambda: clean_table(con, timer, types))
+    found = {row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()}
+
+    # One GROUPING SETS query per kind of column covers the overall summary and both groupings
+    with timer.stage("grouping sets query"):
+        summaries = summarize(con, table, types, [col for col in types if col in found])
+
+    with timer.stage("overall summary"):
+        print_summary(report, "Overall Summary", summaries[()][()])
+
+    with timer.stage(f"group by {GROUP_BY_1}"):
+        for key, group_stats in summaries[(GROUP_BY_1,)].items():
+            print_summary(report, f"Group: {GROUP_BY_1} = {key[0]}", group_stats)
+
+    with timer.stage(f"group by {GROUP_BY_2[0]}, {GROUP_BY_2[1]}"):
+        for key, group_stats in summaries[GROUP_BY_2].items():
+            print_summary(report, f"Group: {GROUP_BY_2[0]} = {key[0]}, {GROUP_BY_2[1]} = {key[1]}", group_stats)
+
+    report.end_body()
+    end_time = time.perf_counter()
+    print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
@@ -0,0 +1,291 @@
+import argparse
+import csv
+import os
+import random
+from itertools import accumulate
+
+# Synthetic look-alikes of the three (uncommitted) source CSVs, with the exact
+# columns the scripts read: nested delivery_by_region / demographic_distribution
+# dict strings, range-valued estimated_* fields, list strings for platforms and
+# mentions, _illuminating flags, and Zipf-skewed page keys alongside weighted
+# source / lang / category mixes. Output is fully determined by --seed, so row
+# count (--scale / --rows) and group count (--pages) can be varied one at a time.
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Datasets")
+
+FB_ADS_FILE = "2024_fb_ads_president_scored_anon.csv"
+FB_POSTS_FILE = "2024_fb_posts_president_scored_anon.csv"
+TW_POSTS_FILE = "2024_tw_posts_president_scored_anon.csv"
+
+# Row counts of the original exports at scale 1
+BASE_ROWS = {"fb_ads": 246745, "fb_posts": 19009, "tw_posts": 27304}
+
+ILLUMINATING_COLS = [
+    'election_integrity_Truth_illuminating', 'advocacy_msg_type_illuminating',
+    'issue_msg_type_illuminating', 'attack_msg_type_illuminating',
+    'image_msg_type_illuminating', 'cta_msg_type_illuminating',
+    'engagement_cta_subtype_illuminating', 'fundraising_cta_subtype_illuminating',
+    'voting_cta_subtype_illuminating', 'covid_topic_illuminating',
+    'economy_topic_illuminating', 'education_topic_illuminating',
+    'environment_topic_illuminating', 'foreign_policy_topic_illuminating',
+    'governance_topic_illuminating', 'health_topic_illuminating',
+    'immigration_topic_illuminating', 'lgbtq_issues_topic_illuminating',
+    'military_topic_illuminating', 'race_and_ethnicity_topic_illuminating',
+    'safety_topic_illuminating', 'social_and_cultural_topic_illuminating',
+    'technology_and_privacy_topic_illuminating', 'womens_issue_topic_illuminating',
+    'incivility_illuminating', 'scam_illuminating', 'freefair_illuminating',
+    'fraud_illuminating'
+]
+
+FB_ADS_COLS = [
+    'page_id', 'ad_id', 'ad_creation_time', 'bylines', 'currency',
+    'delivery_by_region', 'demographic_distribution', 'estimated_audience_size',
+    'estimated_impressions', 'estimated_spend', 'publisher_platforms',
+    'illuminating_scored_message', 'illuminating_mentions'
+] + ILLUMINATING_COLS
+
+FB_POSTS_COLS = [
+    'Facebook_Id', 'post_id', 'Page Category', 'Page Admin Top Country',
+    'Post Created', 'Post Created Date', 'Post Created Time', 'Type',
+    'Total Interactions', 'Likes', 'Comments', 'Shares', 'Love', 'Wow',
+    'Haha', 'Sad', 'Angry', 'Care', 'Video Share Status', 'Is Video Owner?',
+    'Post Views', 'Total Views', 'Total Views For All Crossposts', 'Video Length',
+    'Sponsor Id', 'Sponsor Name', 'Sponsor Category', 'Overperforming Score',
+    'illuminating_scored_message'
+] + ILLUMINATING_COLS
+
+TW_POSTS_COLS = [
+    'id', 'url', 'source', 'retweetCount', 'replyCount', 'likeCount',
+    'quoteCount', 'viewCount', 'createdAt', 'lang', 'bookmarkCount',
+    'isRetweet', 'isQuote', 'isConversationControlled', 'quoteId',
+    'inReplyToId', 'month_year', 'illuminating_scored_message'
+] + ILLUMINATING_COLS + ['z']
+
+REGIONS = [
+    'California', 'Texas', 'Florida', 'New York', 'Pennsylvania', 'Illinois',
+    'Ohio', 'Georgia', 'North Carolina', 'Michigan', 'Arizona', 'Wisconsin',
+    'Nevada', 'Washington', 'Virginia', 'Colorado', 'Minnesota', 'Oregon'
+]
+AGE_BUCKETS = ['13-17', '18-24', '25-34', '35-44', '45-54', '55-64', '65+']
+GENDERS = ['female', 'male', 'unknown']
+PLATFORMS = ['facebook', 'instagram', 'messenger', 'audience_network']
+CURRENCIES = [('USD', 0.97), ('EUR', 0.01), ('GBP', 0.01), ('CAD', 0.01)]
+CANDIDATES = ['Donald Trump', 'Joe Biden', 'Kamala Harris', 'JD Vance', 'Tim Walz',
+              'Nikki Haley', 'Ron DeSantis', 'Robert F. Kennedy Jr.']
+WORDS = ['vote', 'election', 'economy', 'border', 'freedom', 'future', 'america',
+         'donate', 'rally', 'today', 'join', 'fight', 'families', 'jobs', 'health']
+
+PAGE_CATEGORIES = [('PERSON', 50), ('ACTOR', 18), ('POLITICIAN', 14),
+                   ('POLITICAL_CANDIDATE', 7), ('ENTREPRENEUR', 1), ('NEWS_SITE', 1)]
+POST_TYPES = [('Link', 45), ('Photo', 23), ('Native Video', 18), ('Status', 8),
+              ('YouTube', 2), ('Live Video Complete', 2), ('Album', 1), ('Video', 1)]
+SOURCES = [('Twitter Web App', 547), ('Twitter for iPhone', 311), ('Sprout Social', 107),
+           ('Twitter Media Studio', 18), ('Twitter for iPad', 10), ('Twitter for Android', 4),
+           ('Hootsuite Inc.', 2), ('Canva', 1)]
+LANGS = [('en', 9990), ('es', 4), ('und', 3), ('qme', 1), ('zxx', 1), ('fr', 1)]
+
+
+def anon_id(rng):
+    return "%064x" % rng.getrandbits(256)
+
+
+def zipf_pool(rng, n, s=1.1):
+    # (ids, cumulative weights): cum_weights keeps each draw O(log n) for large pools
+    ids = [anon_id(rng) for _ in range(n)]
+    return ids, list(accumulate(1.0 / (i + 1) ** s for i in range(n)))
+
+
+def weighted(rng, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights)[0]
+
+
+def skewed_count(rng, scale):
+    # Engagement counts are heavily right-skewed; a log-normal draw keeps that shape
+    return int(rng.lognormvariate(0, 2.0) * scale)
+
+
+def flag(rng, p, missing=0.0):
+    if missing and rng.random() < missing:
+        return ""
+    return "1" if rng.random() < p else "0"
+
+
+def timestamp(rng):
+    month = rng.randint(1, 12)
+    year = 2024 if month <= 10 else 2023
+    return year, month, "%d-%02d-%02d %02d:%02d:%02d" % (
+        year, month, rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59))
+
+
+def message(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+
+
+def illuminating_flags(rng):
+    return {col: flag(rng, 0.5 if col.startswith(("advocacy", "issue")) else 0.06)
+            for col in ILLUMINATING_COLS}
+
+
+def estimated_range(rng, low, high):
+    lower = rng.randint(low, high)
+    if rng.random() < 0.3:
+        return str(lower)
+    return "%d-%d" % (lower, lower + rng.randint(1, high))
+
+
+def nested_breakdown(rng, keys, spend, impressions):
+    parts = rng.sample(keys, rng.randint(1, min(len(keys), 12)))
+    weights = [rng.random() for _ in parts]
+    total = sum(weights)
+    entries = []
+    for key, w in zip(parts, weights):
+        entries.append("'%s': {'spend': %d, 'impressions': %d}" % (
+            key, round(spend * w / total), round(impressions * w / total)))
+    return "{" + ", ".join(entries) + "}"
+
+
+def fb_ads_rows(rng, n, n_pages=None):
+    pages, page_weights = zipf_pool(rng, n_pages or max(1, n // 6))
+    bylines = {}
+    demo_keys = ["%s_%s" % (g, a) for g in GENDERS for a in AGE_BUCKETS]
+    for _ in range(n):
+        page_id = rng.choices(pages, cum_weights=page_weights)[0]
+        if page_id not in bylines:
+            bylines[page_id] = ["PAC %d" % rng.randint(1, 5000) for _ in range(rng.randint(1, 3))]
+        spend = skewed_count(rng, 50)
+        impressions = spend * rng.randint(20, 200)
+        platforms = [p for p in PLATFORMS if rng.random() < (0.95 if p == 'facebook' else 0.5)]
+        mentions = rng.sample(CANDIDATES, rng.choice([0, 0, 1, 1, 2, 3]))
+        year, month, created = timestamp(rng)
+        row = {
+            'page_id': page_id,
+            'ad_id': anon_id(rng),
+            'ad_creation_time': created[:10],
+            'bylines': rng.choice(bylines[page_id]) if rng.random() > 0.02 else "",
+            'currency': weighted(rng, CURRENCIES),
+            'delivery_by_region': nested_breakdown(rng, REGIONS, spend, impressions) if rng.random() > 0.01 else "{}",
+            'demographic_distribution': nested_breakdown(rng, demo_keys, spend, impressions) if rng.random() > 0.01 else "{}",
+            'estimated_audience_size': estimated_range(rng, 1000, 1000000),
+            'estimated_impressions': estimated_range(rng, 0, 50000),
+            'estimated_spend': estimated_range(rng, 0, 1000),
+            'publisher_platforms': repr(platforms),
+            'illuminating_scored_message': message(rng),
+            'illuminating_mentions': repr(mentions),
+        }
+        row.update(illuminating_flags(rng))
+        yield row
+
+
+def fb_posts_rows(rng, n, n_pages=None):
+    pages, page_weights = zipf_pool(rng, n_pages or 21 * max(1, n // BASE_ROWS["fb_posts"]), s=1.6)
+    categories = {p: weighted(rng, PAGE_CATEGORIES) for p in pages}
+    for _ in range(n):
+        page_id = rng.choices(pages, cum_weights=page_weights)[0]
+        likes = skewed_count(rng, 150)
+        reactions = [skewed_count(rng, m) for m in (60, 20, 25, 1, 8, 1, 2)]
+        comments, shares, love, wow, haha, sad, angry = reactions
+        post_type = weighted(rng, POST_TYPES)
+        video = "Video" in post_type
+        year, month, created = timestamp(rng)
+        row = {
+            'Facebook_Id': page_id,
+            'post_id': anon_id(rng),
+            'Page Category': categories[page_id] if rng.random() > 0.13 else "",
+            'Page Admin Top Country': 'US' if rng.random() > 0.14 else "",
+            'Post Created': created + " EST",
+            'Post Created Date': created[:10],
+            'Post Created Time': created[11:],
+            'Type': post_type if rng.random() > 0.13 else "",
+            'Total Interactions': "{:,}".format(likes + sum(reactions)),
+            'Likes': "{:,}".format(likes),
+            'Comments': comments,
+            'Shares': shares,
+            'Love': love,
+            'Wow': wow,
+            'Haha': haha,
+            'Sad': sad,
+            'Angry': angry,
+            'Care': skewed_count(rng, 1),
+            'Video Share Status': rng.choice(['owned', 'share', 'crosspost']) if video else "",
+            'Is Video Owner?': rng.choice(['Yes', 'No']) if video else "",
+            'Post Views': "%.1f" % skewed_count(rng, 10) if video else "0.0",
+            'Total Views': "%.1f" % skewed_count(rng, 12) if video else "0.0",
+            'Total Views For All Crossposts': "0.0",
+            'Video Length': "00:%02d:%02d" % (rng.randint(0, 59), rng.randint(0, 59)) if video else "",
+            'Sponsor Id': "",
+            'Sponsor Name': "",
+            'Sponsor Category': "",
+            'Overperforming Score': "%.2f" % rng.gauss(0, 3),
+            'illuminating_scored_message': message(rng),
+        }
+        row.update(illuminating_flags(rng))
+        yield row
+
+
+def tw_posts_rows(rng, n, n_pages=None):
+    # Tweets are grouped by source and lang, whose mixes are fixed
+    for _ in range(n):
+        likes = skewed_count(rng, 400)
+        is_quote = rng.random() < 0.12
+        is_reply = rng.random() < 0.12
+        year, month, created = timestamp(rng)
+        row = {
+            'id': anon_id(rng),
+            'url': anon_id(rng),
+            'source': weighted(rng, SOURCES),
+            'retweetCount': likes // rng.randint(3, 8),
+            'replyCount': likes // rng.randint(4, 10),
+            'likeCount': likes,
+            'quoteCount': likes // rng.randint(20, 80),
+            'viewCount': likes * rng.randint(20, 120) + rng.randint(5, 50),
+            'createdAt': created,
+            'lang': weighted(rng, LANGS),
+            'bookmarkCount': likes // rng.randint(20, 80),
+            'isRetweet': 'False',
+            'isQuote': 'True' if is_quote else 'False',
+            'isConversationControlled': 'True' if rng.random() < 0.001 else 'False',
+            'quoteId': "%.16g" % rng.uniform(1.6e18, 1.85e18) if is_quote else "",
+            'inReplyToId': "%.17g" % rng.uniform(1.6e18, 1.85e18) if is_reply else "",
+            'month_year': "%d-%02d" % (year, month),
+            'illuminating_scored_message': message(rng),
+            'z': flag(rng, 0.05),
+        }
+        for col, value in illuminating_flags(rng).items():
+            row[col] = value + ".0" if rng.random() > 0.05 else ""
+        yield row
+
+
+DATASETS = {
+    "fb_ads": (FB_ADS_FILE, FB_ADS_COLS, fb_ads_rows),
+    "fb_posts": (FB_POSTS_FILE, FB_POSTS_COLS, fb_posts_rows),
+    "tw_posts": (TW_POSTS_FILE, TW_POSTS_COLS, tw_posts_rows),
+}
+
+
+def generate(name, rows, seed, out_dir, pages=None):
+    filename, columns, row_fn = DATASETS[name]
+    path = os.path.join(out_dir, filename)
+    # Seeding from a string is stable across runs and platforms
+    rng = random.Random("%s:%d" % (name, seed))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(row_fn(rng, rows, pages))
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=float, default=1.0, help="rows as a multiple of the original exports")
+    parser.add_argument("--rows", type=int, help="exact row count per dataset (overrides --scale)")
+    parser.add_argument("--pages", type=int,
+                        help="distinct page_id / Facebook_Id values (default: grows with the row count)")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--out", default=DATASET_DIR)
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS), choices=list(DATASETS))
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for name in args.datasets:
+        n = args.rows or max(1, int(BASE_ROWS[name] * args.scale))
+        print(generate(name, n, args.seed, args.out, args.pages))
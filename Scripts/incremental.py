@@ -0,0 +1,220 @@
+import csv
+import hashlib
+import json
+import os
+import pickle
+
+from csv_chunks import read_header
+
+# Persisted aggregation state for the pure-Python scripts, so that a daily
+# refresh only parses the rows that are new. The state file holds the
+# GroupedAccumulator state (counts, sums, Welford moments, min/max and
+# frequency maps per column and group) and, per source CSV, a byte-offset
+# watermark just after the last complete record read plus hashes of the first
+# and last bytes before it. A source that only grew is read from its
+# watermark; a source not seen before (e.g. a new daily export) is read whole,
+# skipping rows whose id an earlier run or source already counted. Those ids
+# live beside the state in an append-only store sharded by hash (IdStore), so
+# a run reads the shards its own rows fall in and appends only its new ids,
+# rather than unpickling and rewriting every id of the archive. A source
+# that was rewritten (shrunk, new header, or changed bytes at either end of
+# the part already read) cannot be subtracted out, so the state is dropped and
+# everything is re-aggregated. Only those two windows are hashed, so an edit
+# in the middle of an archive that kept its size around is not noticed.
+# Resuming gives the same report as one run over the same rows in order.
+
+STATE_SUFFIX = ".state.pkl"
+WINDOW_BYTES = 1 << 16
+ID_SHARDS = 256
+
+
+class RecordReader:
+    """Complete CSV records of `filepath` from byte offset `start`, as text lines.
+
+    A trailing record without its final newline (an export still being
+    written) is left for the next run; after `lines()` is exhausted, `end`
+    is the offset just past the last complete record, the next watermark.
+    """
+
+    def __init__(self, filepath, start):
+        self.filepath = filepath
+        self.end = start
+
+    def lines(self):
+        with open(self.filepath, "rb") as f:
+            f.seek(self.end)
+            pos = self.end
+            quotes = 0
+            record = []
+            for line in f:
+                pos += len(line)
+                quotes += line.count(b'"')
+                record.append(line)
+                if quotes % 2 == 0 and line.endswith(b"\n"):
+                    self.end = pos
+                    for part in record:
+                        # CRLF is folded to "\n" as open(..., "r") would do inside quoted fields
+                        yield part.decode("utf-8").replace("\r\n", "\n")
+                    record.clear()
+
+
+def edge_hashes(filepath, offset):
+    """SHA-256 of the first and of the last (up to) WINDOW_BYTES bytes before `offset`."""
+    hashes = []
+    with open(filepath, "rb") as f:
+        for start in (0, max(0, offset - WINDOW_BYTES)):
+            f.seek(start)
+            hashes.append(hashlib.sha256(f.read(min(WINDOW_BYTES, offset - start))).hexdigest())
+    return hashes
+
+
+class IdStore:
+    """Set of the ids counted so far, in ID_SHARDS append-only files under `folder`.
+
+    A shard is read the first time one of its ids is looked up; `add` only
+    queues an id, and `flush` appends the queued ids to their shards and
+    returns the shard lengths to save with the state. `lengths` are those
+    saved lengths: bytes past them were written by a run that failed before
+    saving its state, and are ignored and then overwritten.
+    """
+
+    def __init__(self, folder, lengths=None):
+        self.folder = folder
+        self.lengths = dict(lengths or {})
+        self.shards = {}
+        self.pending = {}
+
+    def _path(self, shard):
+        return os.path.join(self.folder, f"{shard:02x}.jsonl")
+
+    @staticmethod
+    def _shard(row_id):
+        return hashlib.blake2b(row_id.encode("utf-8"), digest_size=1).digest()[0] % ID_SHARDS
+
+    def _ids(self, shard):
+        ids = self.shards.get(shard)
+        if ids is None:
+            ids = set()
+            length = self.lengths.get(shard, 0)
+            if length:
+                with open(self._path(shard), "rb") as f:
+                    ids.update(json.loads(line) for line in f.read(length).splitlines())
+            self.shards[shard] = ids
+        return ids
+
+    def __contains__(self, row_id):
+        return row_id in self._ids(self._shard(row_id))
+
+    def add(self, row_id):
+        shard = self._shard(row_id)
+        self._ids(shard).add(row_id)
+        self.pending.setdefault(shard, []).append(row_id)
+
+    def flush(self):
+        os.makedirs(self.folder, exist_ok=True)
+        for shard, ids in self.pending.items():
+            path = self._path(shard)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.truncate(self.lengths.get(shard, 0))
+                f.seek(0, os.SEEK_END)
+                f.write("".join(json.dumps(row_id) + "\n" for row_id in ids).encode("utf-8"))
+                self.lengths[shard] = f.tell()
+        self.pending.clear()
+        return self.lengths
+
+
+def load_state(path):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError, ValueError):
+        # Missing, truncated, or written by an older accumulator layout
+        return None
+
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = path + ".tmp"
+    with open(partial, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(partial, path)
+
+
+def _source_unchanged(path, entry):
+    if not os.path.exists(path) or os.path.getsize(path) < entry["offset"]:
+        return False
+    with open(path, "rb") as f:
+        fieldnames, _ = read_header(f)
+    return fieldnames == entry["fieldnames"] and edge_hashes(path, entry["offset"]) == entry.get("hashes")
+
+
+def _usable(state, version, grouping_sets, sources):
+    if not state or state["version"] != version or state["grouping_sets"] != grouping_sets:
+        return False
+    if "id_lengths" not in state:
+        # Written before the ids moved out of the state file
+        return False
+    return all(_source_unchanged(path, state["sources"][path]) for path in sources if path in state["sources"])
+
+
+def _unseen(rows, id_col, seen, new_ids):
+    for row in rows:
+        row_id = row.get(id_col)
+        if row_id:
+            if row_id in seen:
+                continue
+            new_ids.add(row_id)
+        yield row
+
+
+def _ids_folder(state_path):
+    return os.path.splitext(state_path)[0] + ".ids"
+
+
+def update_aggregate(state_path, sources, version, new_aggregate, preprocess=None, id_col=None):
+    """(GroupedAccumulator over every record of `sources`, rows read this run).
+
+    `new_aggregate()` returns an empty GroupedAccumulator; it is seeded from
+    the state at `state_path` and then updated with the records after each
+    source's watermark, each passed through `preprocess` first when given.
+    With `id_col`, a row whose id was counted by an earlier run or an earlier
+    source is skipped. Bump `version` when the aggregation behind the state
+    changes. Sources recorded in the state but not passed keep their rows.
+    The ids are kept in an IdStore next to the state file, not in it.
+    """
+    sources = [os.path.abspath(path) for path in sources]
+    aggregate = new_aggregate()
+    grouping_sets = list(aggregate.groups)
+    state = load_state(state_path)
+    if _usable(state, version, grouping_sets, sources):
+        aggregate.merge_state(state["groups"])
+    else:
+        state = {"version": version, "grouping_sets": grouping_sets, "sources": {}, "id_lengths": {}}
+    seen = IdStore(_ids_folder(state_path), state["id_lengths"])
+
+    n_rows = 0
+    for path in sources:
+        with open(path, "rb") as f:
+            fieldnames, data_start = read_header(f)
+        entry = state["sources"].get(path)
+        reader = RecordReader(path, entry["offset"] if entry else data_start)
+        rows = csv.DictReader(reader.lines(), fieldnames=fieldnames)
+        new_ids = set()
+        if id_col:
+            rows = _unseen(rows, id_col, seen, new_ids)
+        if preprocess:
+            rows = map(preprocess, rows)
+        for row in rows:
+            aggregate.add(row)
+            n_rows += 1
+        # Duplicates within one source are all counted, as a plain run would
+        for row_id in new_ids:
+            seen.add(row_id)
+        state["sources"][path] = {"fieldnames": fieldnames, "offset": reader.end,
+                                  "hashes": edge_hashes(path, reader.end)}
+
+    # The ids go first: until the state records their lengths, a failed run's ids are ignored
+    state["id_lengths"] = seen.flush()
+    state["groups"] = aggregate.state()
+    save_state(state, state_path)
+    return aggregate, n_rows
@@ -0,0 +1,84 @@
+import ast
+import json
+
+# Shared parsing of the Python-literal columns in the fb_ads export:
+# delivery_by_region / demographic_distribution ({key: {'spend': .., 'impressions': ..}}),
+# publisher_platforms and illuminating_mentions (lists of strings).
+
+PLATFORMS = ['facebook', 'instagram', 'messenger', 'audience_network']
+
+EMPTY_LITERALS = ("", "{}", "[]")
+
+# Cells in the shape repr() writes for these columns (single-quoted keys
+# without quotes or escapes inside, plain numbers), which turn into JSON by
+# swapping the quote character. The Polars and DuckDB scripts decode cells
+# matching these natively and send the rest to the parsers below.
+NUM = r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?"
+KEY = r"'[^'\"\\]*'"
+INNER = rf"\{{(?:{KEY}: {NUM}(?:, {KEY}: {NUM})*)?\}}"
+ENTRY = rf"{KEY}: {INNER}"
+BREAKDOWN_RE = rf"^\{{(?:{ENTRY}(?:, {ENTRY})*)?\}}$"
+STRING_LIST_RE = rf"^\[(?:{KEY}(?:, {KEY})*)?\]$"
+
+
+def _reject_constant(name):
+    # json accepts NaN/Infinity, ast.literal_eval does not; keep them on the slow path
+    raise ValueError(name)
+
+
+def parse_literal(text):
+    """Parse a repr()-style literal, returning None when it cannot be parsed.
+
+    The export writes dicts and lists with Python's repr, which is JSON
+    apart from the quote character. When the text has no double quotes and
+    no escapes, every string in it is single-quoted and free of quote
+    characters, so swapping the quotes gives the same value through the C
+    json decoder. Anything else (tuples, True/None, odd quoting) goes to
+    ast.literal_eval.
+    """
+    if not isinstance(text, str):
+        return None
+    if '"' not in text and "\\" not in text:
+        try:
+            return json.loads(text.replace("'", '"'), parse_constant=_reject_constant)
+        except ValueError:
+            pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def parse_dict(text):
+    if not isinstance(text, str) or text.strip() in EMPTY_LITERALS:
+        return {}
+    value = parse_literal(text)
+    return value if isinstance(value, dict) else {}
+
+
+def parse_list(text):
+    if not isinstance(text, str) or text.strip() in EMPTY_LITERALS:
+        return []
+    value = parse_literal(text)
+    return value if isinstance(value, list) else []
+
+
+def nested_totals(text):
+    """(spend, impressions) summed over the inner dicts of a breakdown column."""
+    spend = impressions = 0
+    for entry in parse_dict(text).values():
+        if isinstance(entry, dict):
+            spend += entry.get("spend", 0)
+            impressions += entry.get("impressions", 0)
+    return spend, impressions
+
+
+def platform_flags(text, platforms=PLATFORMS):
+    found = parse_list(text)
+    return [platform in found for platform in platforms]
+
+
+def mention_summary(text):
+    """(mention_count, first_mention) for the illuminating_mentions column."""
+    mentions = parse_list(text)
+    return len(mentions), mentions[0] if mentions else "None"
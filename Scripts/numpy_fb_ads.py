@@ -0,0 +1,48 @@
+import argparse
+import sys
+import time
+
+from column_schema import cached_schema
+from numpy_summary import summarize
+from pure_python_fb_ads import identify_types, load_columns, print_summary
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_ads_president_scored_anon.csv"
+OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/numpy_output_fb_ads.txt"
+
+# The cleaning, column store and report layout are the pure-Python script's;
+# only the aggregation is vectorized (numpy_summary)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
+    start_time = time.perf_counter()
+
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
+
+    with timer.stage("load") as stage:
+        schema = cached_schema(INPUT_FILE)
+        store = load_columns(INPUT_FILE, schema)
+        stage.rows = store.rows
+    # The store keeps the preprocessed columns in first-row order
+    col_types = identify_types(store.columns, schema)
+
+    with timer.stage("overall summary", rows=store.rows):
+        print_summary(report, "Overall Summary", summarize(store, col_types, ())[()])
+    with timer.stage("group by page_id", rows=store.rows):
+        print_summary(report, "Grouped by page_id", summarize(store, col_types, ("page_id",)))
+    with timer.stage("group by page_id, bylines, currency", rows=store.rows):
+        print_summary(report, "Grouped by page_id, bylines, and currency",
+                      summarize(store, col_types, ("page_id", "bylines", "currency")))
+
+    report.end_body()
+    end_time = time.perf_counter()
+    print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
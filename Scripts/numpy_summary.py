@@ -0,0 +1,188 @@
+import math
+
+import numpy as np
+
+from accumulators import NULL_VALUES
+
+# Vectorized grouped summaries for the NumPy scripts, computed over the
+# pure-Python scripts' column_store (mapped straight into arrays, no copy).
+# Group keys are factorized with np.unique into one id per row, in order of
+# first appearance; counts and sums are np.bincount over those ids, and one
+# lexsort by (group, value) puts every group's values in a contiguous sorted
+# run, from which min, max and exact linearly interpolated quartiles are read
+# off by index. Results use the dict layout of the accumulators' stats(), so
+# the reports compare line by line with the pure-Python ones.
+
+QUARTILES = {"25%": 0.25, "50%": 0.5, "75%": 0.75}
+
+
+def null_codes(dictionary, null_values=NULL_VALUES, fold_case=False):
+    """Boolean array: which dictionary entries are nulls."""
+    nulls = frozenset(null_values)
+    return np.array([(val.lower() if fold_case else val) in nulls for val in dictionary], dtype=bool)
+
+
+def group_ids(store, keys, null_values=NULL_VALUES):
+    """(group id per row, group keys by id) of one grouping set of a ColumnStore.
+
+    Ids follow the order in which groups first appear, as the pure-Python
+    GroupedAccumulator creates them; rows with a null key part get -1. A
+    grouping set with a key column missing from the store has no groups.
+    """
+    if not keys:
+        return np.zeros(store.rows, np.intp), [()]
+    if not all(k in store for k in keys):
+        return np.full(store.rows, -1, np.intp), []
+    combined = np.zeros(store.rows, np.int64)
+    valid = np.ones(store.rows, bool)
+    key_codes = []
+    for k in keys:
+        codes, dictionary = store.codes(k)
+        codes = np.asarray(codes)
+        key_codes.append((codes, dictionary))
+        valid &= ~null_codes(dictionary, null_values)[codes]
+        # Re-factorized after every key, so the combined code stays below rows * len(dictionary)
+        combined = np.unique(combined * len(dictionary) + codes, return_inverse=True)[1]
+
+    rows = np.flatnonzero(valid)
+    _, first, inverse = np.unique(combined[rows], return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    ids = np.full(store.rows, -1, np.intp)
+    ids[rows] = rank[inverse]
+
+    firsts = rows[first[order]]
+    parts = [[dictionary[code] for code in codes[firsts].tolist()] for codes, dictionary in key_codes]
+    return ids, list(zip(*parts))
+
+
+def moments(values, nulls, ids, n_groups):
+    """Per-group count, total, m2, min, quartiles and max of the non-null values (numpy arrays)."""
+    values, nulls = np.asarray(values), np.asarray(nulls)
+    keep = (ids >= 0) & (nulls == 0)
+    g, v = ids[keep], values[keep]
+    count = np.bincount(g, minlength=n_groups)
+    # bincount adds in row order, the order of the pure-Python running totals
+    total = np.bincount(g, weights=v, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    result = {"count": count, "total": total,
+              "m2": np.bincount(g, weights=(v - mean[g]) ** 2, minlength=n_groups)}
+    if not len(v):
+        return {**result, **{name: np.zeros(n_groups) for name in ["min", *QUARTILES, "max"]}}
+
+    v = v[np.lexsort((v, g))]
+    start = np.cumsum(count) - count
+    last = np.maximum(count - 1, 0)
+    # Empty groups read some other group's run; callers only use groups with a count
+    cap = len(v) - 1
+    result["min"] = v[np.minimum(start, cap)]
+    result["max"] = v[np.minimum(start + last, cap)]
+    for name, q in QUARTILES.items():
+        pos = last * q
+        lo = pos.astype(np.intp)
+        hi = np.minimum(lo + 1, last)
+        low = v[np.minimum(start + lo, cap)]
+        result[name] = low + (v[np.minimum(start + hi, cap)] - low) * (pos - lo)
+    return result
+
+
+def frequencies(codes, nulls, ids, n_groups):
+    """Per-group (count, unique values, most common code, its count) of the non-null codes.
+
+    `nulls` flags null dictionary entries. Ties for the most common value
+    go to the one seen first in the group, as in CategoricalAccumulator;
+    a group without values gets code -1.
+    """
+    codes = np.asarray(codes)
+    keep = ids >= 0
+    if nulls.any():
+        keep &= ~nulls[codes]
+    top_code = np.full(n_groups, -1, np.int64)
+    top_count = np.zeros(n_groups, np.int64)
+    if not keep.any():
+        return np.zeros(n_groups, np.int64), np.zeros(n_groups, np.int64), top_code, top_count
+
+    size = len(nulls)
+    pairs, first, counts = np.unique(ids[keep].astype(np.int64) * size + codes[keep],
+                                     return_index=True, return_counts=True)
+    group = pairs // size
+    count = np.bincount(group, weights=counts, minlength=n_groups).astype(np.int64)
+    unique = np.bincount(group, minlength=n_groups)
+    order = np.lexsort((first, -counts, group))
+    heads = order[np.r_[True, group[order][1:] != group[order][:-1]]]
+    top_code[group[heads]] = pairs[heads] % size
+    top_count[group[heads]] = counts[heads]
+    return count, unique, top_code, top_count
+
+
+def code_counts(codes, wanted, ids, n_groups):
+    """Per-group number of rows whose code is flagged in `wanted` (one flag per dictionary entry)."""
+    codes = np.asarray(codes)
+    keep = (ids >= 0) & wanted[codes]
+    return np.bincount(ids[keep], minlength=n_groups)
+
+
+# ---- ACCUMULATOR LAYOUT ----
+# The stats() dicts of NumericAccumulator, CategoricalAccumulator and DummyAccumulator
+def numeric_stats(m):
+    stats = []
+    for count, total, m2, low, q1, median, q3, high in zip(
+            *(m[name].tolist() for name in ["count", "total", "m2", "min", *QUARTILES, "max"])):
+        if not count:
+            stats.append({"count": 0})
+            continue
+        stats.append({
+            "count": count,
+            "mean": round(total / count, 2),
+            "min": low,
+            "25%": round(q1, 2),
+            "50%": round(median, 2),
+            "75%": round(q3, 2),
+            "max": high,
+            "std_dev": round(math.sqrt(m2 / count), 2)
+        })
+    return stats
+
+
+def categorical_stats(freqs, dictionary):
+    return [{
+        "count": count,
+        "unique_values": unique,
+        "most_common_value": dictionary[code] if code >= 0 else "N/A",
+        "most_common_count": top
+    } for count, unique, code, top in zip(*(a.tolist() for a in freqs))]
+
+
+def dummy_stats(count, ones, zeros):
+    return [{
+        "count": n,
+        "1s": one,
+        "0s": zero,
+        "percent_1s": round(100 * one / n, 2) if n else 0.0
+    } for n, one, zero in zip(count.tolist(), ones.tolist(), zeros.tolist())]
+
+
+def summarize(store, types, keys, null_values=NULL_VALUES):
+    """{group key: {column: stats}} of one grouping set, like GroupedAccumulator.stats(keys).
+
+    `types` maps column to "numeric", "dummy" or "categorical".
+    """
+    ids, groups = group_ids(store, keys, null_values)
+    n = len(groups)
+    columns = {}
+    for col, typ in types.items():
+        if typ == "numeric":
+            columns[col] = numeric_stats(moments(*store.numeric(col), ids, n))
+            continue
+        codes, dictionary = store.codes(col)
+        nulls = null_codes(dictionary, null_values)
+        freqs = frequencies(codes, nulls, ids, n)
+        if typ == "dummy":
+            values = np.array(dictionary, dtype=object)
+            columns[col] = dummy_stats(freqs[0], code_counts(codes, values == "1", ids, n),
+                                       code_counts(codes, values == "0", ids, n))
+        else:
+            columns[col] = categorical_stats(freqs, dictionary)
+    return {key: {col: stats[i] for col, stats in columns.items()} for i, key in enumerate(groups)}
@@ -0,0 +1,102 @@
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from column_schema import cached_schema
+from numpy_summary import code_counts, frequencies, group_ids, moments, null_codes
+from pure_python_tw_posts import (GROUP_BY_1, GROUP_BY_2, GROUP_NULL_VALUES, NULL_VALUES, identify_types,
+                                  load_columns, print_summary)
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_tw_posts_president_scored_anon.csv"
+OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/numpy_output_tw_posts.txt"
+
+ONES = ('1', 'True', 'true')
+ZEROS = ('0', 'False', 'false')
+
+
+def flags(dictionary, values):
+    return np.array([val in values for val in dictionary], dtype=bool)
+
+
+def summarize(store, types, keys):
+    """{group key: {column: stats}} in the layout of pure_python_tw_posts.summarize_column."""
+    ids, groups = group_ids(store, keys, GROUP_NULL_VALUES)
+    n = len(groups)
+    columns = []
+    for col, kind in types.items():
+        codes, dictionary = store.codes(col)
+        count, unique, top_code, top_count = frequencies(codes, null_codes(dictionary, NULL_VALUES, True), ids, n)
+        stats = [{'count': c, 'unique_values': u} for c, u in zip(count.tolist(), unique.tolist())]
+
+        if kind == "numeric":
+            m = moments(*store.numeric(col), ids, n)
+            for summary, c, total, m2, low, q1, median, q3, high in zip(
+                    stats, *(m[name].tolist() for name in ["count", "total", "m2", "min", "25%", "50%", "75%", "max"])):
+                if c:
+                    summary.update({
+                        'min': low,
+                        '25%': round(q1, 2),
+                        '50%': round(median, 2),
+                        '75%': round(q3, 2),
+                        'max': high,
+                        'mean': round(total / c, 2),
+                        'std_dev': round(math.sqrt(m2 / c), 2) if c > 1 else 0
+                    })
+
+        elif kind == "binary":
+            ones = code_counts(codes, flags(dictionary, ONES), ids, n).tolist()
+            zeros = code_counts(codes, flags(dictionary, ZEROS), ids, n).tolist()
+            for summary, one, zero in zip(stats, ones, zeros):
+                summary.update({'1s': one, '0s': zero})
+
+        else:
+            for summary, code, top in zip(stats, top_code.tolist(), top_count.tolist()):
+                if code >= 0:
+                    summary.update({
+                        'most_common_value': dictionary[code],
+                        'most_common_count': top
+                    })
+
+        columns.append((col, stats))
+    return {key: {col: stats[i] for col, stats in columns if stats[i]['count']} for i, key in enumerate(groups)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
+    start_time = time.perf_counter()
+
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE, ascii_only=True))
+    sys.stdout = report
+
+    # Same column store as pure_python_tw_posts.py --columns
+    types = identify_types(cached_schema(INPUT_FILE))
+    with timer.stage("load") as stage:
+        store = load_columns(INPUT_FILE, types)
+        stage.rows = store.rows
+
+    with timer.stage("overall summary", rows=store.rows):
+        print_summary(report, "Overall Summary", summarize(store, types, ())[()])
+
+    with timer.stage(f"group by {GROUP_BY_1}", rows=store.rows):
+        for key, group_stats in summarize(store, types, (GROUP_BY_1,)).items():
+            print_summary(report, f"Group: {GROUP_BY_1} = {key[0]}", group_stats)
+
+    with timer.stage(f"group by {GROUP_BY_2[0]}, {GROUP_BY_2[1]}", rows=store.rows):
+        for key, group_stats in summarize(store, types, GROUP_BY_2).items():
+            print_summary(report, f"Group: {GROUP_BY_2[0]} = {key[0]}, {GROUP_BY_2[1]} = {key[1]}", group_stats)
+
+    report.end_body()
+    end_time = time.perf_counter()
+    print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
@@ -1,13 +1,24 @@
+import argparse
 import pandas as pd
 import numpy as np
-import ast
+import shutil
 import sys
 import warnings
 import time
+from collections import defaultdict
+
+from column_schema import cached_schema, columns_of_kind
+from nested_fields import mention_summary, nested_totals
+from pandas_schema import TEXT_DTYPE, build_schema, is_text, to_signed
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cached_pandas
 
 # ---- CONFIG ----
 INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_ads_president_scored_anon.csv"
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/pandas_output_fb_ads.txt"
+# Bump when the cleaning changes so the cached preprocessed table is rebuilt
+CACHE_VERSION = 1
 pd.set_option('display.float_format', '{:,.0f}'.format)
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
@@ -18,91 +29,261 @@ ALL_POTENTIAL_NUMERIC = [
     "demo_dist_total_impressions", "mention_count"
 ]
 
-# ---- TEE OUTPUT ----
-class Tee:
-    def __init__(self, *streams): self.streams = streams
-    def write(self, msg): [s.write(msg) for s in self.streams]
-    def flush(self): [s.flush() for s in self.streams]
-
-# ---- PARSE HELPERS ----
-def parse_nested_dict_column(col_data):
-    try:
-        return ast.literal_eval(col_data) if pd.notna(col_data) and col_data.strip().startswith("{") else {}
-    except:
-        return {}
-
-def parse_nested_list_column(col_data):
-    try:
-        return ast.literal_eval(col_data) if pd.notna(col_data) and col_data.strip().startswith("[") else []
-    except:
-        return []
+# ---- READ SCHEMA ----
+KEY_COLS = ["page_id", "bylines", "currency"]
+
+BINARY_COLS = [
+    'election_integrity_Truth_illuminating', 'advocacy_msg_type_illuminating',
+    'issue_msg_type_illuminating', 'attack_msg_type_illuminating',
+    'image_msg_type_illuminating', 'cta_msg_type_illuminating',
+    'engagement_cta_subtype_illuminating', 'fundraising_cta_subtype_illuminating',
+    'voting_cta_subtype_illuminating', 'covid_topic_illuminating',
+    'economy_topic_illuminating', 'education_topic_illuminating',
+    'environment_topic_illuminating', 'foreign_policy_topic_illuminating',
+    'governance_topic_illuminating', 'health_topic_illuminating',
+    'immigration_topic_illuminating', 'lgbtq_issues_topic_illuminating',
+    'military_topic_illuminating', 'race_and_ethnicity_topic_illuminating',
+    'safety_topic_illuminating', 'social_and_cultural_topic_illuminating',
+    'technology_and_privacy_topic_illuminating', 'womens_issue_topic_illuminating',
+    'incivility_illuminating', 'scam_illuminating', 'freefair_illuminating',
+    'fraud_illuminating'
+]
+
+# Every other column is text; the estimated_* ranges are parsed in clean()
+SCHEMA = defaultdict(lambda: TEXT_DTYPE, build_schema(binary=BINARY_COLS, keys=KEY_COLS))
+
+def column_kinds(schema):
+    # (numeric, flags): the declared numeric columns, then any other column the sampled schema
+    # (column_schema) found numeric, and the 0/1 columns it found besides BINARY_COLS
+    declared = ALL_POTENTIAL_NUMERIC + KEY_COLS + BINARY_COLS
+    numeric = ALL_POTENTIAL_NUMERIC + columns_of_kind(schema, "numeric", exclude=declared)
+    return numeric, columns_of_kind(schema, "binary", exclude=declared + numeric)
 
 # ---- CLEANING FUNCTION ----
-def clean(df):
+def clean(df, signed=()):
     for col in ["estimated_audience_size", "estimated_impressions", "estimated_spend"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    df["delivery_region_total_impressions"] = df["delivery_by_region"].apply(
-        lambda x: sum(v.get("impressions", 0) for v in parse_nested_dict_column(x).values())
-    )
-    df["demo_dist_total_spend"] = df["demographic_distribution"].apply(
-        lambda x: sum(v.get("spend", 0) for v in parse_nested_dict_column(x).values())
-    )
-    df["demo_dist_total_impressions"] = df["demographic_distribution"].apply(
-        lambda x: sum(v.get("impressions", 0) for v in parse_nested_dict_column(x).values())
-    )
-    df["mention_count"] = df["illuminating_mentions"].apply(
-        lambda x: len(parse_nested_list_column(x))
-    )
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    # Numeric by the schema alone: sign kept, see pandas_schema.to_signed
+    for col in signed:
+        if col in df.columns:
+            df[col] = to_signed(df[col])
+
+    # Each nested column is parsed once; the totals come back as (spend, impressions)
+    delivery = df["delivery_by_region"].map(nested_totals)
+    df["delivery_region_total_impressions"] = delivery.str[1]
+
+    demo = df["demographic_distribution"].map(nested_totals)
+    df["demo_dist_total_spend"] = demo.str[0]
+    df["demo_dist_total_impressions"] = demo.str[1]
+
+    df["mention_count"] = df["illuminating_mentions"].map(lambda x: mention_summary(x)[0])
     return df
 
 # ---- DESCRIPTIVE SUMMARY ----
-def describe(df, title):
+DESCRIBE_STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max", "null_count"]
+
+def format_number(x):
+    return f"{x:,.0f}" if pd.notnull(x) else "NaN"
+
+def summary_columns(df, numeric, flags):
+    # 0/1 flag columns are left out of both summaries
+    excluded = [col for col in df.columns if col.endswith("_illuminating") or col in flags]
+    numeric_cols = [col for col in numeric if col in df.columns and col not in excluded]
+    # describe() only covers numeric dtypes
+    numeric_cols = list(df[numeric_cols].select_dtypes(include="number").columns)
+    categorical_cols = [col for col in df.columns if is_text(df[col].dtype) and col not in excluded]
+    return numeric_cols, categorical_cols
+
+# ---- REPORT TEXT ----
+# The tables are built as plain strings in the exact layout of the pandas
+# reprs they replace: the DataFrame of formatted describe() cells and
+# value_counts().to_string(). Building a DataFrame or Series per group just to
+# print it took most of the grouped runtime. Like the repr, a numeric table
+# wider than the terminal keeps its outer columns around a "..." column.
+
+def escape(text):
+    # pandas prints these escaped in labels
+    return text.replace("\t", "\\t").replace("\r", "\\r").replace("\n", "\\n")
+
+def trim_front(labels):
+    # pandas drops spaces that every label starts with
+    while all(labels) and all(label[0] == " " for label in labels):
+        labels = [label[1:] for label in labels]
+    return labels
+
+def fitted_columns(widths, line_width):
+    # Data columns the DataFrame repr keeps within `line_width`; `widths` starts with the index
+    excess = sum(widths) + len(widths) - line_width
+    widths = list(widths)
+    while excess > 0 and len(widths) > 1:
+        excess -= widths.pop(round(len(widths) / 2)) + 1
+    return max(len(widths) - 1, 2)
+
+def numeric_tables(cells, numeric_cols):
+    # Repr of DataFrame(cells[g], index=numeric_cols, columns=DESCRIBE_STATS) for every block g of `cells`
+    label_width = max(map(len, numeric_cols))
+    # A cell is printed after a space; a column is as wide as its header or widest cell
+    widths = np.maximum(np.char.str_len(cells.astype(str)).max(axis=1) + 1, [len(h) for h in DESCRIBE_STATS])
+    line_width = shutil.get_terminal_size().columns
+    tables = []
+    for block, block_widths in zip(cells, widths.tolist()):
+        shown = list(range(len(DESCRIBE_STATS)))
+        kept = fitted_columns([label_width] + block_widths, line_width)
+        truncated = len(shown) > kept
+        if truncated:
+            shown = shown[:kept // 2] + [None] + shown[-(kept // 2):]
+        lines = [" " * label_width + "".join("  ..." if i is None else " " + DESCRIBE_STATS[i].rjust(block_widths[i])
+                                            for i in shown)]
+        for col, row in zip(numeric_cols, block):
+            lines.append(col.ljust(label_width) + "".join("  ..." if i is None else " " + row[i].rjust(block_widths[i])
+                                                          for i in shown))
+        if truncated:
+            lines.append(f"\n[{len(numeric_cols)} rows x {len(DESCRIBE_STATS)} columns]")
+        tables.append("\n".join(lines))
+    return tables
+
+def numeric_summary_text(table):
+    return f"📊 Numeric Summary:\n{table}\n"
+
+def top_values_text(col, values, counts):
+    # `values` / `counts` are already in value_counts() order
+    labels = trim_front([escape(value) for value in values[:5]])
+    numbers = [f" {n:d}" for n in counts[:5]]
+    label_width = max(map(len, labels)) + 3
+    number_width = max(map(len, numbers))
+    rows = "".join(f"{label.ljust(label_width)}{number.rjust(number_width)}\n" for label, number in zip(labels, numbers))
+    return f"\n{col} - Unique: {len(values)}\nTop: {values[0]} ({counts[0]})\n{escape(col)}\n{rows}Name: count\n"
+
+def describe(df, title, numeric, flags):
     print(f"\n--- {title} ---")
 
-    # NUMERIC SUMMARY (Transposed)
-    excluded = [col for col in df.columns if col.endswith("_illuminating")]
-    numeric_cols = [col for col in ALL_POTENTIAL_NUMERIC if col in df.columns and col not in excluded]
+    numeric_cols, categorical_cols = summary_columns(df, numeric, flags)
 
+    # NUMERIC SUMMARY (Transposed)
     if numeric_cols:
-        print("📊 Numeric Summary:")
         summary = df[numeric_cols].describe(percentiles=[.25, .5, .75])
         summary.loc["null_count"] = df[numeric_cols].isnull().sum()
         summary = summary.T  # Transpose
-        print(summary.applymap(lambda x: f"{x:,.0f}" if pd.notnull(x) else "NaN"))
+        print(numeric_summary_text(numeric_tables(summary.applymap(format_number).to_numpy()[None], numeric_cols)[0]),
+              end="")
 
     # CATEGORICAL SUMMARY
-    categorical_cols = df.select_dtypes(include="object").columns
     for col in categorical_cols:
-        if col in excluded:
-            continue
         non_null = df[col].dropna().astype(str)
         if non_null.empty:
             continue
         vc = non_null.value_counts()
-        top_val = vc.index[0]
-        top_count = vc.iloc[0]
-        print(f"\n{col} - Unique: {non_null.nunique()}")
-        print(f"Top: {top_val} ({top_count})")
-        print(vc.head(5).to_string(name="count"))
+        print(top_values_text(col, list(vc.index), list(vc)), end="")
+
+# ---- GROUPED SUMMARY ----
+def value_counts_order(counts):
+    # The permutation Series.value_counts() applies to counts in order of first
+    # appearance (nargsort, descending), so ties come out exactly as before
+    reverse = np.arange(len(counts))[::-1]
+    return reverse[counts[::-1].argsort(kind="quicksort")][::-1]
+
+def grouped_numeric_cells(grouped, numeric_cols):
+    # describe() + null_count for every group: (group, column, stat) formatted strings
+    counts = grouped.count()
+    stats = {
+        "count": counts,
+        "mean": grouped.mean(),
+        "std": grouped.std(),
+        "min": grouped.min(),
+        "25%": grouped.quantile(.25),
+        "50%": grouped.quantile(.5),
+        "75%": grouped.quantile(.75),
+        "max": grouped.max(),
+        "null_count": counts.rsub(grouped.size(), axis=0),
+    }
+    values = np.stack([stats[name][numeric_cols].to_numpy(dtype=float) for name in DESCRIBE_STATS], axis=2)
+    # Formatting happens once, over all groups
+    cells = np.array([format_number(x) for x in values.ravel()], dtype=object)
+    return cells.reshape(values.shape)
+
+def grouped_value_counts(group_ids, n_groups, column):
+    # {group number: (values, counts)} in value_counts() order, for groups with a non-null value
+    valid = (group_ids >= 0) & column.notna()
+    pairs = pd.DataFrame({"group": group_ids[valid], "value": column[valid].astype(str)})
+    sizes = pairs.groupby(["group", "value"], sort=False).size()
+    groups = sizes.index.get_level_values("group").to_numpy()
+    values = sizes.index.get_level_values("value").to_numpy(dtype=object)
+    counts = sizes.to_numpy()
+
+    # Stable sort by group keeps each group's values in order of first appearance
+    by_group = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[by_group], np.arange(n_groups + 1))
+    result = {}
+    for g in range(n_groups):
+        rows = by_group[bounds[g]:bounds[g + 1]]
+        if len(rows):
+            rows = rows[value_counts_order(counts[rows])]
+            result[g] = (list(values[rows]), list(counts[rows]))
+    return result
+
+def describe_groups(df, keys, title, numeric, flags):
+    # Same report as describe() on every df.groupby(keys) group, computed for all groups at once
+    numeric_cols, categorical_cols = summary_columns(df, numeric, flags)
+    grouper = df.groupby(keys, sort=True, observed=True)
+    group_ids = grouper.ngroup().to_numpy()
+    n_groups = grouper.ngroups
+    group_keys = grouper.size().index
+
+    tables = numeric_tables(grouped_numeric_cells(grouper[numeric_cols], numeric_cols), numeric_cols) if numeric_cols else None
+    tops = {col: grouped_value_counts(group_ids, n_groups, df[col]) for col in categorical_cols}
+
+    parts = []
+    for g, key in enumerate(group_keys):
+        parts.append(f"\n--- {title(*(key if len(keys) > 1 else (key,)))} ---\n")
+        if numeric_cols:
+            parts.append(numeric_summary_text(tables[g]))
+        for col in categorical_cols:
+            if g in tops[col]:
+                parts.append(top_values_text(col, *tops[col][g]))
+    # The whole grouping is written at once
+    print("".join(parts), end="")
 
 # ---- MAIN EXECUTION ----
+def read_table(timer, signed):
+    # Only runs when the cached table is missing or stale
+    with timer.stage("read_csv") as stage:
+        df = pd.read_csv(INPUT_FILE, dtype=SCHEMA, low_memory=False)
+        stage.rows = len(df)
+    with timer.stage("preprocess", rows=len(df)):
+        return clean(df, signed)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
 
-    df = pd.read_csv(INPUT_FILE, dtype=str, low_memory=False)
-    df = clean(df)
+    numeric, flags = column_kinds(cached_schema(INPUT_FILE))
+    signed = numeric[len(ALL_POTENTIAL_NUMERIC):]
+    with timer.stage("load") as stage:
+        df = cached_pandas(INPUT_FILE, "pandas_fb_ads", [CACHE_VERSION, signed], lambda: read_table(timer, signed))
+        stage.rows = len(df)
 
-    describe(df, "Overall Summary")
+    with timer.stage("overall summary", rows=len(df)):
+        describe(df, "Overall Summary", numeric, flags)
 
-    for pid, group_df in df.groupby("page_id"):
-        describe(group_df, f"Group: page_id = {pid}")
+    with timer.stage("group by page_id", rows=len(df)):
+        describe_groups(df, ["page_id"], lambda pid: f"Group: page_id = {pid}", numeric, flags)
 
-    for keys, group_df in df.groupby(["page_id", "bylines", "currency"]):
-        pid, bylines, currency = keys
-        describe(group_df, f"Group: page_id = {pid}, bylines = {bylines}, currency = {currency}")
+    with timer.stage("group by page_id, bylines, currency", rows=len(df)):
+        describe_groups(df, KEY_COLS,
+                        lambda pid, bylines, currency: f"Group: page_id = {pid}, bylines = {bylines}, currency = {currency}",
+                        numeric, flags)
 
+    report.end_body()
     end_time = time.perf_counter()
-    print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
\ No newline at end of file
+    print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
\ No newline at end of file
@@ -1,8 +1,18 @@
+import argparse
 import pandas as pd
 import sys
 import time
 
+from column_schema import cached_schema, columns_of_kind
+from pandas_schema import TEXT_DTYPE, build_schema, is_text, to_signed
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cached_pandas
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_posts_president_scored_anon.csv"
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/pandas_output_fb_posts.txt"
+# Bump when the cleaning changes so the cached preprocessed table is rebuilt
+CACHE_VERSION = 1
 
 NUMERIC_COLS = [
     'Total Interactions', 'Likes', 'Comments', 'Shares',
@@ -15,25 +25,31 @@ CATEGORICAL_COLS = [
     'Is Video Owner?', 'Video Length'
 ]
 
-class Tee:
-    def __init__(self, *streams): self.streams = streams
-    def write(self, msg): [s.write(msg) for s in self.streams]
-    def flush(self): [s.flush() for s in self.streams]
+GROUP_KEYS = ['Facebook_Id', 'Page Category']
+
+# Only the summarized columns are read, with their dtypes declared up front
+SCHEMA = build_schema(numeric=NUMERIC_COLS, categorical=CATEGORICAL_COLS, keys=GROUP_KEYS)
+NA_VALUES = ["-", "None", "nan", ""]
+
+def numeric_columns(schema):
+    # The declared columns, then any other column the sampled schema (column_schema) found numeric
+    return NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS + CATEGORICAL_COLS)
 
-def clean(df):
+def clean(df, signed):
+    # Numeric columns were parsed by read_csv; text columns lose "," and "-" as before.
+    # `signed` columns (numeric by the schema alone) keep their sign, see pandas_schema.to_signed
     for col in df.columns:
-        if df[col].dtype == object:
-            df[col] = df[col].astype(str).str.replace(",", "").str.replace("-", "").str.strip()
-        try:
-            df[col] = pd.to_numeric(df[col])
-        except:
-            pass
-    df.replace(["-", "None", "nan", ""], pd.NA, inplace=True)
+        if col in signed:
+            df[col] = to_signed(df[col])
+        elif is_text(df[col].dtype):
+            text = df[col].astype(TEXT_DTYPE).str.replace(",", "").str.replace("-", "").str.strip()
+            df[col] = text.mask(text.isin(NA_VALUES)).astype(SCHEMA[col])
     df.dropna(how="all", inplace=True)
     return df
 
 def describe_categorical(df, col):
-    df_col = df[col].dropna()
+    # Counted as plain strings: a categorical would also list its unused categories
+    df_col = df[col].dropna().astype(object)
     print(f"\n{col} - Unique: {df_col.nunique()}")
     if not df_col.mode().empty:
         top_val = df_col.mode().iloc[0]
@@ -43,7 +59,7 @@ def describe_categorical(df, col):
     else:
         print("No values found.")
 
-def describe(df, title):
+def describe(df, title, numeric):
     print(f"\n--- {title} ---")
 
     available_numeric = [col for col in NUMERIC_COLS if col in df.columns]
@@ -53,28 +69,60 @@ def describe(df, title):
     else:
         print("No numeric columns found.")
 
+    # Numeric by the schema alone: described per column, so their nulls drop no rows from the table above
+    extra_numeric = [col for col in numeric[len(NUMERIC_COLS):] if col in df.columns]
+    if extra_numeric:
+        print(df[extra_numeric].describe())
+
     for col in CATEGORICAL_COLS:
         if col in df.columns:
             describe_categorical(df, col)
 
+def read_table(timer, numeric):
+    # Only runs when the cached table is missing or stale. Columns numeric by the
+    # schema alone are read as text and parsed in clean(), so no row can fail the read
+    signed = numeric[len(NUMERIC_COLS):]
+    dtype = {**dict.fromkeys(signed, TEXT_DTYPE), **SCHEMA}
+    with timer.stage("read_csv") as stage:
+        df = pd.read_csv(INPUT_FILE, dtype=dtype, usecols=lambda col: col in dtype,
+                         thousands=",", na_values=NA_VALUES)
+        stage.rows = len(df)
+    with timer.stage("preprocess", rows=len(df)):
+        return clean(df, signed)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
 
-    df = pd.read_csv("C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_posts_president_scored_anon.csv")
-    df = clean(df)
+    numeric = numeric_columns(cached_schema(INPUT_FILE))
+    with timer.stage("load") as stage:
+        df = cached_pandas(INPUT_FILE, "pandas_fb_posts", [CACHE_VERSION, numeric], lambda: read_table(timer, numeric))
+        stage.rows = len(df)
 
-    describe(df, "Overall Dataset Summary")
+    with timer.stage("overall summary", rows=len(df)):
+        describe(df, "Overall Dataset Summary", numeric)
 
     if "Facebook_Id" in df.columns:
-        for fid, group_df in df[df["Facebook_Id"].notna()].groupby("Facebook_Id"):
-            describe(group_df, f"Group: Facebook_Id = {fid}")
+        with timer.stage("group by Facebook_Id", rows=len(df)):
+            for fid, group_df in df[df["Facebook_Id"].notna()].groupby("Facebook_Id", observed=True):
+                describe(group_df, f"Group: Facebook_Id = {fid}", numeric)
 
     if all(col in df.columns for col in ["Facebook_Id", "Page Category"]):
-        grouped = df.dropna(subset=["Facebook_Id", "Page Category"]).groupby(["Facebook_Id", "Page Category"])
-        for (fid, cat), group_df in grouped:
-            describe(group_df, f"Group: Facebook_Id = {fid}, Page Category = {cat}")
+        with timer.stage("group by Facebook_Id, Page Category", rows=len(df)):
+            grouped = df.dropna(subset=GROUP_KEYS).groupby(GROUP_KEYS, observed=True)
+            for (fid, cat), group_df in grouped:
+                describe(group_df, f"Group: Facebook_Id = {fid}, Page Category = {cat}", numeric)
 
+    report.end_body()
     end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
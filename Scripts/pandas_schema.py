@@ -0,0 +1,43 @@
+import pandas as pd
+
+# read_csv dtypes for the pandas scripts, declared from each script's column lists
+# instead of being inferred (or read as str and converted column by column).
+# Columns typed by the sampled schema alone (column_schema) are read as text
+# and converted with to_signed / to_flag, which cannot fail on an unsampled row.
+
+TEXT_DTYPE = "string[pyarrow]"
+KEY_DTYPE = "category"
+# Nullable boolean parses 0/1, 0.0/1.0 and True/False, so one dtype covers every flag column
+BINARY_DTYPE = "boolean"
+NUMERIC_DTYPE = "float64"
+
+
+def build_schema(numeric=(), binary=(), categorical=(), keys=()):
+    """Column -> dtype for read_csv.
+
+    Low-cardinality group-by `keys` become categoricals, `binary` flags nullable
+    booleans, other `categorical` (free text) columns pyarrow-backed strings and
+    `numeric` columns float64. A column listed twice takes the later kind in
+    that order, e.g. a key is a category even if it is also a summarized column.
+    """
+    schema = {}
+    schema.update(dict.fromkeys(categorical, TEXT_DTYPE))
+    schema.update(dict.fromkeys(binary, BINARY_DTYPE))
+    schema.update(dict.fromkeys(numeric, NUMERIC_DTYPE))
+    schema.update(dict.fromkeys(keys, KEY_DTYPE))
+    return schema
+
+
+def to_signed(text):
+    """column_schema.parse_signed over a text column: "," dropped, sign kept, cells that do not parse null."""
+    return pd.to_numeric(text.str.replace(",", "", regex=False).str.strip(), errors="coerce").astype(NUMERIC_DTYPE)
+
+
+def to_flag(text):
+    """A 0/1 text column as BINARY_DTYPE; cells other than 0/1 (or 0.0/1.0) are null."""
+    number = to_signed(text)
+    return number.where(number.isin([0, 1])).astype(BINARY_DTYPE)
+
+
+def is_text(dtype):
+    return isinstance(dtype, (pd.StringDtype, pd.CategoricalDtype)) or dtype == object
@@ -1,11 +1,21 @@
+import argparse
 import pandas as pd
 import numpy as np
 from collections import Counter
+import sys
 import time
 
+from column_schema import cached_schema, columns_of_kind
+from pandas_schema import BINARY_DTYPE, TEXT_DTYPE, build_schema, to_flag, to_signed
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cached_pandas
+
 # File paths
 INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_tw_posts_president_scored_anon.csv"
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/pandas_output_tw_posts.txt"
+# Bump when the read schema changes so the cached table is rebuilt
+CACHE_VERSION = 1
 
 # Columns
 NUMERIC_COLS = [
@@ -37,8 +47,17 @@ BINARY_COLS = [
 
 GROUP_BY = ['source', 'lang']
 
-def summarize_numeric(df):
-    df = df[[col for col in NUMERIC_COLS if col in df.columns]]
+# 'z' is listed as numeric and binary; numeric wins, the binary summary still counts it
+SCHEMA = build_schema(numeric=NUMERIC_COLS, binary=BINARY_COLS, categorical=CATEGORICAL_COLS, keys=GROUP_BY)
+
+def column_kinds(schema):
+    # (numeric, binary): the declared lists, then any other column the sampled schema (column_schema) found so
+    declared = NUMERIC_COLS + CATEGORICAL_COLS + BINARY_COLS
+    return (NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=declared),
+            BINARY_COLS + columns_of_kind(schema, "binary", exclude=declared))
+
+def summarize_numeric(df, numeric):
+    df = df[[col for col in numeric if col in df.columns]]
     df = df.apply(pd.to_numeric, errors='coerce')
     stats = df.describe(percentiles=[0.25, 0.5, 0.75]).T
     stats['null_count'] = df.isnull().sum()
@@ -51,7 +70,8 @@ def summarize_categorical(df):
     for col in CATEGORICAL_COLS:
         if col not in df.columns:
             continue
-        vc = df[col].value_counts(dropna=True)
+        # Counted as plain strings: a categorical would also list its unused categories
+        vc = df[col].astype(object).value_counts(dropna=True)
         top_val = vc.index[0] if not vc.empty else None
         output[col] = {
             "unique": df[col].nunique(dropna=True),
@@ -61,64 +81,90 @@ def summarize_categorical(df):
         }
     return output
 
-def summarize_binary(df):
+def summarize_binary(df, binary):
     output = {}
-    for col in BINARY_COLS:
+    for col in binary:
         if col not in df.columns:
             continue
-        ones = df[col].fillna(0).astype(int).sum()
-        zeros = (df[col].fillna(0) == 0).astype(int).sum()
+        # Missing flags count as 0s; nullable booleans only fill with False
+        values = df[col].fillna(False if df[col].dtype == BINARY_DTYPE else 0)
+        ones = values.astype(int).sum()
+        zeros = (values == 0).astype(int).sum()
         output[col] = {'1s': int(ones), '0s': int(zeros)}
     return output
 
-def print_summary(title, df, f):
-    print(f"\n--- {title} ---")
-    f.write(f"\n--- {title} ---\n")
+def render_categorical(categorical):
+    lines = [""]
+    for col, stat in categorical.items():
+        lines.append(f"{col} - Unique: {stat['unique']}, Top: {stat['top']} ({stat['top_count']})")
+        lines.append("Top 5 values:")
+        lines.extend(f"{k} - {v}" for k, v in stat['top_5'].items())
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+def render_binary(binary):
+    lines = ["Binary Flag Summary:", ""]
+    lines.extend(f"{col}: 1s = {counts['1s']}, 0s = {counts['0s']}" for col, counts in binary.items())
+    return "\n".join(lines) + "\n"
+
+def print_summary(report, title, df, numeric, binary):
+    # Each summary is rendered as text only when the report is text
+    report.section(title)
 
     # Numeric Summary
-    print("\n Numeric Summary:\n")
-    f.write("\n Numeric Summary:\n\n")
-    num_summary = summarize_numeric(df)
-    print(num_summary.to_string())
-    f.write(num_summary.to_string() + "\n")
+    num_summary = summarize_numeric(df, numeric)
+    report.add(num_summary.to_dict(), lambda: "\n Numeric Summary:\n\n" + num_summary.to_string() + "\n")
 
     # Categorical Summary
-    print()
-    f.write("\n")
-    for col, stat in summarize_categorical(df).items():
-        header = f"{col} - Unique: {stat['unique']}, Top: {stat['top']} ({stat['top_count']})"
-        print(header)
-        f.write(header + "\n")
-        print("Top 5 values:")
-        f.write("Top 5 values:\n")
-        for k, v in stat['top_5'].items():
-            line = f"{k} - {v}"
-            print(line)
-            f.write(line + "\n")
-        print()
-        f.write("\n")
+    categorical = summarize_categorical(df)
+    report.add(categorical, lambda: render_categorical(categorical))
 
     # Binary Flag Summary
-    print("Binary Flag Summary:\n")
-    f.write("Binary Flag Summary:\n\n")
-    for col, counts in summarize_binary(df).items():
-        line = f"{col}: 1s = {counts['1s']}, 0s = {counts['0s']}"
-        print(line)
-        f.write(line + "\n")
+    flags = summarize_binary(df, binary)
+    report.add(flags, lambda: render_binary(flags))
 
 # Main execution
+def read_table(timer, numeric, binary):
+    # Only runs when the cached table is missing or stale. Columns typed by the schema
+    # alone are read as text and converted after, so no row can fail the read
+    signed, flags = numeric[len(NUMERIC_COLS):], binary[len(BINARY_COLS):]
+    with timer.stage("read_csv") as stage:
+        df = pd.read_csv(INPUT_FILE, dtype={**dict.fromkeys(signed + flags, TEXT_DTYPE), **SCHEMA})
+        stage.rows = len(df)
+    for col in signed:
+        if col in df.columns:
+            df[col] = to_signed(df[col])
+    for col in flags:
+        if col in df.columns:
+            df[col] = to_flag(df[col])
+    return df
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
     pd.set_option('display.float_format', lambda x: f'{x:.2f}')
-    df = pd.read_csv(INPUT_FILE)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        print_summary("Overall Summary", df, f)
-        for name, group in df.groupby(GROUP_BY):
+    numeric, binary = column_kinds(cached_schema(INPUT_FILE))
+    with timer.stage("load") as stage:
+        df = cached_pandas(INPUT_FILE, "pandas_tw_posts", [CACHE_VERSION, numeric, binary],
+                           lambda: read_table(timer, numeric, binary))
+        stage.rows = len(df)
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
+    with timer.stage("overall summary", rows=len(df)):
+        print_summary(report, "Overall Summary", df, numeric, binary)
+    with timer.stage(f"group by {GROUP_BY[0]}, {GROUP_BY[1]}", rows=len(df)):
+        for name, group in df.groupby(GROUP_BY, observed=True):
             title = f"Group: {GROUP_BY[0]} = {name[0]}, {GROUP_BY[1]} = {name[1]}"
-            print_summary(title, group, f)
+            print_summary(report, title, group, numeric, binary)
 
-        end_time = time.perf_counter()
-        f.write(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds\n")
-        
+    report.end_body()
+    end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
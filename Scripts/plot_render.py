@@ -0,0 +1,115 @@
+import os
+import time
+from multiprocessing import Pool
+
+# Plot rendering for the viz scripts. Every chart is described by a Plot (what
+# to draw, from which precomputed summary, where to save it; see plot_summary)
+# and drawn on a figure of its own, which is closed as soon as it is saved, so
+# figures never pile up. The scripts only write files, so matplotlib is
+# switched to the Agg backend before pyplot is imported. Plots do not depend on each other: with more
+# than one worker they are spread across a process pool, each worker
+# importing pyplot/seaborn once. Every render is timed.
+
+KINDS = ["hist", "box", "bar"]
+
+
+class Plot:
+    """One chart of the summary `values`, saved to `path`.
+
+    `kind` is "hist" (plot_summary.histogram), "box" (plot_summary.box_stats)
+    or "bar" ([label, count] pairs; horizontal unless `vertical`, with
+    `rotation` of the x tick labels).
+    """
+
+    def __init__(self, path, kind, values, title, figsize=None, xlabel=None, ylabel=None, tight_layout=True, **options):
+        if kind not in KINDS:
+            raise ValueError(f"unknown plot kind {kind!r}")
+        self.path = path
+        self.kind = kind
+        self.values = values
+        self.title = title
+        self.figsize = figsize
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.tight_layout = tight_layout
+        self.options = options
+
+
+def use_headless():
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _draw(ax, plot):
+    import seaborn as sns
+    color = sns.color_palette()[0]
+    summary, opts = plot.values, plot.options
+    if plot.kind == "hist":
+        edges = summary["edges"]
+        ax.hist(edges[:-1], bins=edges, weights=summary["counts"], color=color, alpha=0.75, edgecolor="white")
+        if summary["log"]:
+            ax.set_xscale("symlog", linthresh=1)
+        ax.set_ylabel("Count")
+    elif plot.kind == "box":
+        stats = {k: summary[k] for k in ("q1", "med", "q3", "whislo", "whishi", "fliers")}
+        box = dict(widths=0.6, patch_artist=True, boxprops={"facecolor": color},
+                   medianprops={"color": "black"}, flierprops={"marker": "d", "markersize": 4})
+        try:
+            ax.bxp([stats], orientation="horizontal", **box)
+        except TypeError:
+            ax.bxp([stats], vert=False, **box)  # matplotlib < 3.10
+        ax.set_yticks([])
+    else:
+        labels, counts = zip(*summary) if summary else ((), ())
+        if opts.get("vertical"):
+            sns.barplot(x=list(labels), y=list(counts), ax=ax)
+            ax.set_ylabel("count")
+        else:
+            sns.barplot(x=list(counts), y=list(labels), ax=ax)
+        if "rotation" in opts:
+            ax.tick_params(axis="x", labelrotation=opts["rotation"])
+
+
+def render(plot):
+    """Draw and save one plot on its own figure; return (path, seconds)."""
+    import matplotlib.pyplot as plt
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=plot.figsize)
+    try:
+        _draw(ax, plot)
+        ax.set_title(plot.title)
+        if plot.xlabel is not None:
+            ax.set_xlabel(plot.xlabel)
+        if plot.ylabel is not None:
+            ax.set_ylabel(plot.ylabel)
+        if plot.tight_layout:
+            fig.tight_layout()
+        fig.savefig(plot.path)
+    finally:
+        plt.close(fig)
+    return plot.path, time.perf_counter() - start
+
+
+def render_all(plots, workers=1):
+    """(path, seconds) of every plot, in order; `workers` > 1 renders them in a process pool."""
+    use_headless()
+    workers = min(workers, len(plots))
+    if workers <= 1:
+        return [render(plot) for plot in plots]
+    with Pool(workers, initializer=use_headless) as pool:
+        # One plot per task: render times vary far more than the cost of a task
+        return pool.map(render, plots, chunksize=1)
+
+
+def print_render_times(times, wall):
+    print(f"\n{'plot':<48}{'seconds':>9}")
+    for path, seconds in times:
+        print(f"{os.path.basename(path):<48}{seconds:>9.2f}")
+    print(f"{'sum of renders':<48}{sum(seconds for _, seconds in times):>9.2f}")
+    print(f"{'wall':<48}{wall:>9.2f}")
+
+
+def add_render_arguments(parser):
+    group = parser.add_argument_group("rendering")
+    group.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="processes to render the plots in (1 = in this process; default: one per CPU)")
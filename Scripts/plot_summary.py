@@ -0,0 +1,103 @@
+import json
+import os
+
+import numpy as np
+
+from table_cache import CACHE_DIR, cached_table
+
+# Compact summaries the viz scripts draw their charts from, instead of handing
+# whole columns to seaborn: bin counts for a histogram (one vectorized pass,
+# log-spaced for skewed columns such as viewCount or estimated_spend) and
+# quartiles, whiskers and a bounded sample of outliers for a boxplot (found by
+# selection, not by sorting the column). A summary has the same size whatever
+# the number of rows, so rendering time does not grow with the data. Summaries
+# are cached as JSON in the cache/ folder of the stats output (git-ignored),
+# keyed on the source CSV like the table cache, so a re-run only reads them
+# back.
+
+# Bump when the layout or computation of the summaries changes
+SUMMARY_VERSION = 1
+
+BINS = 30
+# Non-negative columns whose maximum is this many times their median (+1) get log-spaced bins
+LOG_RATIO = 50
+WHISKER_IQR = 1.5
+MAX_FLIERS = 200
+SUFFIX = ".plot_summaries.json"
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def histogram(values, bins=BINS, log=None):
+    """{"edges", "counts", "log"} of the finite values, or None when there are none.
+
+    With `log` (by default: for skewed non-negative columns) the bins are
+    evenly spaced in log1p(value), so zeros still fall in the first bin.
+    """
+    values = _finite(values)
+    if not len(values):
+        return None
+    if log is None:
+        log = bool(values.min() >= 0 and values.max() + 1 >= LOG_RATIO * (np.median(values) + 1))
+    if log:
+        counts, edges = np.histogram(np.log1p(values), bins=bins, range=(0.0, float(np.log1p(values.max())) or 1.0))
+        edges = np.expm1(edges)
+    else:
+        counts, edges = np.histogram(values, bins=bins)
+    return {"edges": edges.tolist(), "counts": counts.tolist(), "log": log}
+
+
+def box_stats(values, whis=WHISKER_IQR, max_fliers=MAX_FLIERS, seed=0):
+    """Boxplot statistics of the finite values in the layout of Axes.bxp, or None when there are none.
+
+    Whiskers reach the most extreme values within `whis` IQRs of the box.
+    Beyond `max_fliers` outliers a seeded sample is kept, always including
+    the smallest and the largest; "n_fliers" counts them all.
+    """
+    values = _finite(values)
+    if not len(values):
+        return None
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    low, high = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+    inside = values[(values >= low) & (values <= high)]
+    fliers = values[(values < low) | (values > high)]
+    n_fliers = len(fliers)
+    if n_fliers > max_fliers:
+        rng = np.random.default_rng(seed)
+        keep = rng.choice(n_fliers, max_fliers - 2, replace=False)
+        fliers = np.concatenate([fliers[keep], [fliers.min(), fliers.max()]])
+    return {"q1": float(q1), "med": float(med), "q3": float(q3),
+            "whislo": float(inside.min()), "whishi": float(inside.max()),
+            "fliers": fliers.tolist(), "n_fliers": n_fliers}
+
+
+def column_summary(values, log=None):
+    """{"hist", "box"} of one numeric column, or None when it has no finite values."""
+    values = _finite(values)
+    if not len(values):
+        return None
+    return {"hist": histogram(values, log=log), "box": box_stats(values)}
+
+
+def top_counts(series, n=10):
+    """[value, count] pairs of the `n` most frequent values of a pandas Series."""
+    return [[str(value), int(count)] for value, count in series.value_counts().iloc[:n].items()]
+
+
+def _write_json(summaries, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summaries, f)
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cached_summaries(source, name, version, build, folder):
+    """The summaries `build()` makes from `source`, cached in cache/ under `folder` (the scripts' output folder)."""
+    return cached_table(source, name, [version, SUMMARY_VERSION], build, _write_json, _read_json,
+                        suffix=SUFFIX, folder=os.path.join(os.path.abspath(folder), CACHE_DIR))
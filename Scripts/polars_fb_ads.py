@@ -1,10 +1,20 @@
+import argparse
 import polars as pl
-import ast
 import sys
-import re
 import time
 
+from column_schema import cached_schema, columns_of_kind
+from memory_usage import peak_rss_mb
+from nested_fields import BREAKDOWN_RE, KEY, STRING_LIST_RE, mention_summary, nested_totals, platform_flags
+from polars_summary import describe_frame, group_keys, numeric_stats, signed_number, top_values
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cached_polars
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_ads_president_scored_anon.csv"
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/polars_output_fb_ads.txt"
+# Bump when the cleaning changes so the cached preprocessed table is rebuilt
+CACHE_VERSION = 1
 
 NUMERIC_COLS = [
     'estimated_audience_size', 'estimated_impressions', 'estimated_spend',
@@ -14,19 +24,11 @@ NUMERIC_COLS = [
 
 PLATFORMS = ['facebook', 'instagram', 'messenger', 'audience_network']
 
-class Tee:
-    def __init__(self, *streams):
-        self.streams = streams
-        self.cleaner = re.compile(r"[^\x00-\x7F]")
-
-    def write(self, msg):
-        clean_msg = self.cleaner.sub("", msg)
-        for s in self.streams:
-            s.write(clean_msg)
-
-    def flush(self):
-        for s in self.streams:
-            s.flush()
+def column_kinds(schema):
+    # (signed, flags): the columns besides NUMERIC_COLS the sampled schema (column_schema) found numeric,
+    # and the 0/1 columns it found, which get no top-values summary
+    signed = columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS)
+    return signed, columns_of_kind(schema, "binary", exclude=NUMERIC_COLS + signed)
 
 def try_parse_float(val):
     try:
@@ -39,101 +41,200 @@ def try_parse_float(val):
     except:
         return None
 
-def parse_dict(col):
-    return col.cast(str).map_elements(
-        lambda x: ast.literal_eval(x) if isinstance(x, str) and x.strip().startswith("{") else {},
-        return_dtype=pl.Object
+TOTALS_DTYPE = pl.Struct({"spend": pl.Float64, "impressions": pl.Float64})
+MENTIONS_DTYPE = pl.Struct({"count": pl.Int64, "first": pl.Utf8})
+PLATFORMS_DTYPE = pl.Struct({platform: pl.Boolean for platform in PLATFORMS})
+
+# ---- NATIVE NESTED FIELD PARSING ----
+# Cells written by Python's repr in the usual shape are rewritten to JSON with string
+# expressions and decoded by Polars; anything else (tuples, NaN, embedded quotes or
+# escapes) is left null here and parsed by nested_fields in Python instead.
+
+NESTED_COLS = ["delivery_by_region", "demographic_distribution", "publisher_platforms", "illuminating_mentions"]
+BREAKDOWN_JSON = pl.List(pl.Struct({"spend": pl.Float64, "impressions": pl.Float64}))
+
+def breakdown_json(col):
+    # {'Ohio': {'spend': 1, ...}, ...} -> [{"spend": 1, ...}, ...]
+    entries = col.str.slice(1, col.str.len_chars() - 2).str.replace_all(rf"{KEY}: \{{", "{")
+    return pl.concat_str([pl.lit("["), entries, pl.lit("]")]).str.replace_all("'", '"')
+
+def list_json(col):
+    return col.str.replace_all("'", '"')
+
+def decode(name, pattern, to_json, dtype):
+    col = pl.col(name).cast(str)
+    return pl.when(col.str.contains(pattern)).then(to_json(col)).str.json_decode(dtype).alias(f"{name}_json")
+
+def with_fallback(name, native, fn, dtype):
+    # Only the cells the native path could not decode reach Python
+    decoded = pl.col(f"{name}_json")
+    fallback = pl.when(decoded.is_null()).then(pl.col(name).cast(str)).map_elements(fn, return_dtype=dtype)
+    return pl.when(decoded.is_not_null()).then(native).otherwise(fallback)
+
+def list_total(entries, field):
+    total = entries.list.eval(pl.element().struct.field(field).fill_null(0)).list.sum()
+    # an empty list sums to -0.0
+    return pl.when(entries.list.len() == 0).then(0.0).otherwise(total)
+
+def parse_totals(name):
+    entries = pl.col(f"{name}_json")
+    native = pl.struct(spend=list_total(entries, "spend"), impressions=list_total(entries, "impressions"))
+    return with_fallback(
+        name, native, lambda x: dict(zip(("spend", "impressions"), map(float, nested_totals(x)))), TOTALS_DTYPE
     )
 
-def parse_list(col):
-    return col.cast(str).map_elements(
-        lambda x: ast.literal_eval(x) if isinstance(x, str) and x.strip().startswith("[") else [],
-        return_dtype=pl.Object
+def parse_platforms(name):
+    found = pl.col(f"{name}_json")
+    native = pl.struct(**{platform: found.list.contains(platform) for platform in PLATFORMS})
+    return with_fallback(
+        name, native, lambda x: dict(zip(PLATFORMS, platform_flags(x, PLATFORMS))), PLATFORMS_DTYPE
     )
 
-def preprocess(df: pl.DataFrame) -> pl.DataFrame:
-    df = df.with_columns([
-        pl.col("estimated_audience_size").cast(str).map_elements(try_parse_float, return_dtype=pl.Float64),
-        pl.col("estimated_impressions").cast(str).map_elements(try_parse_float, return_dtype=pl.Float64),
-        pl.col("estimated_spend").cast(str).map_elements(try_parse_float, return_dtype=pl.Float64)
+def parse_mentions(name):
+    mentions = pl.col(f"{name}_json")
+    native = pl.struct(
+        count=mentions.list.len().cast(pl.Int64),
+        first=pl.when(mentions.list.len() > 0).then(mentions.list.first()).otherwise(pl.lit("None"))
+    )
+    return with_fallback(
+        name, native, lambda x: dict(zip(("count", "first"), mention_summary(x))), MENTIONS_DTYPE
+    )
+
+# ---- NATIVE ESTIMATE PARSING ----
+# try_parse_float as expressions: a plain number loses its "," separators and
+# a "low-high" range becomes the mean of its two ends. Cells neither reads
+# (empty or several ranges, "," inside a range, other spellings) are null
+# here and go to try_parse_float in Python, which decides them as before.
+
+ESTIMATED_COLS = ['estimated_audience_size', 'estimated_impressions', 'estimated_spend']
+
+def to_float(text):
+    return text.str.strip_chars().cast(pl.Float64, strict=False)
+
+def estimate(name):
+    text = pl.col(name).cast(pl.Utf8)
+    ends = text.str.split_exact("-", 1)
+    ranged = (to_float(ends.struct.field("field_0")) + to_float(ends.struct.field("field_1"))) / 2
+    plain = to_float(text.str.replace_all(",", "", literal=True))
+    dashes = text.str.count_matches("-", literal=True)
+    return pl.when(dashes == 0).then(plain).when(dashes == 1).then(ranged).alias(f"{name}_value")
+
+def estimate_with_fallback(name):
+    # Only the cells the native path could not parse reach Python
+    value = pl.col(f"{name}_value")
+    fallback = pl.when(value.is_null()).then(pl.col(name).cast(pl.Utf8)).map_elements(try_parse_float,
+                                                                                      return_dtype=pl.Float64)
+    return pl.when(value.is_not_null()).then(value).otherwise(fallback).alias(name)
+
+def preprocess(df, signed=()):
+    df = df.with_columns([estimate(name) for name in ESTIMATED_COLS] + [signed_number(col) for col in signed] + [
+        decode("delivery_by_region", BREAKDOWN_RE, breakdown_json, BREAKDOWN_JSON),
+        decode("demographic_distribution", BREAKDOWN_RE, breakdown_json, BREAKDOWN_JSON),
+        decode("publisher_platforms", STRING_LIST_RE, list_json, pl.List(pl.Utf8)),
+        decode("illuminating_mentions", STRING_LIST_RE, list_json, pl.List(pl.Utf8))
     ])
 
-    df = df.with_columns([
-        parse_dict(pl.col("delivery_by_region")).alias("delivery_dict"),
-        parse_dict(pl.col("demographic_distribution")).alias("demo_dict"),
-        parse_list(pl.col("publisher_platforms")).alias("platforms"),
-        parse_list(pl.col("illuminating_mentions")).alias("mentions")
+    df = df.with_columns([estimate_with_fallback(name) for name in ESTIMATED_COLS] + [
+        parse_totals("delivery_by_region").alias("delivery_totals"),
+        parse_totals("demographic_distribution").alias("demo_totals"),
+        parse_platforms("publisher_platforms").alias("platforms"),
+        parse_mentions("illuminating_mentions").alias("mentions")
     ])
 
     df = df.with_columns([
-        pl.col("delivery_dict").map_elements(lambda d: sum(v.get("spend", 0) for v in d.values()), return_dtype=pl.Float64).alias("delivery_region_total_spend"),
-        pl.col("delivery_dict").map_elements(lambda d: sum(v.get("impressions", 0) for v in d.values()), return_dtype=pl.Float64).alias("delivery_region_total_impressions"),
-        pl.col("demo_dict").map_elements(lambda d: sum(v.get("spend", 0) for v in d.values()), return_dtype=pl.Float64).alias("demo_dist_total_spend"),
-        pl.col("demo_dict").map_elements(lambda d: sum(v.get("impressions", 0) for v in d.values()), return_dtype=pl.Float64).alias("demo_dist_total_impressions"),
-        pl.col("mentions").map_elements(lambda x: len(x) if isinstance(x, list) else 0, return_dtype=pl.Int64).alias("mention_count"),
-        pl.col("mentions").map_elements(lambda x: x[0] if isinstance(x, list) and x else "None", return_dtype=pl.Utf8).alias("first_mention")
+        pl.col("delivery_totals").struct.field("spend").alias("delivery_region_total_spend"),
+        pl.col("delivery_totals").struct.field("impressions").alias("delivery_region_total_impressions"),
+        pl.col("demo_totals").struct.field("spend").alias("demo_dist_total_spend"),
+        pl.col("demo_totals").struct.field("impressions").alias("demo_dist_total_impressions"),
+        pl.col("mentions").struct.field("count").alias("mention_count"),
+        pl.col("mentions").struct.field("first").alias("first_mention")
+    ] + [
+        pl.col("platforms").struct.field(platform).cast(pl.Utf8).alias(f"is_{platform}")
+        for platform in PLATFORMS
     ])
 
-    for platform in PLATFORMS:
-        df = df.with_columns(
-            (pl.col("platforms").map_elements(lambda x: platform in x if isinstance(x, list) else False, return_dtype=pl.Boolean)).cast(pl.Utf8).alias(f"is_{platform}")
-        )
-
-    return df
-
-def describe(df: pl.DataFrame, title: str):
-    print(f"\n--- {title} ---")
-
-    numeric_cols = [col for col in NUMERIC_COLS if col in df.columns]
-    if numeric_cols:
-        print("📊 Numeric Summary:")
-        print(df.select(numeric_cols).drop_nulls().describe())
-
-    string_cols = [col for col in df.columns if df[col].dtype == pl.Utf8]
-    for col in string_cols:
-        col_df = df.select(col).drop_nulls()
-        if col_df.is_empty():
-            print(f"\n{col} - No non-null values.")
-            continue
-        nunique = col_df[col].n_unique()
-        mode = col_df[col].mode()
-        top = mode[0] if mode.shape[0] > 0 else "N/A"
-        topcount = col_df[col].value_counts().sort("count", descending=True).row(0)[1] if mode.shape[0] > 0 else 0
-        print(f"\n{col} - Unique: {nunique}, Top: {top} ({topcount})")
-        freq = (
-            col_df[col]
-            .value_counts()
-            .sort(by=["count", col], descending=[True, False])
-            .head(5)
-        )
-        print("Top 5 values:")
-        for row in freq.rows():
-            print(f"{row[0]} - {row[1]}")
+    return df.drop(["delivery_totals", "demo_totals", "platforms", "mentions"] + [
+        f"{name}_json" for name in NESTED_COLS
+    ] + [f"{name}_value" for name in ESTIMATED_COLS])
+
+def describe(df, keys: list, title, signed=(), flags=()):
+    # Summaries for every group of `keys` come from two aggregations; printing is per group
+    schema = df.collect_schema()
+    numeric_cols = [col for col in NUMERIC_COLS if col in schema]
+    # Numeric by the schema alone: described per column, so their nulls drop no rows from the first table
+    extra_cols = [col for col in signed if col in schema]
+    string_cols = [col for col, dtype in schema.items() if dtype == pl.Utf8 and col not in flags]
+    numeric = numeric_stats(df, keys, numeric_cols, complete_rows=True)
+    extra = numeric_stats(df, keys, extra_cols) if extra_cols else {}
+    tops = top_values(df, keys, string_cols)
+
+    for key in group_keys(df, keys):
+        print(f"\n--- {title(*key)} ---")
+
+        if numeric_cols:
+            print("📊 Numeric Summary:")
+            print(describe_frame(numeric.get(key), numeric_cols))
+        if extra_cols:
+            print(describe_frame(extra.get(key), extra_cols))
+
+        for col in string_cols:
+            if (key, col) not in tops:
+                print(f"\n{col} - No non-null values.")
+                continue
+            nunique, freq = tops[(key, col)]
+            top, topcount = freq[0]
+            print(f"\n{col} - Unique: {nunique}, Top: {top} ({topcount})")
+            print("Top 5 values:")
+            for value, count in freq:
+                print(f"{value} - {count}")
+
+def read_table(timer, lazy, signed):
+    # Only runs when the cached table is missing or stale. When lazy, these
+    # stages only build the plan; it runs while being sunk into the cache
+    load = pl.scan_csv if lazy else pl.read_csv
+    with timer.stage("read_csv") as stage:
+        df = load(INPUT_FILE, schema_overrides=dict.fromkeys(signed, pl.Utf8))
+        stage.rows = None if lazy else df.height
+    with timer.stage("preprocess", rows=stage.rows):
+        return preprocess(df, signed)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lazy", action="store_true",
+                        help="scan the CSV lazily and run every summary on the streaming engine")
+    add_report_arguments(parser)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE, ascii_only=True))
+    sys.stdout = report
 
-    df = pl.read_csv("C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_ads_president_scored_anon.csv")
-    df = preprocess(df)
+    signed, flags = column_kinds(cached_schema(INPUT_FILE))
+    with timer.stage("load") as stage:
+        df = cached_polars(INPUT_FILE, "polars_fb_ads", [CACHE_VERSION, signed],
+                           lambda: read_table(timer, args.lazy, signed), lazy=args.lazy)
+        rows = stage.rows = None if args.lazy else df.height
+    columns = df.collect_schema().names()
 
-    describe(df, "Overall Summary")
+    with timer.stage("overall summary", rows=rows):
+        describe(df, [], lambda: "Overall Summary", signed, flags)
 
-    if "page_id" in df.columns:
-        for pid in df["page_id"].unique().drop_nulls().to_list():
-            group_df = df.filter(pl.col("page_id") == pid)
-            describe(group_df, f"Group: page_id = {pid}")
+    if "page_id" in columns:
+        with timer.stage("group by page_id", rows=rows):
+            describe(df, ["page_id"], lambda pid: f"Group: page_id = {pid}", signed, flags)
 
-    if all(col in df.columns for col in ["page_id", "bylines", "currency"]):
-        pairs = df.select(["page_id", "bylines", "currency"]).drop_nulls().unique()
-        for row in pairs.rows(named=True):
-            group_df = df.filter(
-                (pl.col("page_id") == row["page_id"]) &
-                (pl.col("bylines") == row["bylines"]) &
-                (pl.col("currency") == row["currency"])
-            )
-            describe(group_df, f"Group: page_id = {row['page_id']}, bylines = {row['bylines']}, currency = {row['currency']}")
+    if all(col in columns for col in ["page_id", "bylines", "currency"]):
+        with timer.stage("group by page_id, bylines, currency", rows=rows):
+            describe(df, ["page_id", "bylines", "currency"],
+                     lambda pid, bylines, currency: f"Group: page_id = {pid}, bylines = {bylines}, currency = {currency}",
+                     signed, flags)
 
+    report.end_body()
     end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+    timer.report()
+    report.close()
@@ -1,33 +1,37 @@
+import argparse
 import polars as pl
 import sys
-import re
 import time
 
+from column_schema import cached_schema, columns_of_kind
+from memory_usage import peak_rss_mb
+from polars_summary import describe_frame, group_keys, numeric_stats, signed_number, top_values
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cached_polars
+
+INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_posts_president_scored_anon.csv"
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/polars_output_fb_posts.txt"
+# Bump when the cleaning changes so the cached preprocessed table is rebuilt
+CACHE_VERSION = 1
 
 NUMERIC_COLS = [
     'Total Interactions', 'Likes', 'Comments', 'Shares',
     'Love', 'Wow', 'Haha', 'Sad', 'Angry'
 ]
 
-class Tee:
-    def __init__(self, *streams):
-        self.streams = streams
-        self.cleaner = re.compile(r"[^\x00-\x7F]")
-
-    def write(self, msg):
-        clean_msg = self.cleaner.sub("", msg)
-        for s in self.streams:
-            s.write(clean_msg)
+def numeric_columns(schema):
+    # The declared columns, then any other column the sampled schema (column_schema) found numeric
+    return NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS)
 
-    def flush(self):
-        for s in self.streams:
-            s.flush()
+def clean(df, signed=()):
+    # Numeric by the schema alone: parsed with the sign kept before the "-" is stripped from text
+    df = df.with_columns([signed_number(col) for col in signed])
+    schema = df.collect_schema()
 
-def clean(df: pl.DataFrame) -> pl.DataFrame:
     # Clean string columns
-    for col in df.columns:
-        if df[col].dtype == pl.Utf8:
+    for col, dtype in schema.items():
+        if dtype == pl.Utf8:
             df = df.with_columns([
                 pl.col(col)
                 .str.replace_all(",", "")
@@ -38,7 +42,7 @@ def clean(df: pl.DataFrame) -> pl.DataFrame:
     
     # Only cast numeric columns to Float64
     for col in NUMERIC_COLS:
-        if col in df.columns:
+        if col in schema:
             try:
                 df = df.with_columns(pl.col(col).cast(pl.Float64).alias(col))
             except:
@@ -49,81 +53,99 @@ def clean(df: pl.DataFrame) -> pl.DataFrame:
 
     return df
 
-def describe(df: pl.DataFrame, title: str):
-    print(f"\n--- {title} ---")
-
-    numeric_cols = [col for col in NUMERIC_COLS if col in df.columns]
-    if numeric_cols:
-        try:
+def clean_strings(df, cols: list):
+    # Same cleaning as the per-column summary: strip, drop "," and "-", empty -> null
+    exprs = []
+    for col in cols:
+        cleaned = (
+            pl.col(col)
+            .cast(pl.Utf8)
+            .str.strip_chars()
+            .str.replace_all(",", "")
+            .str.replace_all("-", "")
+        )
+        exprs.append(pl.when(cleaned.str.len_chars() > 0).then(cleaned).alias(col))
+    return df.with_columns(exprs)
+
+def describe(df, keys: list, title, signed=()):
+    # Summaries for every group of `keys` come from two aggregations; printing is per group
+    schema = df.collect_schema()
+    numeric_cols = [col for col in NUMERIC_COLS if col in schema]
+    # Numeric by the schema alone: described per column, so their nulls drop no rows from the first table
+    extra_cols = [col for col in signed if col in schema]
+    string_cols = [col for col, dtype in schema.items() if dtype == pl.Utf8]
+    numeric = numeric_stats(df, keys, numeric_cols, complete_rows=True)
+    extra = numeric_stats(df, keys, extra_cols) if extra_cols else {}
+    tops = top_values(clean_strings(df, string_cols), keys, string_cols)
+
+    for key in group_keys(df, keys):
+        print(f"\n--- {title(*key)} ---")
+
+        if numeric_cols:
             print("📊 Numeric Summary:")
-            print(df.select(numeric_cols).drop_nulls().describe())
-        except Exception as e:
-            print(f"Numeric summary failed: {e}")
-    else:
-        print("No numeric columns found.")
-
-    string_cols = [col for col in df.columns if df[col].dtype == pl.Utf8]
-    for col in string_cols:
-        try:
-            # Clean column values
-            col_df = df.select(
-                pl.col(col)
-                .cast(pl.Utf8)
-                .str.strip_chars()
-                .str.replace_all(",", "")
-                .str.replace_all("-", "")
-                .alias(col)
-            ).drop_nulls()
-
-            col_df = col_df.filter(pl.col(col).str.len_chars() > 0)
-
-            if col_df.is_empty():
+            print(describe_frame(numeric.get(key), numeric_cols))
+        else:
+            print("No numeric columns found.")
+        if extra_cols:
+            print(describe_frame(extra.get(key), extra_cols))
+
+        for col in string_cols:
+            if (key, col) not in tops:
                 continue  # ⛳ skip analysis for empty column
-
-            nunique = col_df[col].n_unique()
-            mode_series = col_df[col].mode()
-            topval = mode_series[0] if mode_series.shape[0] > 0 else "N/A"
-            topcount = col_df[col].value_counts().sort("count", descending=True).row(0)[1] if mode_series.shape[0] > 0 else 0
-
+            nunique, freq = tops[(key, col)]
+            topval, topcount = freq[0]
             print(f"\n{col} - Unique: {nunique}, Top: {topval} ({topcount})")
-
-            freq = (
-                col_df[col]
-                .value_counts()
-                .sort(by=["count", col], descending=[True, False])
-                .head(5)
-            )
-
             print("Top 5 values:")
-            for val, count in freq.rows():
+            for val, count in freq:
                 print(f"{val} - {count}")
 
-        except Exception as e:
-            print(f"Failed to summarize {col}: {e}")
+def read_table(timer, lazy, signed):
+    # Only runs when the cached table is missing or stale. When lazy, these
+    # stages only build the plan; it runs while being sunk into the cache
+    load = pl.scan_csv if lazy else pl.read_csv
+    with timer.stage("read_csv") as stage:
+        df = load(INPUT_FILE, schema_overrides=dict.fromkeys(signed, pl.Utf8))
+        stage.rows = None if lazy else df.height
+    with timer.stage("preprocess", rows=stage.rows):
+        return clean(df, signed)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lazy", action="store_true",
+                        help="scan the CSV lazily and run every summary on the streaming engine")
+    add_report_arguments(parser)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE, ascii_only=True))
+    sys.stdout = report
 
-    df = pl.read_csv("C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_posts_president_scored_anon.csv")
-    df = clean(df)
+    numeric = numeric_columns(cached_schema(INPUT_FILE))
+    signed = numeric[len(NUMERIC_COLS):]
+    with timer.stage("load") as stage:
+        df = cached_polars(INPUT_FILE, "polars_fb_posts", [CACHE_VERSION, signed],
+                           lambda: read_table(timer, args.lazy, signed), lazy=args.lazy)
+        rows = stage.rows = None if args.lazy else df.height
+    columns = df.collect_schema().names()
 
-    describe(df, "Overall Dataset Summary")
+    with timer.stage("overall summary", rows=rows):
+        describe(df, [], lambda: "Overall Dataset Summary", signed)
 
-    if "Facebook_Id" in df.columns:
-        for fid in df["Facebook_Id"].unique().drop_nulls().to_list():
-            group_df = df.filter(pl.col("Facebook_Id") == fid)
-            describe(group_df, f"Group: Facebook_Id = {fid}")
+    if "Facebook_Id" in columns:
+        with timer.stage("group by Facebook_Id", rows=rows):
+            describe(df, ["Facebook_Id"], lambda fid: f"Group: Facebook_Id = {fid}", signed)
 
-    if all(col in df.columns for col in ["Facebook_Id", "Page Category"]):
-        pairs = df.select(["Facebook_Id", "Page Category"]).drop_nulls().unique()
-        for row in pairs.iter_rows(named=True):
-            group_df = df.filter(
-                (pl.col("Facebook_Id") == row["Facebook_Id"]) &
-                (pl.col("Page Category") == row["Page Category"])
-            )
-            describe(group_df, f"Group: Facebook_Id = {row['Facebook_Id']}, Page Category = {row['Page Category']}")
+    if all(col in columns for col in ["Facebook_Id", "Page Category"]):
+        with timer.stage("group by Facebook_Id, Page Category", rows=rows):
+            describe(df, ["Facebook_Id", "Page Category"],
+                     lambda fid, category: f"Group: Facebook_Id = {fid}, Page Category = {category}", signed)
 
+    report.end_body()
     end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+    timer.report()
+    report.close()
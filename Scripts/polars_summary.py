@@ -0,0 +1,120 @@
+import polars as pl
+
+# Grouped describe() for the Polars scripts. Every group of a grouping is
+# summarized by one group_by().agg() for the numeric columns and one long-format
+# aggregation for the string columns, instead of filtering the frame per group.
+# Each function accepts a DataFrame or a LazyFrame; lazy queries run on the
+# streaming engine, reading only the columns they use.
+
+NUMERIC_STATS = ["count", "null_count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+QUANTILES = {"25%": 0.25, "50%": 0.5, "75%": 0.75}
+
+SEP = "\x1f"
+
+
+def collect(frame):
+    if isinstance(frame, pl.LazyFrame):
+        return frame.collect(engine="streaming")
+    return frame
+
+
+def _key_names(keys):
+    return [f"{SEP}key{i}" for i in range(len(keys))]
+
+
+def _numeric_exprs(cols):
+    exprs = []
+    for c in cols:
+        col = pl.col(c)
+        stats = {
+            "count": col.count().cast(pl.Float64),
+            "null_count": col.null_count().cast(pl.Float64),
+            "mean": col.mean(),
+            "std": col.std(),
+            "min": col.min(),
+            "max": col.max(),
+        }
+        # describe() uses nearest-rank quantiles
+        stats.update({name: col.quantile(q, interpolation="nearest") for name, q in QUANTILES.items()})
+        exprs += [stats[name].alias(f"{c}{SEP}{name}") for name in NUMERIC_STATS]
+    return exprs
+
+
+def signed_number(name):
+    """column_schema.parse_signed as an expression: "," dropped, sign kept, cells that do not parse null.
+
+    For columns typed numeric by the sampled schema alone, read as text so an
+    unsampled row cannot fail the CSV read.
+    """
+    text = pl.col(name).cast(pl.Utf8).str.replace_all(",", "", literal=True).str.strip_chars()
+    return text.cast(pl.Float64, strict=False).alias(name)
+
+
+def numeric_stats(df, keys, cols, complete_rows=False):
+    """{group key: {(col, stat): value}} for every group of `keys` (`[]` = whole frame).
+
+    With `complete_rows`, rows with a null in any of `cols` are left out first,
+    as `df.select(cols).drop_nulls().describe()` did per group.
+    """
+    names = _key_names(keys)
+    frame = df.select([pl.col(k).alias(n) for k, n in zip(keys, names)] + [pl.col(c).cast(pl.Float64) for c in cols])
+    if names:
+        frame = frame.drop_nulls(names)
+    if complete_rows:
+        frame = frame.drop_nulls(cols)
+    if names:
+        result = frame.group_by(names, maintain_order=True).agg(_numeric_exprs(cols))
+    else:
+        result = frame.select(_numeric_exprs(cols))
+    stats = {}
+    for row in collect(result).iter_rows(named=True):
+        key = tuple(row.pop(n) for n in names)
+        stats[key] = {tuple(name.split(SEP)): value for name, value in row.items()}
+    return stats
+
+
+def describe_frame(stats, cols):
+    """The `describe()` table for one group, rebuilt from `numeric_stats` output."""
+    stats = stats or {}
+    data = {"statistic": NUMERIC_STATS}
+    for c in cols:
+        data[c] = [stats.get((c, s), 0.0 if s in ("count", "null_count") else None) for s in NUMERIC_STATS]
+    return pl.DataFrame(data, schema={"statistic": pl.Utf8, **{c: pl.Float64 for c in cols}})
+
+
+def top_values(df, keys, cols, k=5):
+    """{(group key, col): (n_unique, [(value, count), ...])} for every string column.
+
+    All columns are unpivoted into one (key, column, value) frame and counted in
+    a single group_by; values are ranked by count, then by value.
+    """
+    names = _key_names(keys)
+    if not cols:
+        return {}
+    long = (
+        df.select([pl.col(k).alias(n) for k, n in zip(keys, names)] + [pl.col(c).cast(pl.Utf8) for c in cols])
+        .unpivot(index=names, on=cols, variable_name="column", value_name="value")
+        .drop_nulls()
+    )
+    counts = long.group_by(names + ["column", "value"]).agg(pl.len().alias("count"))
+    ranked = (
+        counts.sort(["count", "value"], descending=[True, False])
+        .group_by(names + ["column"], maintain_order=True)
+        .agg(
+            pl.len().alias("n_unique"),
+            pl.col("value").head(k).alias("values"),
+            pl.col("count").head(k).alias("counts"),
+        )
+    )
+    tops = {}
+    for row in collect(ranked).iter_rows(named=True):
+        key = tuple(row[n] for n in names)
+        tops[(key, row["column"])] = (row["n_unique"], list(zip(row["values"], row["counts"])))
+    return tops
+
+
+def group_keys(df, keys):
+    """Distinct non-null key tuples in order of first appearance."""
+    if not keys:
+        return [()]
+    return collect(df.select(keys).drop_nulls().unique(maintain_order=True)).rows()
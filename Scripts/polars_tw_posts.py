@@ -1,11 +1,20 @@
+import argparse
 import polars as pl
 import sys
-import re
 import time
 
+from column_schema import cached_schema, columns_of_kind
+from memory_usage import peak_rss_mb
+from polars_summary import describe_frame, group_keys, numeric_stats, signed_number, top_values
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cached_polars
+
 # File paths
 INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_tw_posts_president_scored_anon.csv"
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/polars_output_tw_posts.txt"
+# Bump when the read changes so the cached table is rebuilt
+CACHE_VERSION = 1
 
 # Column classifications
 NUMERIC_COLS = [
@@ -37,71 +46,85 @@ BINARY_COLS = [
 
 GROUP_BY = ['source', 'lang']
 
-# Tee class for clean dual output
-class Tee:
-    def __init__(self, *streams):
-        self.streams = streams
-        self.cleaner = re.compile(r"[^\x00-\x7F]")
-
-    def write(self, msg):
-        clean_msg = self.cleaner.sub("", msg)
-        for s in self.streams:
-            s.write(clean_msg)
-
-    def flush(self):
-        for s in self.streams:
-            s.flush()
+def numeric_columns(schema):
+    # The declared columns, then any other column the sampled schema (column_schema) found numeric
+    return NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS + CATEGORICAL_COLS + BINARY_COLS)
 
 # Summary functions
-def summarize_numeric(df):
-    numeric_df = df.select([pl.col(c).cast(pl.Float64) for c in NUMERIC_COLS if c in df.columns])
-    stats = numeric_df.describe()
+def summarize_numeric(stats, cols):
     print(" Numeric Summary:")
-    print(stats)
+    print(describe_frame(stats, cols))
 
-def summarize_categorical(df):
-    for col in CATEGORICAL_COLS:
-        if col not in df.columns:
+def summarize_categorical(tops, key, cols):
+    for col in cols:
+        if (key, col) not in tops:
+            print(f"⚠️ Failed to summarize {col}: no non-null values")
             continue
-        try:
-            vc = df.select(pl.col(col)).drop_nulls().to_series().value_counts().sort("count", descending=True)
-            unique = vc.shape[0]
-            top_val = vc[0, 0]
-            top_count = vc[0, 1]
-            print(f"{col} - Unique: {unique}, Top: {top_val} ({top_count})")
-            print("Top 5 values:")
-            for i in range(min(5, unique)):
-                print(f"{vc[i, 0]} - {vc[i, 1]}")
-            print("")
-        except Exception as e:
-            print(f"⚠️ Failed to summarize {col}: {e}")
-
-def print_summary(title, df):
-    print(f"\n--- {title} ---")
-    summarize_numeric(df)
-    print("")
-    summarize_categorical(df)
+        unique, freq = tops[(key, col)]
+        top_val, top_count = freq[0]
+        print(f"{col} - Unique: {unique}, Top: {top_val} ({top_count})")
+        print("Top 5 values:")
+        for val, count in freq:
+            print(f"{val} - {count}")
+        print("")
+
+def print_summaries(df, keys, title, numeric):
+    # Every group's numeric and categorical stats come from grouped aggregations
+    schema = df.collect_schema()
+    numeric_cols = [c for c in numeric if c in schema]
+    categorical_cols = [c for c in CATEGORICAL_COLS if c in schema]
+    numeric = numeric_stats(df, keys, numeric_cols)
+    tops = top_values(df, keys, categorical_cols)
+
+    for key in group_keys(df, keys):
+        print(f"\n--- {title(*key)} ---")
+        summarize_numeric(numeric.get(key), numeric_cols)
+        print("")
+        summarize_categorical(tops, key, categorical_cols)
 
 # Main
+def read_table(timer, lazy, signed):
+    # Only runs when the cached table is missing or stale. When lazy, these
+    # stages only build the plan; it runs while being sunk into the cache.
+    # Columns numeric by the schema alone are read as text and parsed with the sign kept
+    load = pl.scan_csv if lazy else pl.read_csv
+    with timer.stage("read_csv") as stage:
+        df = load(INPUT_FILE, schema_overrides=dict.fromkeys(signed, pl.Utf8))
+        stage.rows = None if lazy else df.height
+    return df.with_columns([signed_number(col) for col in signed])
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lazy", action="store_true",
+                        help="scan the CSV lazily and run every summary on the streaming engine")
+    add_report_arguments(parser)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE, ascii_only=True))
+    sys.stdout = report
 
-    df = pl.read_csv(INPUT_FILE)
+    numeric = numeric_columns(cached_schema(INPUT_FILE))
+    signed = numeric[len(NUMERIC_COLS):]
+    with timer.stage("load") as stage:
+        df = cached_polars(INPUT_FILE, "polars_tw_posts", [CACHE_VERSION, signed],
+                           lambda: read_table(timer, args.lazy, signed), lazy=args.lazy)
+        rows = stage.rows = None if args.lazy else df.height
 
     # Overall summary
-    print_summary("Overall Summary", df)
-
-    # Get group keys using .agg()
-    group_keys = df.group_by(GROUP_BY).agg(pl.count()).select(GROUP_BY).rows()
+    with timer.stage("overall summary", rows=rows):
+        print_summaries(df, [], lambda: "Overall Summary", numeric)
 
-    for source_val, lang_val in group_keys:
-        group_df = df.filter(
-            (pl.col(GROUP_BY[0]) == source_val) & (pl.col(GROUP_BY[1]) == lang_val)
-        )
-        label = f"Group: {GROUP_BY[0]} = {source_val}, {GROUP_BY[1]} = {lang_val}"
-        print_summary(label, group_df)
+    with timer.stage(f"group by {GROUP_BY[0]}, {GROUP_BY[1]}", rows=rows):
+        print_summaries(df, GROUP_BY, lambda source_val, lang_val: f"Group: {GROUP_BY[0]} = {source_val}, {GROUP_BY[1]} = {lang_val}",
+                        numeric)
 
+    report.end_body()
     end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+    timer.report()
+    report.close()
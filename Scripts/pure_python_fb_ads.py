@@ -1,10 +1,22 @@
+import argparse
 import csv
-import math
-from collections import defaultdict, Counter
+from functools import partial
+from multiprocessing import Pool
+from operator import itemgetter
 import sys
-import ast
 import time
 
+from accumulators import QUANTILE_K, GroupedAccumulator, SummaryAccumulator
+from column_schema import cached_schema, columns_of_kind, kind_of, parse_signed
+from column_store import cached_store
+from csv_projection import iter_projected
+from csv_chunks import iter_range, split_ranges
+from incremental import STATE_SUFFIX, update_aggregate
+from nested_fields import mention_summary, nested_totals, platform_flags
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cache_paths
+
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/pure_python_output_fb_ads.txt"
 
 NUMERIC_COLS = [
@@ -16,18 +28,26 @@ NUMERIC_COLS = [
 DUMMY_SUFFIX = '_illuminating'
 PLATFORM_LIST = ['facebook', 'instagram', 'messenger', 'audience_network']
 
-class Tee:
-    def __init__(self, *streams):
-        self.streams = streams
-        self.cleaner = None
+# Columns preprocess_row adds, in the order it adds them, and the raw columns they are parsed from
+DERIVED_COLS = [
+    'delivery_region_total_spend', 'delivery_region_total_impressions',
+    'demo_dist_total_spend', 'demo_dist_total_impressions'
+] + [f"is_{platform}" for platform in PLATFORM_LIST] + ['mention_count', 'first_mention']
+NESTED_COLS = ['delivery_by_region', 'demographic_distribution', 'publisher_platforms', 'illuminating_mentions']
+
+GROUPING_SETS = [(), ("page_id",), ("page_id", "bylines", "currency")]
 
-    def write(self, message):
-        for s in self.streams:
-            s.write(message)
+# Near-unique columns that only get a HyperLogLog distinct count with --approx-distinct
+HIGH_CARDINALITY_COLS = ['ad_id', 'delivery_by_region', 'demographic_distribution', 'illuminating_scored_message']
 
-    def flush(self):
-        for s in self.streams:
-            s.flush()
+# Rows of an added export with an already counted id are skipped
+ID_COL = "ad_id"
+
+# Byte ranges per worker; more ranges than workers evens out skewed chunks
+CHUNKS_PER_WORKER = 4
+
+# Bump when preprocess_row changes so the cached column store and aggregation state are rebuilt
+CACHE_VERSION = 2
 
 def try_parse_float(val):
     try:
@@ -40,128 +60,178 @@ def try_parse_float(val):
     except:
         return None
 
-def safe_parse_dict(val):
-    try:
-        return ast.literal_eval(val)
-    except:
-        return {}
-
-def safe_parse_list(val):
-    try:
-        return ast.literal_eval(val)
-    except:
-        return []
+def derived_values(delivery, demo, platforms, mentions):
+    # The DERIVED_COLS values parsed from the NESTED_COLS values of one row
+    flags = ["1" if flag else "0" for flag in platform_flags(platforms, PLATFORM_LIST)]
+    return (*nested_totals(delivery), *nested_totals(demo), *flags, *mention_summary(mentions))
 
 def preprocess_row(row):
-    # Parse delivery_by_region
-    delivery = safe_parse_dict(row.get("delivery_by_region", "{}"))
-    row["delivery_region_total_spend"] = sum(v.get("spend", 0) for v in delivery.values())
-    row["delivery_region_total_impressions"] = sum(v.get("impressions", 0) for v in delivery.values())
-
-    # Parse demographic_distribution
-    demo = safe_parse_dict(row.get("demographic_distribution", "{}"))
-    row["demo_dist_total_spend"] = sum(v.get("spend", 0) for v in demo.values())
-    row["demo_dist_total_impressions"] = sum(v.get("impressions", 0) for v in demo.values())
+    # Parse delivery_by_region, demographic_distribution, publisher_platforms and illuminating_mentions
+    row.update(zip(DERIVED_COLS, derived_values(row.get("delivery_by_region", "{}"), row.get("demographic_distribution", "{}"),
+                                                row.get("publisher_platforms", "[]"), row.get("illuminating_mentions", "[]"))))
 
     # Parse estimated fields
     for col in ['estimated_audience_size', 'estimated_impressions', 'estimated_spend']:
         row[col] = str(row.get(col, "")).strip()
 
-    # Parse publisher_platforms
-    platforms = safe_parse_list(row.get("publisher_platforms", "[]"))
-    for platform in PLATFORM_LIST:
-        row[f"is_{platform}"] = "1" if platform in platforms else "0"
-
-    # Parse illuminating_mentions
-    mentions = safe_parse_list(row.get("illuminating_mentions", "[]"))
-    row["mention_count"] = len(mentions)
-    row["first_mention"] = mentions[0] if mentions else "None"
-
     return row
 
-def load_csv(filepath):
+def iter_csv(filepath):
     with open(filepath, mode="r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return [preprocess_row(row) for row in reader]
+        for row in csv.DictReader(f):
+            yield preprocess_row(row)
 
-def identify_types(rows):
-    first_row = rows[0]
+def load_csv(filepath):
+    return list(iter_csv(filepath))
+
+def iter_projected_rows(filepath, fields):
+    # Tuples of the `fields` values of every preprocessed row, read column-projected (csv_projection)
+    raw = [col for col in fields if col not in DERIVED_COLS]
+    position = {col: i for i, col in enumerate(raw + NESTED_COLS + DERIVED_COLS)}
+    pick = itemgetter(*[position[col] for col in fields])
+    for values in iter_projected(filepath, raw + NESTED_COLS):
+        yield pick(values + derived_values(*values[len(raw):]))
+
+def numeric_columns(schema):
+    # The declared columns, then any other column the sampled schema (column_schema) found numeric
+    return NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS)
+
+def signed_parsers(numeric):
+    # Columns only the schema found numeric keep their sign (column_schema.parse_signed); try_parse_float drops it
+    return dict.fromkeys([col for col in numeric if col not in NUMERIC_COLS], parse_signed)
+
+def identify_types(columns, schema):
+    # Declared names win; columns they do not cover are typed from the schema
+    numeric = numeric_columns(schema)
     types = {}
-    for col in first_row:
-        if col in NUMERIC_COLS:
+    for col in columns:
+        if col in numeric:
             types[col] = "numeric"
-        elif col.endswith(DUMMY_SUFFIX) or col.startswith("is_"):
+        elif col.endswith(DUMMY_SUFFIX) or col.startswith("is_") or kind_of(schema, col) == "binary":
             types[col] = "dummy"
         else:
             types[col] = "categorical"
     return types
 
+def new_summary(types):
+    numeric = [col for col, typ in types.items() if typ == "numeric"]
+    return SummaryAccumulator(types, try_parse_float, parsers=signed_parsers(numeric))
+
 def compute_stats(rows, types):
-    stats = {}
-    for col, typ in types.items():
-        values = [str(row[col]).strip() for row in rows if str(row.get(col, "")).strip() not in ("", "-", "None", "nan")]
-        if typ == "numeric":
-            nums = [try_parse_float(v) for v in values if try_parse_float(v) is not None]
-            if not nums:
-                stats[col] = {"count": 0}
-                continue
-            count = len(nums)
-            mean = sum(nums) / count
-            std_dev = math.sqrt(sum((x - mean) ** 2 for x in nums) / count)
-            stats[col] = {
-                "count": count,
-                "mean": round(mean, 2),
-                "min": min(nums),
-                "max": max(nums),
-                "std_dev": round(std_dev, 2)
-            }
-
-        elif typ == "dummy":
-            ones = sum(1 for v in values if v == "1")
-            zeros = sum(1 for v in values if v == "0")
-            stats[col] = {
-                "count": len(values),
-                "1s": ones,
-                "0s": zeros,
-                "percent_1s": round(100 * ones / len(values), 2) if values else 0.0
-            }
-
-        elif typ == "categorical":
-            freq = Counter(values)
-            most_common = freq.most_common(1)[0] if freq else ("N/A", 0)
-            stats[col] = {
-                "count": len(values),
-                "unique_values": len(freq),
-                "most_common_value": most_common[0],
-                "most_common_count": most_common[1]
-            }
-    return stats
+    return new_summary(types).update(rows).stats()
+
+def new_aggregate(types, grouping_sets):
+    return GroupedAccumulator(partial(new_summary, types), grouping_sets)
+
+def aggregate(rows, types, grouping_sets):
+    return new_aggregate(types, grouping_sets).update(rows)
+
+def aggregate_range(task):
+    # Worker: preprocess and aggregate one byte range, return the partial state
+    filepath, fieldnames, types, grouping_sets, start, end = task
+    rows = (preprocess_row(row) for row in iter_range(filepath, fieldnames, start, end))
+    return aggregate(rows, types, grouping_sets).state()
+
+def aggregate_parallel(filepath, types, grouping_sets, workers):
+    fieldnames, ranges = split_ranges(filepath, workers * CHUNKS_PER_WORKER)
+    tasks = [(filepath, fieldnames, types, grouping_sets, start, end) for start, end in ranges]
+    result = new_aggregate(types, grouping_sets)
+    with Pool(workers) as pool:
+        # imap keeps file order, so groups, counts, moments and tie-breaks match a serial run; quartiles of a
+        # group with QUANTILE_K or more values come from merged sketches and depend on how the rows were split
+        for state in pool.imap(aggregate_range, tasks):
+            result.merge_state(state)
+    return result
+
+def load_columns(filepath, schema):
+    # Preprocessed rows converted once into a memory-mapped column store
+    parse_number = SummaryAccumulator({}, try_parse_float).parse_number
+    numeric = numeric_columns(schema)
+    parsers = dict.fromkeys(signed_parsers(numeric), SummaryAccumulator({}, parse_signed).parse_number)
+    return cached_store(filepath, "pure_python_fb_ads", [CACHE_VERSION, numeric], lambda: iter_csv(filepath),
+                        numeric, parse_number, parsers=parsers)
+
+def aggregate_columns(store, types, grouping_sets):
+    return new_aggregate(types, grouping_sets).update_columns(store)
+
+def aggregate_incremental(filepath, added, types, grouping_sets):
+    # Resumes from the saved state and only reads rows past each file's watermark
+    state_path = cache_paths(filepath, "pure_python_fb_ads", STATE_SUFFIX)[0]
+    return update_aggregate(state_path, [filepath] + added, [CACHE_VERSION, types],
+                            partial(new_aggregate, types, grouping_sets), preprocess_row, ID_COL)
 
 def group_by_stats(rows, types, keys):
-    grouped = defaultdict(list)
-    for row in rows:
-        key = tuple(str(row.get(k, "")).strip() for k in keys)
-        if all(k not in ("", "-", "None", "nan") for k in key):
-            grouped[key].append(row)
-    return {k: compute_stats(v, types) for k, v in grouped.items()}
-
-def print_summary(title, summary):
-    print(f"\n--- {title} ---")
-    for col, val in summary.items():
-        print(f"{col}: {val}")
+    return aggregate(rows, types, [keys]).stats(keys)
+
+def print_summary(report, title, summary):
+    report.section(title)
+    report.add(summary, lambda: "".join(f"{col}: {val}\n" for col, val in summary.items()))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"processes to split the CSV across (1 = serial); quartiles of groups with {QUANTILE_K} "
+                             "or more values are approximate and can differ from a serial run")
+    parser.add_argument("--columns", action="store_true",
+                        help="aggregate over a column store of the CSV, converted on the first run")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep the aggregation state in Datasets/cache/ and only read rows added since the last run")
+    parser.add_argument("--add", nargs="+", default=[], metavar="CSV",
+                        help="further export files to merge into the state; rows whose ad_id was counted are skipped")
+    parser.add_argument("--approx-distinct", action="store_true",
+                        help="HyperLogLog distinct counts (no frequency maps) for " + ", ".join(HIGH_CARDINALITY_COLS))
+    parser.add_argument("--heavy-hitters", action="store_true",
+                        help="fixed-memory heavy-hitter sketches instead of full frequency maps for the categorical columns")
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    if (args.incremental or args.add) and (args.columns or args.workers > 1):
+        parser.error("--incremental / --add cannot be combined with --columns or --workers")
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
 
     filepath = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_ads_president_scored_anon.csv"
-    data = load_csv(filepath)
-    col_types = identify_types(data)
-
-    print_summary("Overall Summary", compute_stats(data, col_types))
-    print_summary("Grouped by page_id", group_by_stats(data, col_types, ["page_id"]))
-    print_summary("Grouped by page_id, bylines, and currency", group_by_stats(data, col_types, ["page_id", "bylines", "currency"]))
-
+    schema = cached_schema(filepath)
+    data = iter_csv(filepath)
+    first_row = next(data)
+    col_types = identify_types(first_row, schema)
+    if args.approx_distinct:
+        col_types.update((col, "distinct") for col in HIGH_CARDINALITY_COLS if col in col_types)
+    if args.heavy_hitters:
+        col_types.update((col, "heavy") for col, typ in col_types.items() if typ == "categorical")
+
+    # Overall and both groupings are aggregated in one scan of the file
+    with timer.stage("scan + aggregate") as stage:
+        if args.columns:
+            data.close()
+            with timer.stage("load columns"):
+                store = load_columns(filepath, schema)
+            stage.rows = store.rows
+            result = aggregate_columns(store, col_types, GROUPING_SETS)
+        elif args.incremental or args.add:
+            data.close()
+            result, stage.rows = aggregate_incremental(filepath, args.add, col_types, GROUPING_SETS)
+        elif args.workers > 1:
+            data.close()
+            result = aggregate_parallel(filepath, col_types, GROUPING_SETS, args.workers)
+        else:
+            data.close()
+            result = new_aggregate(col_types, GROUPING_SETS)
+            result.update_values(stage.count(iter_projected_rows(filepath, result.fields)))
+
+    with timer.stage("overall summary"):
+        print_summary(report, "Overall Summary", result.overall_stats())
+    with timer.stage("group by page_id"):
+        print_summary(report, "Grouped by page_id", result.stats(["page_id"]))
+    with timer.stage("group by page_id, bylines, currency"):
+        print_summary(report, "Grouped by page_id, bylines, and currency", result.stats(["page_id", "bylines", "currency"]))
+
+    report.end_body()
     end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
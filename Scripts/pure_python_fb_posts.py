@@ -1,31 +1,41 @@
+import argparse
 import csv
-import math
-from collections import defaultdict, Counter
+from functools import partial
 import sys
 import time
 
+from accumulators import GroupedAccumulator, SummaryAccumulator
+from column_schema import cached_schema, columns_of_kind, parse_signed
+from column_store import cached_store
+from csv_projection import iter_projected
+from incremental import STATE_SUFFIX, update_aggregate
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cache_paths
+
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/pure_python_output_fb_posts.txt"
 NUMERIC_COLS = [
     'Total Interactions', 'Likes', 'Comments', 'Shares',
     'Love', 'Wow', 'Haha', 'Sad', 'Angry'
 ]
 
-class Tee:
-    def __init__(self, *streams):
-        self.streams = streams
+GROUPING_SETS = [(), ("Facebook_Id",), ("Facebook_Id", "Page Category")]
 
-    def write(self, message):
-        for s in self.streams:
-            s.write(message)
+# Near-unique columns that only get a HyperLogLog distinct count with --approx-distinct
+HIGH_CARDINALITY_COLS = ['post_id', 'Post Created', 'Post Created Time', 'illuminating_scored_message']
 
-    def flush(self):
-        for s in self.streams:
-            s.flush()
+# Rows of an added export with an already counted id are skipped
+ID_COL = "post_id"
 
-def load_csv(filepath):
+# Bump when the cleaning changes so the cached column store and aggregation state are rebuilt
+CACHE_VERSION = 2
+
+def iter_csv(filepath):
     with open(filepath, mode="r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+        yield from csv.DictReader(f)
+
+def load_csv(filepath):
+    return list(iter_csv(filepath))
 
 def try_parse_float(val):
     try:
@@ -33,67 +43,114 @@ def try_parse_float(val):
     except:
         return None
 
-def identify_types(rows):
-    types = {}
-    for col in rows[0]:
-        types[col] = "numeric" if col in NUMERIC_COLS else "categorical"
-    return types
+def numeric_columns(schema):
+    # The declared columns, then any other column the sampled schema (column_schema) found numeric
+    return NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS)
+
+def signed_parsers(numeric):
+    # Columns only the schema found numeric keep their sign (column_schema.parse_signed); try_parse_float drops it
+    return dict.fromkeys([col for col in numeric if col not in NUMERIC_COLS], parse_signed)
+
+def identify_types(columns, schema):
+    numeric = numeric_columns(schema)
+    return {col: "numeric" if col in numeric else "categorical" for col in columns}
+
+def new_summary(types):
+    numeric = [col for col, typ in types.items() if typ == "numeric"]
+    return SummaryAccumulator(types, try_parse_float, parsers=signed_parsers(numeric))
 
 def compute_stats(rows, types):
-    stats = {}
-    for col in types:
-        values = [row[col].strip() for row in rows if row.get(col, "").strip() not in ("", "-", "None", "nan")]
-        if types[col] == "numeric":
-            nums = [try_parse_float(v) for v in values if try_parse_float(v) is not None]
-            if not nums:
-                stats[col] = {"count": 0}
-                continue
-            count = len(nums)
-            mean = sum(nums) / count
-            std_dev = math.sqrt(sum((x - mean) ** 2 for x in nums) / count)
-            stats[col] = {
-                "count": count,
-                "mean": round(mean, 2),
-                "min": min(nums),
-                "max": max(nums),
-                "std_dev": round(std_dev, 2)
-            }
-        else:
-            freq = Counter(values)
-            most_common = freq.most_common(1)[0] if freq else ("N/A", 0)
-            stats[col] = {
-                "count": len(values),
-                "unique_values": len(freq),
-                "most_common_value": most_common[0],
-                "most_common_count": most_common[1]
-            }
-    return stats
+    return new_summary(types).update(rows).stats()
+
+def new_aggregate(types, grouping_sets):
+    return GroupedAccumulator(partial(new_summary, types), grouping_sets)
+
+def aggregate(rows, types, grouping_sets):
+    return new_aggregate(types, grouping_sets).update(rows)
+
+def load_columns(filepath, schema):
+    # The CSV converted once into a memory-mapped column store
+    parse_number = SummaryAccumulator({}, try_parse_float).parse_number
+    numeric = numeric_columns(schema)
+    parsers = dict.fromkeys(signed_parsers(numeric), SummaryAccumulator({}, parse_signed).parse_number)
+    return cached_store(filepath, "pure_python_fb_posts", [CACHE_VERSION, numeric], lambda: iter_csv(filepath),
+                        numeric, parse_number, parsers=parsers)
+
+def aggregate_columns(store, types, grouping_sets):
+    return new_aggregate(types, grouping_sets).update_columns(store)
+
+def aggregate_incremental(filepath, added, types, grouping_sets):
+    # Resumes from the saved state and only reads rows past each file's watermark
+    state_path = cache_paths(filepath, "pure_python_fb_posts", STATE_SUFFIX)[0]
+    return update_aggregate(state_path, [filepath] + added, [CACHE_VERSION, types],
+                            partial(new_aggregate, types, grouping_sets), id_col=ID_COL)
 
 def group_by_stats(rows, types, keys):
-    grouped = defaultdict(list)
-    for row in rows:
-        key = tuple(row.get(k, "").strip() for k in keys)
-        if all(k not in ("", "-", "None", "nan") for k in key):
-            grouped[key].append(row)
-    return {k: compute_stats(v, types) for k, v in grouped.items()}
-
-def print_summary(title, summary):
-    print(f"\n--- {title} ---")
-    for col, val in summary.items():
-        print(f"{col}: {val}")
+    return aggregate(rows, types, [keys]).stats(keys)
+
+def print_summary(report, title, summary):
+    report.section(title)
+    report.add(summary, lambda: "".join(f"{col}: {val}\n" for col, val in summary.items()))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--columns", action="store_true",
+                        help="aggregate over a column store of the CSV, converted on the first run")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep the aggregation state in Datasets/cache/ and only read rows added since the last run")
+    parser.add_argument("--add", nargs="+", default=[], metavar="CSV",
+                        help="further export files to merge into the state; rows whose post_id was counted are skipped")
+    parser.add_argument("--approx-distinct", action="store_true",
+                        help="HyperLogLog distinct counts (no frequency maps) for " + ", ".join(HIGH_CARDINALITY_COLS))
+    parser.add_argument("--heavy-hitters", action="store_true",
+                        help="fixed-memory heavy-hitter sketches instead of full frequency maps for the categorical columns")
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    if (args.incremental or args.add) and args.columns:
+        parser.error("--incremental / --add cannot be combined with --columns")
+    timer = StageTimer.from_args(args)
+
     start_time = time.perf_counter()
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE))
+    sys.stdout = report
 
     filepath = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_posts_president_scored_anon.csv"
-    data = load_csv(filepath)
-    col_types = identify_types(data)
+    schema = cached_schema(filepath)
+    data = iter_csv(filepath)
+    first_row = next(data)
+    col_types = identify_types(first_row, schema)
+    if args.approx_distinct:
+        col_types.update((col, "distinct") for col in HIGH_CARDINALITY_COLS if col in col_types)
+    if args.heavy_hitters:
+        col_types.update((col, "heavy") for col, typ in col_types.items() if typ == "categorical")
+
+    # Overall and both groupings are aggregated in one scan of the file
+    with timer.stage("scan + aggregate") as stage:
+        if args.columns:
+            data.close()
+            with timer.stage("load columns"):
+                store = load_columns(filepath, schema)
+            stage.rows = store.rows
+            result = aggregate_columns(store, col_types, GROUPING_SETS)
+        elif args.incremental or args.add:
+            data.close()
+            result, stage.rows = aggregate_incremental(filepath, args.add, col_types, GROUPING_SETS)
+        else:
+            data.close()
+            result = new_aggregate(col_types, GROUPING_SETS)
+            result.update_values(stage.count(iter_projected(filepath, result.fields)))
 
-    print_summary("Overall Summary", compute_stats(data, col_types))
-    print_summary("Grouped by Facebook_Id", group_by_stats(data, col_types, ["Facebook_Id"]))
-    print_summary("Grouped by Facebook_Id and Page Category", group_by_stats(data, col_types, ["Facebook_Id", "Page Category"]))
+    with timer.stage("overall summary"):
+        print_summary(report, "Overall Summary", result.overall_stats())
+    with timer.stage("group by Facebook_Id"):
+        print_summary(report, "Grouped by Facebook_Id", result.stats(["Facebook_Id"]))
+    with timer.stage("group by Facebook_Id, Page Category"):
+        print_summary(report, "Grouped by Facebook_Id and Page Category", result.stats(["Facebook_Id", "Page Category"]))
 
+    report.end_body()
     end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
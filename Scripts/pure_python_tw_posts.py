@@ -1,10 +1,19 @@
+import argparse
 import csv
-import math
-from collections import defaultdict, Counter
+from functools import partial
 import sys
-import re
 import time
 
+from accumulators import (CategoricalAccumulator, DistinctAccumulator, GroupedAccumulator, HeavyHitterAccumulator,
+                          NumericAccumulator, add_codes, add_counted, add_distinct, add_numbers, hash64)
+from column_schema import cached_schema, columns_of_kind, parse_signed
+from column_store import cached_store
+from csv_projection import iter_projected
+from incremental import STATE_SUFFIX, update_aggregate
+from report_writer import ReportWriter, add_report_arguments
+from stage_timer import StageTimer, add_stage_arguments
+from table_cache import cache_paths
+
 INPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_tw_posts_president_scored_anon.csv"
 OUTPUT_FILE = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/pure_python_output_tw_posts.txt"
 
@@ -35,28 +44,29 @@ BINARY_COLS = [
     'fraud_illuminating', 'isRetweet', 'isQuote', 'isConversationControlled', 'z'
 ]
 
+NULL_VALUES = ("", "nan", "none")
+GROUP_NULL_VALUES = ("", "nan", "-")
+
+# Near-unique columns that only get a HyperLogLog distinct count with --approx-distinct
+HIGH_CARDINALITY_COLS = ['id', 'url', 'createdAt']
+
 GROUP_BY_1 = "source"
 GROUP_BY_2 = ("source", "lang")
 
+# Rows of an added export with an already counted id are skipped
+ID_COL = "id"
 
-class Tee:
-    def __init__(self, *streams):
-        self.streams = streams
-        self.cleaner = re.compile(r"[^\x00-\x7F]")
+# Bump when the cleaning changes so the cached column store and aggregation state are rebuilt
+CACHE_VERSION = 1
 
-    def write(self, msg):
-        clean_msg = self.cleaner.sub("", msg)
-        for s in self.streams:
-            s.write(clean_msg)
 
-    def flush(self):
-        for s in self.streams:
-            s.flush()
+def iter_csv(filepath):
+    with open(filepath, mode="r", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
 
 
 def load_csv(filepath):
-    with open(filepath, mode="r", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+    return list(iter_csv(filepath))
 
 
 def try_parse_float(val):
@@ -66,33 +76,60 @@ def try_parse_float(val):
         return None
 
 
-def summarize_column(colname, values):
+def identify_types(schema):
+    """{column: "numeric" | "categorical" | "binary"} in summary order.
+
+    The declared lists win for the columns they name (the first list naming a
+    column, as 'z' is summarized once); the sampled schema (column_schema) adds
+    any other column it found numeric or 0/1.
+    """
+    declared = NUMERIC_COLS + CATEGORICAL_COLS + BINARY_COLS
+    numeric = NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=declared)
+    binary = BINARY_COLS + columns_of_kind(schema, "binary", exclude=declared)
+    types = {}
+    for kind, cols in [("numeric", numeric), ("categorical", CATEGORICAL_COLS), ("binary", binary)]:
+        for col in cols:
+            types.setdefault(col, kind)
+    return types
+
+
+def signed_parsers(types):
+    # Columns only the schema found numeric keep their sign (column_schema.parse_signed); try_parse_float drops it
+    return {col: parse_signed for col, typ in types.items() if typ == "numeric" and col not in NUMERIC_COLS}
+
+
+def summarize_column(kind, freq, nums=None):
+    if isinstance(freq, (DistinctAccumulator, HeavyHitterAccumulator)):
+        return freq.stats()
+
     summary = {
-        'count': len(values),
-        'unique_values': len(set(values))
+        'count': freq.count,
+        'unique_values': len(freq.freq)
     }
 
-    if colname in NUMERIC_COLS:
-        nums = [try_parse_float(v) for v in values if try_parse_float(v) is not None]
-        if nums:
-            mean = sum(nums) / len(nums)
-            std = math.sqrt(sum((x - mean) ** 2 for x in nums) / len(nums)) if len(nums) > 1 else 0
+    if kind == "numeric":
+        if nums is not None and nums.count:
+            q1, median, q3 = nums.quartiles()
             summary.update({
-                'min': min(nums),
-                'max': max(nums),
-                'mean': round(mean, 2),
-                'std_dev': round(std, 2)
+                'min': nums.min,
+                '25%': q1,
+                '50%': median,
+                '75%': q3,
+                'max': nums.max,
+                'mean': round(nums.total / nums.count, 2),
+                'std_dev': round(nums.std_dev(), 2) if nums.count > 1 else 0
             })
+            if nums.quartile_error():
+                summary['quartile_error'] = nums.quartile_error()
 
-    elif colname in BINARY_COLS:
-        ones = values.count('1') + values.count('True') + values.count('true')
-        zeros = values.count('0') + values.count('False') + values.count('false')
+    elif kind == "binary":
+        ones = sum(freq.freq.get(v, 0) for v in ('1', 'True', 'true'))
+        zeros = sum(freq.freq.get(v, 0) for v in ('0', 'False', 'false'))
         summary.update({'1s': ones, '0s': zeros})
 
-    elif colname in CATEGORICAL_COLS:
-        counter = Counter(values)
-        if counter:
-            top_val, top_count = counter.most_common(1)[0]
+    else:
+        if freq.freq:
+            top_val, top_count = freq.most_common()
             summary.update({
                 'most_common_value': top_val,
                 'most_common_count': top_count
@@ -101,50 +138,202 @@ def summarize_column(colname, values):
     return summary
 
 
-def compute_overall_summary(data):
-    all_cols = NUMERIC_COLS + CATEGORICAL_COLS + BINARY_COLS
-    summary = {}
-    for col in all_cols:
-        col_values = [row.get(col, "").strip() for row in data if row.get(col) and row[col].strip().lower() not in ("", "nan", "none")]
-        if col_values:
-            summary[col] = summarize_column(col, col_values)
-    return summary
-
-
-def group_by_stats(rows, keys):
-    grouped = defaultdict(list)
-    for row in rows:
-        key = tuple(row.get(k, "").strip() for k in keys)
-        if all(k not in ("", "nan", "-", None) for k in key):
-            grouped[key].append(row)
+class TweetSummaryAccumulator:
+    """Single-pass column state: a frequency map per column plus running moments for numeric ones.
+
+    `types` comes from `identify_types`. Columns in `distinct_cols` keep a
+    HyperLogLog sketch instead of a frequency map, and those in `heavy_cols`
+    a fixed-size heavy-hitter sketch.
+    """
+
+    def __init__(self, types, distinct_cols=(), heavy_cols=()):
+        self.types = types
+        self.freqs = {}
+        for col in types:
+            if col in distinct_cols:
+                self.freqs[col] = DistinctAccumulator()
+            elif col in heavy_cols:
+                self.freqs[col] = HeavyHitterAccumulator()
+            else:
+                self.freqs[col] = CategoricalAccumulator()
+        self.nums = {col: NumericAccumulator() for col, typ in types.items() if typ == "numeric"}
+        self.columns = [(col, acc, self.nums.get(col), col in distinct_cols) for col, acc in self.freqs.items()]
+        self.fields = [col for col, *_ in self.columns]
+        parsers = signed_parsers(types)
+        self.parsers = [parsers.get(col, try_parse_float) for col in self.fields]
+
+    def prepare(self, row):
+        return self.prepare_values([row.get(col) for col in self.fields])
+
+    def prepare_values(self, values):
+        prepared = []
+        for (_, _, nums, distinct), parse, val in zip(self.columns, self.parsers, values):
+            if val:
+                val = val.strip()
+                if val.lower() in NULL_VALUES:
+                    val = None
+            else:
+                val = None
+            num = parse(val) if nums is not None and val is not None else None
+            if distinct and val is not None:
+                val = hash64(val)
+            prepared.append((val, num))
+        return prepared
+
+    def add_prepared(self, prepared):
+        for (_, freq, nums, distinct), (val, num) in zip(self.columns, prepared):
+            if val is None:
+                continue
+            if distinct:
+                freq.add_hash(val)
+            else:
+                freq.add(val)
+            if num is not None:
+                nums.add(num)
+
+    def add(self, row):
+        self.add_prepared(self.prepare(row))
+
+    def update(self, rows):
+        for row in rows:
+            self.add(row)
+        return self
+
+    @staticmethod
+    def parse_number(text, parse=try_parse_float):
+        # A stripped cell as `prepare` reads a numeric column: float, or None
+        return None if text.lower() in NULL_VALUES else parse(text)
+
+    def add_columns(self, store, group_ids, summaries):
+        # Column-at-a-time `add_prepared`, see accumulators.SummaryAccumulator.add_columns
+        for col, _, nums, distinct in self.columns:
+            codes, dictionary = store.codes(col)
+            values = [None if val.lower() in NULL_VALUES else val for val in dictionary]
+            if distinct:
+                hashes = [None if val is None else hash64(val) for val in values]
+                add_distinct([summary.freqs[col] for summary in summaries], codes, hashes, group_ids)
+            elif isinstance(self.freqs[col], HeavyHitterAccumulator):
+                add_counted([summary.freqs[col] for summary in summaries], codes, values, group_ids)
+            else:
+                add_codes([summary.freqs[col].freq for summary in summaries], codes, values, group_ids)
+            if nums is not None:
+                add_numbers([summary.nums[col] for summary in summaries], *store.numeric(col), group_ids)
+
+    def state(self):
+        return self.freqs, self.nums
+
+    def merge_state(self, state):
+        freqs, nums = state
+        for col, acc in freqs.items():
+            self.freqs[col].merge(acc)
+        for col, acc in nums.items():
+            self.nums[col].merge(acc)
+
+    def stats(self):
+        return {
+            col: summarize_column(self.types[col], freq, nums)
+            for col, freq, nums, _ in self.columns if freq.count
+        }
+
+
+def compute_overall_summary(data, types):
+    return TweetSummaryAccumulator(types).update(data).stats()
+
+
+def new_aggregate(types, grouping_sets, distinct_cols=(), heavy_cols=()):
+    summary = partial(TweetSummaryAccumulator, types, distinct_cols, heavy_cols)
+    return GroupedAccumulator(summary, grouping_sets, GROUP_NULL_VALUES)
+
+
+def aggregate(rows, types, grouping_sets, distinct_cols=(), heavy_cols=()):
+    return new_aggregate(types, grouping_sets, distinct_cols, heavy_cols).update(rows)
+
+
+def load_columns(filepath, types):
+    # The CSV converted once into a memory-mapped column store
+    numeric = [col for col, typ in types.items() if typ == "numeric"]
+    parsers = {col: partial(TweetSummaryAccumulator.parse_number, parse=parse)
+               for col, parse in signed_parsers(types).items()}
+    return cached_store(filepath, "pure_python_tw_posts", [CACHE_VERSION, numeric], lambda: iter_csv(filepath),
+                        numeric, TweetSummaryAccumulator.parse_number, text_cols=list(types), parsers=parsers)
+
+
+def aggregate_columns(store, types, grouping_sets, distinct_cols=(), heavy_cols=()):
+    return new_aggregate(types, grouping_sets, distinct_cols, heavy_cols).update_columns(store)
+
+
+def aggregate_incremental(filepath, added, types, grouping_sets, distinct_cols=(), heavy_cols=()):
+    # Resumes from the saved state and only reads rows past each file's watermark
+    state_path = cache_paths(filepath, "pure_python_tw_posts", STATE_SUFFIX)[0]
+    version = [CACHE_VERSION, types, list(distinct_cols), list(heavy_cols)]
+    return update_aggregate(state_path, [filepath] + added, version,
+                            partial(new_aggregate, types, grouping_sets, distinct_cols, heavy_cols), id_col=ID_COL)
+
+
+def group_by_stats(rows, types, keys):
+    return aggregate(rows, types, [keys]).stats(keys)
 
-    grouped_summaries = {}
-    for k, group_rows in grouped.items():
-        grouped_summaries[k] = compute_overall_summary(group_rows)
-    return grouped_summaries
 
-
-def print_summary(title, summary_dict):
-    print(f"\n--- {title} ---")
-    for col, stats in summary_dict.items():
-        print(f"{col}: {stats}")
+def print_summary(report, title, summary_dict):
+    report.section(title)
+    report.add(summary_dict, lambda: "".join(f"{col}: {stats}\n" for col, stats in summary_dict.items()))
 
 
 if __name__ == "__main__":
-    start_time = time.perf_counter()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--columns", action="store_true",
+                        help="aggregate over a column store of the CSV, converted on the first run")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep the aggregation state in Datasets/cache/ and only read rows added since the last run")
+    parser.add_argument("--add", nargs="+", default=[], metavar="CSV",
+                        help="further export files to merge into the state; rows whose id was counted are skipped")
+    parser.add_argument("--approx-distinct", action="store_true",
+                        help="HyperLogLog distinct counts (no frequency maps) for " + ", ".join(HIGH_CARDINALITY_COLS))
+    parser.add_argument("--heavy-hitters", action="store_true",
+                        help="fixed-memory heavy-hitter sketches instead of full frequency maps for the categorical columns")
+    add_report_arguments(parser, structured=True)
+    add_stage_arguments(parser)
+    args = parser.parse_args()
+    if (args.incremental or args.add) and args.columns:
+        parser.error("--incremental / --add cannot be combined with --columns")
+    timer = StageTimer.from_args(args)
 
-    sys.stdout = Tee(sys.__stdout__, open(OUTPUT_FILE, "w", encoding="utf-8"))
-
-    data = load_csv(INPUT_FILE)
-
-    overall = compute_overall_summary(data)
-    print_summary("Overall Summary", overall)
-
-    for key, group_stats in group_by_stats(data, [GROUP_BY_1]).items():
-        print_summary(f"Group: {GROUP_BY_1} = {key[0]}", group_stats)
-
-    for key, group_stats in group_by_stats(data, list(GROUP_BY_2)).items():
-        print_summary(f"Group: {GROUP_BY_2[0]} = {key[0]}, {GROUP_BY_2[1]} = {key[1]}", group_stats)
+    start_time = time.perf_counter()
 
+    report = timer.wrap(ReportWriter.from_args(args, OUTPUT_FILE, ascii_only=True))
+    sys.stdout = report
+
+    # Overall and both groupings are aggregated in one scan of the file
+    grouping_sets = [(), (GROUP_BY_1,), GROUP_BY_2]
+    distinct_cols = HIGH_CARDINALITY_COLS if args.approx_distinct else []
+    heavy_cols = [col for col in CATEGORICAL_COLS if col not in distinct_cols] if args.heavy_hitters else []
+    types = identify_types(cached_schema(INPUT_FILE))
+    with timer.stage("scan + aggregate") as stage:
+        if args.columns:
+            with timer.stage("load columns"):
+                store = load_columns(INPUT_FILE, types)
+            stage.rows = store.rows
+            result = aggregate_columns(store, types, grouping_sets, distinct_cols, heavy_cols)
+        elif args.incremental or args.add:
+            result, stage.rows = aggregate_incremental(INPUT_FILE, args.add, types, grouping_sets, distinct_cols,
+                                                       heavy_cols)
+        else:
+            result = new_aggregate(types, grouping_sets, distinct_cols, heavy_cols)
+            result.update_values(stage.count(iter_projected(INPUT_FILE, result.fields)))
+
+    with timer.stage("overall summary"):
+        print_summary(report, "Overall Summary", result.overall_stats())
+
+    with timer.stage(f"group by {GROUP_BY_1}"):
+        for key, group_stats in result.stats([GROUP_BY_1]).items():
+            print_summary(report, f"Group: {GROUP_BY_1} = {key[0]}", group_stats)
+
+    with timer.stage(f"group by {GROUP_BY_2[0]}, {GROUP_BY_2[1]}"):
+        for key, group_stats in result.stats(GROUP_BY_2).items():
+            print_summary(report, f"Group: {GROUP_BY_2[0]} = {key[0]}, {GROUP_BY_2[1]} = {key[1]}", group_stats)
+
+    report.end_body()
     end_time = time.perf_counter()
     print(f"\nTotal Execution Time: {end_time - start_time:.2f} seconds")
+    timer.report()
+    report.close()
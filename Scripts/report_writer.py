@@ -0,0 +1,201 @@
+import json
+import os
+import sys
+import time
+
+# Buffered report output shared by the summary scripts, in place of a Tee per
+# script. Printed text is collected in memory and written to the report in
+# large blocks; the ASCII clean-up some reports apply runs once per block
+# rather than on every print fragment, and the console echo is optional and
+# throttled. Scripts whose summaries are dicts also hand them over as records
+# (`section()` + `add()`), so the same results can be written as JSON Lines or
+# Parquet instead of text; free text (timings) then only goes to the console.
+
+FORMATS = ["text", "jsonl", "parquet"]
+ECHO_MODES = ["full", "progress", "none"]
+SUFFIXES = {"text": ".txt", "jsonl": ".jsonl", "parquet": ".parquet"}
+
+BUFFER_CHARS = 1 << 20
+PARQUET_ROWS = 1 << 16
+PROGRESS_INTERVAL = 1.0
+
+
+def _json_default(value):
+    # numpy / pandas scalars
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _flatten(stats, prefix=""):
+    # Nested stats as (field path, value) pairs for the long Parquet layout
+    if not isinstance(stats, dict):
+        yield prefix, stats
+        return
+    for key, value in stats.items():
+        yield from _flatten(value, f"{prefix}.{key}" if prefix else str(key))
+
+
+class ReportWriter:
+    """File-like report sink; also the record API for structured formats.
+
+    `path` is the text report; the JSON Lines / Parquet report takes the same
+    name with its own suffix. With `ascii_only`, non-ASCII characters are
+    dropped from text output. `echo` is "full" (console gets everything, in
+    blocks), "progress" (one throttled status line on stderr) or "none";
+    after `end_body()` the rest, i.e. the timings, is echoed in every mode.
+    """
+
+    def __init__(self, path, format="text", echo="full", ascii_only=False, buffer_chars=BUFFER_CHARS):
+        self.format = format
+        self.echo = echo
+        self.ascii_only = ascii_only
+        self.buffer_chars = buffer_chars
+        self.path = os.path.splitext(path)[0] + SUFFIXES[format] if format != "text" else path
+        self.file = open(self.path, "w" if format != "parquet" else "wb",
+                         encoding="utf-8" if format != "parquet" else None)
+        self.parts = []
+        self.size = 0
+        self.written = 0
+        self.section_title = None
+        self.sections = 0
+        self.records = []
+        self.parquet = None
+        self.last_progress = 0.0
+        self.body = True
+
+    @classmethod
+    def from_args(cls, args, path, ascii_only=False):
+        return cls(path, getattr(args, "format", "text"), args.echo, ascii_only)
+
+    # ---- TEXT ----
+    def write(self, text):
+        if self.format == "text":
+            self._buffer(text)
+        if self.echo == "full" or not self.body:
+            self._echo(text)
+        return len(text)
+
+    def _buffer(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_chars:
+            self._flush_text()
+
+    def _flush_text(self):
+        if not self.parts:
+            return
+        block = "".join(self.parts)
+        self.parts.clear()
+        self.size = 0
+        if self.ascii_only:
+            block = block.encode("ascii", "ignore").decode("ascii")
+        self.file.write(block)
+        self.written += len(block)
+        self._progress()
+
+    def _echo(self, text):
+        if self.ascii_only:
+            text = text.encode("ascii", "ignore").decode("ascii")
+        sys.__stdout__.write(text)
+
+    def _progress(self, final=False):
+        if self.echo != "progress":
+            return
+        now = time.perf_counter()
+        if final or now - self.last_progress >= PROGRESS_INTERVAL:
+            self.last_progress = now
+            written = self.file.tell() if self.format == "parquet" else self.written
+            sys.__stderr__.write(f"\r{os.path.basename(self.path)}: {self.sections:,} sections, "
+                                 f"{written / 2**20:,.1f} MB" + ("\n" if final else ""))
+            sys.__stderr__.flush()
+
+    # ---- RECORDS ----
+    def section(self, title):
+        """Start a titled section (a "--- title ---" header in text)."""
+        self.section_title = title
+        self.sections += 1
+        if self.format == "text":
+            self.write(f"\n--- {title} ---\n")
+        elif self.echo == "full":
+            self._echo(f"\n--- {title} ---\n")
+
+    def add(self, records, render):
+        """Add {name: stats} records to the current section.
+
+        Text reports get `render()` instead, so formatting only happens for text.
+        """
+        if self.format == "text":
+            self.write(render())
+            return
+        if self.echo == "full":
+            self._echo(render())
+        if self.format == "jsonl":
+            lines = [json.dumps({"section": self.section_title, "name": str(name), "stats": stats},
+                                default=_json_default, ensure_ascii=self.ascii_only) + "\n"
+                     for name, stats in records.items()]
+            self._buffer("".join(lines))
+        else:
+            for name, stats in records.items():
+                for field, value in _flatten(stats):
+                    self.records.append((self.section_title, str(name), field, value))
+            if len(self.records) >= PARQUET_ROWS:
+                self._flush_parquet()
+
+    def _flush_parquet(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("--format parquet needs pyarrow (pip install pyarrow)")
+        if not self.records:
+            return
+        sections, names, fields, values = zip(*self.records)
+        self.records.clear()
+        numbers = [float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None for v in values]
+        table = pa.table({
+            "section": pa.array(sections, pa.string()),
+            "name": pa.array(names, pa.string()),
+            "field": pa.array(fields, pa.string()),
+            "value": pa.array([None if v is None else str(v) for v in values], pa.string()),
+            "number": pa.array(numbers, pa.float64()),
+        })
+        if self.parquet is None:
+            self.parquet = pq.ParquetWriter(self.file, table.schema)
+        self.parquet.write_table(table)
+        self._progress()
+
+    # ---- LIFECYCLE ----
+    def end_body(self):
+        """Everything written from here on (the timing footer) is echoed in every mode."""
+        if self.format == "parquet":
+            self._flush_parquet()
+        else:
+            self._flush_text()
+        self.body = False
+        self._progress(final=True)
+
+    def flush(self):
+        if self.file.closed or self.format == "parquet":
+            return  # closed (interpreter exit), or Parquet row groups are only cut at PARQUET_ROWS
+        self._flush_text()
+        self.file.flush()
+        if self.echo == "full" or not self.body:
+            sys.__stdout__.flush()
+
+    def close(self):
+        if self.format == "parquet":
+            self._flush_parquet()
+            if self.parquet is not None:
+                self.parquet.close()
+        else:
+            self._flush_text()
+        self.file.close()
+        sys.__stdout__.flush()
+
+
+def add_report_arguments(parser, structured=False):
+    group = parser.add_argument_group("report output")
+    if structured:
+        group.add_argument("--format", choices=FORMATS, default="text",
+                           help="report as text, or as JSON Lines / Parquet records next to the text report's path")
+    group.add_argument("--echo", choices=ECHO_MODES, default="full",
+                       help="console output: the whole report, a throttled progress line, or nothing")
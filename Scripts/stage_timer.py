@@ -0,0 +1,160 @@
+import cProfile
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from memory_usage import peak_rss_mb
+
+# Per-stage instrumentation for the summary scripts. Stages (load, preprocess,
+# overall summary, one per grouping set, ...) are wrapped in `timer.stage(name)`;
+# each records its wall time, the rows it processed and the peak RSS when it
+# ended, plus the part of its time spent writing the report when stdout is
+# wrapped with `timer.wrap`. Opt-in extras: tracemalloc allocation deltas, and
+# a cProfile dump of one named stage. Stages may nest; inner stages are shown
+# indented under their parent.
+
+
+class Stage:
+    def __init__(self, name, rows, depth):
+        self.name = name
+        self.rows = rows
+        self.depth = depth
+        self.elapsed = None
+        self.write = 0.0
+        self.peak_rss_mb = None
+        self.alloc_mb = None
+        self.alloc_peak_mb = None
+
+    def count(self, rows):
+        """Pass `rows` through, counting them into this stage (for streamed input)."""
+        self.rows = self.rows or 0
+        for row in rows:
+            self.rows += 1
+            yield row
+
+
+class TimedStream:
+    """Stream proxy that charges the time spent in write/flush to the running stage.
+
+    Other methods of the stream (e.g. ReportWriter.section/add) are passed
+    through and timed the same way.
+    """
+
+    def __init__(self, stream, timer):
+        self.stream = stream
+        self.timer = timer
+
+    def write(self, msg):
+        start = time.perf_counter()
+        result = self.stream.write(msg)
+        self.timer.write_time += time.perf_counter() - start
+        return result
+
+    def flush(self):
+        start = time.perf_counter()
+        self.stream.flush()
+        self.timer.write_time += time.perf_counter() - start
+
+    def __getattr__(self, name):
+        attr = getattr(self.stream, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.timer.write_time += time.perf_counter() - start
+        return timed
+
+
+class StageTimer:
+    def __init__(self, report=False, trace_memory=False, profile=None):
+        self.report_enabled = report or trace_memory
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.stages = []
+        self.depth = 0
+        self.write_time = 0.0
+        self.start = time.perf_counter()
+        if trace_memory:
+            tracemalloc.start()
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(report=args.stages, trace_memory=args.trace_memory, profile=args.profile_stage)
+
+    def wrap(self, stream):
+        return TimedStream(stream, self)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = Stage(name, rows, self.depth)
+        self.stages.append(record)
+        self.depth += 1
+        write_before = self.write_time
+        if self.trace_memory:
+            if record.depth == 0:
+                tracemalloc.reset_peak()  # a nested stage's peak is an upper bound
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if self.profile == name else None
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            record.elapsed = time.perf_counter() - start
+            record.write = self.write_time - write_before
+            record.peak_rss_mb = peak_rss_mb()
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record.alloc_mb = (current - traced_before) / 2**20
+                record.alloc_peak_mb = (peak - traced_before) / 2**20
+            self.depth -= 1
+            if profiler:
+                self._dump_profile(name, profiler)
+
+    def _dump_profile(self, name, profiler):
+        path = "stage_" + "".join(c if c.isalnum() else "_" for c in name) + ".prof"
+        profiler.dump_stats(path)
+        print(f"\ncProfile of stage '{name}' (saved to {path}):", file=sys.__stderr__)
+        pstats.Stats(profiler, stream=sys.__stderr__).sort_stats("cumulative").print_stats(20)
+
+    def report(self):
+        """Print the stage breakdown table (when enabled)."""
+        if not self.report_enabled:
+            return
+        total = time.perf_counter() - self.start
+        header = f"{'stage':<40}{'seconds':>9}{'%':>6}{'write s':>9}{'rows':>12}{'rows/s':>12}{'peak RSS MB':>13}"
+        if self.trace_memory:
+            header += f"{'alloc MB':>10}{'alloc peak MB':>15}"
+        print("\nStage breakdown:")
+        print(header)
+        for s in self.stages:
+            if s.elapsed is None:
+                continue
+            name = "  " * s.depth + s.name
+            rows = f"{s.rows:>12,}" if s.rows is not None else f"{'-':>12}"
+            rate = f"{s.rows / s.elapsed:>12,.0f}" if s.rows and s.elapsed else f"{'-':>12}"
+            line = (f"{name:<40}{s.elapsed:>9.2f}{100 * s.elapsed / total:>6.1f}{s.write:>9.2f}"
+                    f"{rows}{rate}{s.peak_rss_mb:>13.1f}")
+            if self.trace_memory:
+                line += f"{s.alloc_mb:>10.1f}{s.alloc_peak_mb:>15.1f}"
+            print(line)
+        print(f"{'total':<40}{total:>9.2f}{100.0:>6.1f}{self.write_time:>9.2f}")
+
+
+def add_stage_arguments(parser):
+    group = parser.add_argument_group("stage profiling")
+    group.add_argument("--stages", action="store_true",
+                       help="print a per-stage breakdown of time, rows/s and memory at the end")
+    group.add_argument("--trace-memory", action="store_true",
+                       help="add tracemalloc allocation deltas to the breakdown (slows the run down)")
+    group.add_argument("--profile-stage", metavar="STAGE",
+                       help="run cProfile over the named stage and dump it to stage_<STAGE>.prof")
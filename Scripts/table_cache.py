@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import shutil
+
+# Preprocessed tables cached in a cache/ folder next to the raw CSV: Parquet
+# files for pandas and Polars, column_store directories for pure Python.
+# An entry is keyed on the source file's size, mtime and SHA-256 plus the
+# caller's name and preprocessing version; while those match, the cleaned
+# table is read back instead of re-reading and re-cleaning the CSV. A new
+# size or version is a miss straight away and rebuilds the entry in place.
+# The content hash is only read again when the mtime moved but the size did
+# not, so a touched but unchanged file is still a hit. The key is kept next to
+# the entry in <csv name>.<name>.meta.json.
+
+CACHE_DIR = "cache"
+META_SUFFIX = ".meta.json"
+HASH_CHUNK = 1 << 20
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_paths(source, name, suffix=".parquet", folder=None):
+    """(table, metadata) paths of the `name` entry for `source`, in `folder` or the cache/ folder next to it."""
+    folder = folder or os.path.join(os.path.dirname(os.path.abspath(source)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    base = os.path.join(folder, f"{stem}.{name}")
+    return base + suffix, base + META_SUFFIX
+
+
+def _read_meta(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _fingerprint(source, version, stored):
+    # (key, hit): the source file's key and whether the stored entry still matches it
+    stat = os.stat(source)
+    key = {"version": version, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if not (stored and stored.get("version") == version and stored.get("size") == stat.st_size):
+        return key, False
+    if stored.get("mtime_ns") == stat.st_mtime_ns:
+        return stored, True
+    key["sha256"] = file_hash(source)
+    return key, key["sha256"] == stored.get("sha256")
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def cached_table(source, name, version, build, write, read, suffix=".parquet", folder=None):
+    """read(table path) of the cached `name` entry for `source`.
+
+    On a miss `build()` produces the preprocessed table and `write(table, path)`
+    stores it first; later runs with the same source and `version` only read.
+    Bump `version` whenever the preprocessing behind `name` changes. The entry
+    may be a file or a directory, kept in `folder` instead of cache/ when given.
+    """
+    table, meta = cache_paths(source, name, suffix, folder)
+    stored = _read_meta(meta) if os.path.exists(table) else None
+    key, hit = _fingerprint(source, version, stored)
+    if not hit:
+        os.makedirs(os.path.dirname(table), exist_ok=True)
+        partial = table + ".tmp"
+        _remove(partial)
+        write(build(), partial)
+        if os.path.isdir(table):
+            # os.replace only swaps files atomically; a directory entry is removed first
+            shutil.rmtree(table)
+        os.replace(partial, table)
+        if "sha256" not in key:
+            # Read once per rebuild, to confirm a later hit on a touched file
+            key["sha256"] = file_hash(source)
+    if key != stored:
+        with open(meta, "w", encoding="utf-8") as f:
+            json.dump(key, f, indent=2)
+    return read(table)
+
+
+def write_pandas(df, path):
+    df.to_parquet(path, index=False)
+
+
+def read_pandas(path):
+    # pandas restores string[pyarrow] columns as string[python]; map them back
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    text = pd.StringDtype("pyarrow")
+    return pq.read_table(path).to_pandas(types_mapper={pa.string(): text, pa.large_string(): text}.get)
+
+
+def cached_pandas(source, name, version, build):
+    return cached_table(source, name, version, build, write_pandas, read_pandas)
+
+
+def cached_polars(source, name, version, build, lazy=False):
+    """Polars entry; with `lazy`, `build()` returns a LazyFrame that is streamed
+    to Parquet on a miss, and the entry is scanned rather than read."""
+    import polars as pl
+    if lazy:
+        return cached_table(source, name, version, build, lambda lf, path: lf.sink_parquet(path), pl.scan_parquet)
+    return cached_table(source, name, version, build, lambda df, path: df.write_parquet(path), pl.read_parquet)
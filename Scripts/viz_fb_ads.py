@@ -1,10 +1,18 @@
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from pandas.api.types import is_numeric_dtype
 import os
+import time
+
+from column_schema import cached_schema, columns_of_kind
+from plot_render import Plot, add_render_arguments, print_render_times, render_all
+from plot_summary import cached_summaries, column_summary
+from table_cache import cached_pandas
 
 FILE_PATH = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_ads_president_scored_anon.csv"
 OUTPUT_DIR = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/plots_fb_ads"
+# Bump when the cleaning changes so the cached cleaned table is rebuilt
+CACHE_VERSION = 2
 
 NUMERIC_COLS = [
     'estimated_audience_size',
@@ -12,45 +20,70 @@ NUMERIC_COLS = [
     'estimated_spend'
 ]
 
-def clean(df):
+def plotted_columns(schema):
+    # Declared numeric columns plus any other the sampled schema (column_schema) found numeric, and its 0/1 flags
+    numeric = NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS)
+    return numeric, columns_of_kind(schema, "binary", exclude=numeric)
+
+def clean(df, signed=()):
+    # `signed` columns (numeric by the schema alone) keep their "-" and null the cells that do not parse,
+    # like column_schema.parse_signed
     for col in df.columns:
         if df[col].dtype == object:
-            df[col] = df[col].str.replace(",", "").str.replace("-", "").str.strip()
+            df[col] = df[col].str.replace(",", "")
+            if col not in signed:
+                df[col] = df[col].str.replace("-", "")
+            df[col] = df[col].str.strip()
         try:
-            df[col] = pd.to_numeric(df[col])
+            df[col] = pd.to_numeric(df[col], errors="coerce" if col in signed else "raise")
         except (ValueError, TypeError):
             pass
     return df
 
-def plot_numeric(df):
-    for col in NUMERIC_COLS:
-        if col in df.columns and df[col].dropna().notna().any():
-            sns.histplot(df[col].dropna(), kde=True)
-            plt.title(f"Distribution of {col}")
-            plt.savefig(f"{OUTPUT_DIR}/hist_{col}.png")
-            plt.clf()
-
-            sns.boxplot(x=df[col].dropna())
-            plt.title(f"Boxplot of {col}")
-            plt.savefig(f"{OUTPUT_DIR}/box_{col}.png")
-            plt.clf()
-
-def plot_top_binary_flags(df):
-    binary_flags = [col for col in df.columns if df[col].dropna().isin([0, 1]).all() and col not in NUMERIC_COLS]
-    if binary_flags:
-        flag_sums = df[binary_flags].sum().sort_values(ascending=False).head(10)
-        sns.barplot(x=flag_sums.values, y=flag_sums.index)
-        plt.title("Top 10 Binary Flags (Sum=1's)")
-        plt.xlabel("Count of 1's")
-        plt.savefig(f"{OUTPUT_DIR}/binary_flag_summary.png")
-        plt.clf()
+def read_table(columns, signed=()):
+    # Only the plotted columns are read and cleaned
+    return clean(pd.read_csv(FILE_PATH, usecols=lambda col: col in columns), signed)
+
+def summarize(df, numeric, flags):
+    # Everything the plots are drawn from: bins and box statistics per numeric column, top flag counts
+    numeric = {col: column_summary(df[col].dropna()) for col in numeric
+               if col in df.columns and is_numeric_dtype(df[col]) and df[col].notna().any()}
+    binary_flags = [col for col in flags if col in df.columns and is_numeric_dtype(df[col])]
+    flag_sums = df[binary_flags].sum().sort_values(ascending=False).head(10) if binary_flags else pd.Series(dtype=float)
+    return {"numeric": numeric, "flags": [[str(col), int(total)] for col, total in flag_sums.items()]}
+
+def plot_numeric(summaries):
+    plots = []
+    for col, summary in summaries["numeric"].items():
+        if summary:
+            plots.append(Plot(f"{OUTPUT_DIR}/hist_{col}.png", "hist", summary["hist"], f"Distribution of {col}",
+                              xlabel=col, tight_layout=False))
+            plots.append(Plot(f"{OUTPUT_DIR}/box_{col}.png", "box", summary["box"], f"Boxplot of {col}",
+                              xlabel=col, tight_layout=False))
+    return plots
+
+def plot_top_binary_flags(summaries):
+    if not summaries["flags"]:
+        return []
+    return [Plot(f"{OUTPUT_DIR}/binary_flag_summary.png", "bar", summaries["flags"], "Top 10 Binary Flags (Sum=1's)",
+                 xlabel="Count of 1's", tight_layout=False)]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    df = pd.read_csv(FILE_PATH)
-    df = clean(df)
+    numeric, flags = plotted_columns(cached_schema(FILE_PATH))
+    signed = numeric[len(NUMERIC_COLS):]
+    version = [CACHE_VERSION, numeric, flags]
+    # The cleaned table is only loaded when the cached summaries are missing or stale
+    summaries = cached_summaries(FILE_PATH, "viz_fb_ads", version, lambda: summarize(
+        cached_pandas(FILE_PATH, "viz_fb_ads", version, lambda: read_table(numeric + flags, signed)), numeric, flags),
+        os.path.dirname(OUTPUT_DIR))
 
-    plot_numeric(df)
-    plot_top_binary_flags(df)
+    start = time.perf_counter()
+    times = render_all(plot_numeric(summaries) + plot_top_binary_flags(summaries), args.workers)
+    print_render_times(times, time.perf_counter() - start)
 
     print(f"✅ Visualizations saved to ./{OUTPUT_DIR}/")
\ No newline at end of file
@@ -1,7 +1,13 @@
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from pandas.api.types import is_numeric_dtype
 import os
+import time
+
+from column_schema import cached_schema, columns_of_kind
+from plot_render import Plot, add_render_arguments, print_render_times, render_all
+from plot_summary import cached_summaries, column_summary, top_counts
+from table_cache import cached_pandas
 
 # Constants
 FILE_PATH = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_fb_posts_president_scored_anon.csv"
@@ -11,56 +17,73 @@ NUMERIC_COLS = [
 ]
 CATEGORICAL_COLS = ['Page Category', 'Type']
 OUTPUT_DIR = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/plots_fb_posts"
+# Bump when the cleaning changes so the cached cleaned table is rebuilt
+CACHE_VERSION = 2
+
+def numeric_columns(schema):
+    # Declared numeric columns plus any other the sampled schema (column_schema) found numeric
+    return NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS)
 
-def clean_dataframe(df):
+def clean_dataframe(df, numeric):
     for col in df.columns:
         if df[col].dtype == object:
             df[col] = df[col].str.replace(",", "", regex=False)
-            df[col] = df[col].str.replace("-", "", regex=False)
+            if col in NUMERIC_COLS or col not in numeric:
+                df[col] = df[col].str.replace("-", "", regex=False)
             df[col] = df[col].str.strip()
-        df[col] = pd.to_numeric(df[col], errors="ignore")
+        if col in NUMERIC_COLS:
+            df[col] = pd.to_numeric(df[col], errors="ignore")
+        elif col in numeric:
+            # Numeric by the schema alone: sign kept, cells that do not parse are nulls (column_schema.parse_signed)
+            df[col] = pd.to_numeric(df[col], errors="coerce")
     return df
 
-def create_numeric_visuals(df):
-    for col in NUMERIC_COLS:
-        if col in df.columns:
-            plt.figure(figsize=(6, 4))
-            sns.histplot(df[col].dropna(), kde=True, bins=30)
-            plt.title(f"Distribution of {col}")
-            plt.xlabel(col)
-            plt.ylabel("Frequency")
-            plt.tight_layout()
-            plt.savefig(f"{OUTPUT_DIR}/hist_{col}.png")
-            plt.close()
+def read_table(numeric):
+    # Only the plotted columns are read; only the numeric ones are converted
+    columns = numeric + CATEGORICAL_COLS
+    return clean_dataframe(pd.read_csv(FILE_PATH, usecols=lambda col: col in columns), numeric)
 
-            plt.figure(figsize=(6, 4))
-            sns.boxplot(x=df[col].dropna())
-            plt.title(f"Boxplot of {col}")
-            plt.tight_layout()
-            plt.savefig(f"{OUTPUT_DIR}/box_{col}.png")
-            plt.close()
+def summarize(df, numeric):
+    # Everything the plots are drawn from: bins and box statistics per numeric column, top categories
+    return {
+        "numeric": {col: column_summary(df[col].dropna()) for col in numeric
+                    if col in df.columns and is_numeric_dtype(df[col])},
+        "categorical": {col: top_counts(df[col]) for col in CATEGORICAL_COLS if col in df.columns}
+    }
 
-def create_categorical_visuals(df):
-    for col in CATEGORICAL_COLS:
-        if col in df.columns:
-            plt.figure(figsize=(8, 4))
-            sns.countplot(data=df, x=col, order=df[col].value_counts().iloc[:10].index)
-            plt.title(f"Top 10 Most Frequent in {col}")
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig(f"{OUTPUT_DIR}/bar_{col}.png")
-            plt.close()
+def create_numeric_visuals(summaries):
+    plots = []
+    for col, summary in summaries["numeric"].items():
+        if summary:
+            plots.append(Plot(f"{OUTPUT_DIR}/hist_{col}.png", "hist", summary["hist"], f"Distribution of {col}",
+                              figsize=(6, 4), xlabel=col, ylabel="Frequency"))
+            plots.append(Plot(f"{OUTPUT_DIR}/box_{col}.png", "box", summary["box"], f"Boxplot of {col}",
+                              figsize=(6, 4), xlabel=col))
+    return plots
+
+def create_categorical_visuals(summaries):
+    return [Plot(f"{OUTPUT_DIR}/bar_{col}.png", "bar", counts, f"Top 10 Most Frequent in {col}",
+                 figsize=(8, 4), xlabel=col, vertical=True, rotation=45)
+            for col, counts in summaries["categorical"].items()]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # Load and clean data
-    df = pd.read_csv(FILE_PATH)
-    df = clean_dataframe(df)
+    # Load and clean data, then summarize it for the plots (only when the cached summaries are missing or stale)
+    numeric = numeric_columns(cached_schema(FILE_PATH))
+    version = [CACHE_VERSION, numeric]
+    summaries = cached_summaries(FILE_PATH, "viz_fb_posts", version, lambda: summarize(
+        cached_pandas(FILE_PATH, "viz_fb_posts", version, lambda: read_table(numeric)), numeric),
+        os.path.dirname(OUTPUT_DIR))
 
     # Generate plots
-    create_numeric_visuals(df)
-    create_categorical_visuals(df)
+    start = time.perf_counter()
+    times = render_all(create_numeric_visuals(summaries) + create_categorical_visuals(summaries), args.workers)
+    print_render_times(times, time.perf_counter() - start)
 
     print(f"✅ All visualizations saved to ./{OUTPUT_DIR}/")
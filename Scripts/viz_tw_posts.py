@@ -1,11 +1,18 @@
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import time
+
+from column_schema import cached_schema, columns_of_kind
+from plot_render import Plot, add_render_arguments, print_render_times, render_all
+from plot_summary import cached_summaries, column_summary
+from table_cache import cached_pandas
 
 # File paths
 FILE_PATH = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Datasets/2024_tw_posts_president_scored_anon.csv"
 OUTPUT_DIR = "C:/Users/Pratik/Desktop/Syracuse_Research/Task_04/Outputs/plots_tw_posts"
+# Bump when the cleaning changes so the cached cleaned table is rebuilt
+CACHE_VERSION = 2
 
 # Define column categories
 NUMERIC_COLS = [
@@ -31,51 +38,69 @@ BINARY_COLS = [
     'fraud_illuminating', 'isRetweet', 'isQuote', 'isConversationControlled', 'z'
 ]
 
-def clean_dataframe(df):
+def plotted_columns(schema):
+    # Declared columns first, then any other the sampled schema (column_schema) found numeric or 0/1
+    numeric = NUMERIC_COLS + columns_of_kind(schema, "numeric", exclude=NUMERIC_COLS)
+    return numeric, BINARY_COLS + columns_of_kind(schema, "binary", exclude=numeric + BINARY_COLS)
+
+def clean_dataframe(df, signed=()):
+    # `signed` columns (numeric by the schema alone, see column_schema.parse_signed) keep their "-"
     for col in df.columns:
         if df[col].dtype == object:
-            df[col] = df[col].str.replace(",", "", regex=False).str.replace("-", "", regex=False).str.strip()
+            df[col] = df[col].str.replace(",", "", regex=False)
+            if col not in signed:
+                df[col] = df[col].str.replace("-", "", regex=False)
+            df[col] = df[col].str.strip()
         try:
             df[col] = pd.to_numeric(df[col], errors="coerce")
         except Exception:
             continue
     return df
 
-def plot_numeric(df):
-    for col in NUMERIC_COLS:
-        if col in df.columns and df[col].dropna().notna().any():
-            plt.figure(figsize=(6, 4))
-            sns.histplot(df[col].dropna(), kde=True, bins=30)
-            plt.title(f"Distribution of {col}")
-            plt.tight_layout()
-            plt.savefig(f"{OUTPUT_DIR}/hist_{col}.png")
-            plt.clf()
+def read_table(columns, signed=()):
+    # Only the plotted columns are read and converted
+    return clean_dataframe(pd.read_csv(FILE_PATH, usecols=lambda col: col in columns), signed)
 
-            plt.figure(figsize=(6, 4))
-            sns.boxplot(x=df[col].dropna())
-            plt.title(f"Boxplot of {col}")
-            plt.tight_layout()
-            plt.savefig(f"{OUTPUT_DIR}/box_{col}.png")
-            plt.clf()
+def summarize(df, numeric, flags):
+    # Everything the plots are drawn from: bins and box statistics per numeric column, top flag counts
+    numeric = {col: column_summary(df[col].dropna()) for col in numeric
+               if col in df.columns and df[col].notna().any()}
+    valid_flags = [col for col in flags if col in df.columns and df[col].dropna().isin([0, 1]).all()]
+    flag_sums = df[valid_flags].sum().sort_values(ascending=False).head(10) if valid_flags else pd.Series(dtype=float)
+    return {"numeric": numeric, "flags": [[str(col), int(total)] for col, total in flag_sums.items()]}
 
-def plot_binary_flags(df):
-    valid_flags = [col for col in BINARY_COLS if col in df.columns and df[col].dropna().isin([0, 1]).all()]
-    if valid_flags:
-        flag_sums = df[valid_flags].sum().sort_values(ascending=False).head(10)
-        plt.figure(figsize=(8, 5))
-        sns.barplot(x=flag_sums.values, y=flag_sums.index)
-        plt.title("Top 10 Binary Flags (Sum=1's)")
-        plt.xlabel("Count of 1's")
-        plt.tight_layout()
-        plt.savefig(f"{OUTPUT_DIR}/binary_flags_summary.png")
-        plt.clf()
+def plot_numeric(summaries):
+    plots = []
+    for col, summary in summaries["numeric"].items():
+        if summary:
+            plots.append(Plot(f"{OUTPUT_DIR}/hist_{col}.png", "hist", summary["hist"], f"Distribution of {col}",
+                              figsize=(6, 4), xlabel=col))
+            plots.append(Plot(f"{OUTPUT_DIR}/box_{col}.png", "box", summary["box"], f"Boxplot of {col}",
+                              figsize=(6, 4), xlabel=col))
+    return plots
+
+def plot_binary_flags(summaries):
+    if not summaries["flags"]:
+        return []
+    return [Plot(f"{OUTPUT_DIR}/binary_flags_summary.png", "bar", summaries["flags"], "Top 10 Binary Flags (Sum=1's)",
+                 figsize=(8, 5), xlabel="Count of 1's")]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    df = pd.read_csv(FILE_PATH)
-    df = clean_dataframe(df)
+    # The cleaned table is only loaded when the cached summaries are missing or stale
+    numeric, flags = plotted_columns(cached_schema(FILE_PATH))
+    signed = numeric[len(NUMERIC_COLS):]
+    version = [CACHE_VERSION, numeric, flags]
+    summaries = cached_summaries(FILE_PATH, "viz_tw_posts", version, lambda: summarize(
+        cached_pandas(FILE_PATH, "viz_tw_posts", version, lambda: read_table(numeric + flags, signed)), numeric, flags),
+        os.path.dirname(OUTPUT_DIR))
 
-    plot_numeric(df)
-    plot_binary_flags(df)
+    start = time.perf_counter()
+    times = render_all(plot_numeric(summaries) + plot_binary_flags(summaries), args.workers)
+    print_render_times(times, time.perf_counter() - start)
 
     print(f"✅ Twitter post visualizations saved to {OUTPUT_DIR}")
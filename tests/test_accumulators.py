@@ -0,0 +1,192 @@
+import math
+import pickle
+import random
+import statistics
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+import pytest
+
+from accumulators import (QUANTILE_K, QUARTILES, DistinctAccumulator, GroupedAccumulator, HeavyHitterAccumulator,
+                          NumericAccumulator, QuantileSketch, SummaryAccumulator)
+
+
+def chunks(values, n):
+    size = math.ceil(len(values) / n)
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+def roundtrip(acc):
+    # Partial states reach the parent process pickled
+    return pickle.loads(pickle.dumps(acc))
+
+def merged(make, values, n, add="add"):
+    result = make()
+    for part in chunks(values, n):
+        acc = make()
+        for val in part:
+            getattr(acc, add)(val)
+        result.merge(roundtrip(acc))
+    return result
+
+def serial(make, values, add="add"):
+    acc = make()
+    for val in values:
+        getattr(acc, add)(val)
+    return acc
+
+def parse_float(val):
+    try:
+        return float(val)
+    except ValueError:
+        return None
+
+
+# ---- SINGLE PASS MATCHES A DIRECT COMPUTATION ----
+def test_numeric_matches_direct_computation():
+    rng = random.Random(0)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(5000)]
+    a = serial(NumericAccumulator, values)
+    assert (a.count, a.min, a.max) == (len(values), min(values), max(values))
+    assert a.total == pytest.approx(math.fsum(values), rel=1e-12)
+    assert a.mean == pytest.approx(statistics.fmean(values), rel=1e-12)
+    assert a.std_dev() == pytest.approx(statistics.pstdev(values), rel=1e-9)
+
+def test_summary_matches_direct_counts():
+    rng = random.Random(7)
+    rows = [{"x": rng.choice([str(rng.randint(-50, 50)), "-", "", "n/a"]), "flag": rng.choice(["0", "1", "1", ""]),
+             "lang": rng.choice(["en", "en", "es", "fr", "-"])} for _ in range(500)]
+    types = {"x": "numeric", "flag": "dummy", "lang": "categorical"}
+    stats = SummaryAccumulator(types, parse_float).update(rows).stats()
+
+    # Nulls ("", "-") are skipped; a non-null cell that does not parse counts for no numeric stat
+    numbers = [float(row["x"]) for row in rows if parse_float(row["x"]) is not None]
+    assert stats["x"]["count"] == len(numbers)
+    assert (stats["x"]["min"], stats["x"]["max"]) == (min(numbers), max(numbers))
+    assert stats["x"]["mean"] == pytest.approx(statistics.fmean(numbers), abs=0.01)
+    assert stats["x"]["std_dev"] == pytest.approx(statistics.pstdev(numbers), abs=0.01)
+
+    flags = Counter(row["flag"] for row in rows if row["flag"])
+    assert (stats["flag"]["count"], stats["flag"]["1s"], stats["flag"]["0s"]) == (
+        flags["0"] + flags["1"], flags["1"], flags["0"])
+
+    langs = Counter(row["lang"] for row in rows if row["lang"] != "-")
+    assert (stats["lang"]["count"], stats["lang"]["unique_values"]) == (sum(langs.values()), len(langs))
+    assert (stats["lang"]["most_common_value"], stats["lang"]["most_common_count"]) == langs.most_common(1)[0]
+
+def test_grouped_matches_per_group_summaries():
+    rng = random.Random(8)
+    types = {"x": "numeric", "flag": "dummy", "lang": "categorical"}
+    rows = [{"g": rng.choice(["a", "b", "c", "-"]), "x": str(rng.randint(-50, 50)), "flag": rng.choice("01"),
+             "lang": rng.choice(["en", "es", "fr"])} for _ in range(400)]
+    make_summary = lambda: SummaryAccumulator(types, parse_float)
+    result = GroupedAccumulator(make_summary, [(), ("g",)]).update(rows)
+    assert result.overall_stats() == make_summary().update(rows).stats()
+    # Rows with a null key are left out of that grouping
+    assert result.stats(("g",)) == {(g,): make_summary().update([row for row in rows if row["g"] == g]).stats()
+                                    for g in "abc"}
+
+
+# ---- MERGED STATE EQUALS A SERIAL RUN ----
+@pytest.mark.parametrize("n", [1, 2, 5])
+def test_numeric_merge_matches_serial(n):
+    rng = random.Random(1)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(5000)]
+    a = serial(NumericAccumulator, values)
+    b = merged(NumericAccumulator, values, n)
+    assert (b.count, b.min, b.max) == (a.count, a.min, a.max)
+    assert b.total == pytest.approx(a.total, rel=1e-12)
+    assert b.mean == pytest.approx(a.mean, rel=1e-12)
+    assert b.std_dev() == pytest.approx(a.std_dev(), rel=1e-9)
+
+def test_numeric_quartiles_exact_below_k():
+    values = [float(x) for x in random.Random(2).sample(range(1000), QUANTILE_K - 1)]
+    a = serial(NumericAccumulator, values)
+    b = merged(NumericAccumulator, values, 4)
+    assert a.sketch.exact() and b.sketch.exact()
+    assert a.quartiles() == b.quartiles()
+    # Linearly interpolated, like numpy and pandas' describe()
+    assert a.quartiles() == [round(q, 2) for q in statistics.quantiles(values, n=4, method="inclusive")]
+    assert "quartile_error" not in b.stats()
+
+def test_grouped_merge_matches_serial():
+    rng = random.Random(3)
+    types = {"x": "numeric", "flag": "dummy", "lang": "categorical", "user": "distinct", "page": "heavy"}
+    rows = [{"g": rng.choice("abc"), "x": str(rng.randint(-50, 50)), "flag": rng.choice("01"),
+             "lang": rng.choice(["en", "es", "fr", "-"]), "user": f"u{rng.randint(0, 80)}",
+             "page": f"p{rng.randint(0, 10)}"} for _ in range(180)]
+    make_summary = lambda: SummaryAccumulator(types, float)
+    grouping_sets = [(), ("g",)]
+    a = GroupedAccumulator(make_summary, grouping_sets).update(rows)
+    b = GroupedAccumulator(make_summary, grouping_sets)
+    for part in chunks(rows, 4):
+        b.merge_state(roundtrip(GroupedAccumulator(make_summary, grouping_sets).update(part).state()))
+    for keys in grouping_sets:
+        assert b.stats(keys) == a.stats(keys)
+
+def test_top_values_merge_matches_serial():
+    rng = random.Random(4)
+    values = [f"v{int(rng.paretovariate(1.2))}" for _ in range(3000)]
+    a = serial(HeavyHitterAccumulator, values)
+    b = merged(HeavyHitterAccumulator, values, 3)
+    assert a.distinct is None, "few enough values to be counted exactly"
+    assert b.top(10) == a.top(10) == Counter(values).most_common(10)
+    assert b.stats() == a.stats()
+
+
+# ---- QUANTILE SKETCH RANK ERROR ----
+def rank_error(ordered, value, q):
+    # Distance of q from the ranks `value` holds in the data, as a fraction of the count
+    lo = bisect_left(ordered, value) / len(ordered)
+    hi = bisect_right(ordered, value) / len(ordered)
+    return max(lo - q, q - hi, 0.0)
+
+DISTRIBUTIONS = {
+    "uniform": lambda rng, n: [rng.random() for _ in range(n)],
+    "sorted": lambda rng, n: sorted(rng.random() for _ in range(n)),
+    "reversed": lambda rng, n: sorted((rng.random() for _ in range(n)), reverse=True),
+    "lognormal": lambda rng, n: [rng.lognormvariate(0, 2) for _ in range(n)],
+    "ties": lambda rng, n: [float(rng.randint(0, 20)) for _ in range(n)],
+}
+
+@pytest.mark.parametrize("name", DISTRIBUTIONS)
+@pytest.mark.parametrize("n", [1, 4])
+def test_quantile_rank_error_within_bound(name, n):
+    values = DISTRIBUTIONS[name](random.Random(5), 50000)
+    sketch = merged(QuantileSketch, values, n)
+    assert not sketch.exact()
+    ordered = sorted(values)
+    qs = QUARTILES + (0.01, 0.1, 0.9, 0.99)
+    for q, value in zip(qs, sketch.quantiles(qs)):
+        assert rank_error(ordered, value, q) <= sketch.error
+
+
+# ---- DISTINCT COUNT ERROR ----
+@pytest.mark.parametrize("cardinality", [50, 1000, 20000, 200000])
+def test_distinct_relative_error_within_bound(cardinality):
+    values = [f"id{i}" for i in range(cardinality)]
+    a = serial(DistinctAccumulator, values)
+    if a.exact():
+        assert a.estimate() == cardinality
+        return
+    # Three standard errors; the hashes are fixed, so this never flakes
+    assert abs(a.estimate() - cardinality) <= 3 * a.error * cardinality
+    b = merged(DistinctAccumulator, values + values[::3], 4)
+    assert b.estimate() == a.estimate()
+    assert b.count == cardinality + len(values[::3])
+
+
+# ---- HEAVY HITTER ERROR ----
+@pytest.mark.parametrize("n", [1, 3, 8])
+def test_heavy_hitter_error_bound(n):
+    rng = random.Random(6)
+    values = [f"v{int(rng.paretovariate(0.8))}" for _ in range(20000)]
+    acc = merged(lambda: HeavyHitterAccumulator(capacity=16), values, n)
+    truth = Counter(values)
+    assert acc.distinct is not None, "enough distinct values to have been reduced"
+    assert acc.count == len(values)
+    assert acc.error <= acc.count / (acc.capacity + 1)
+    for val, true_count in truth.items():
+        kept = acc.counts.get(val, 0)
+        assert true_count - acc.error <= kept <= true_count
+        if true_count > acc.error:
+            assert val in acc.counts